@@ -6,11 +6,14 @@
 
 from .core import (
     Fun,
+    GradientFitState,
     SpectralGradientFit,
     SpectralSobolev1Fit,
     build_evaluator,
     build_fitter,
     build_grad_evaluator,
+    build_incremental_fitter,
+    build_projector,
     collect_exponents,
     compute_mesh,
     scale,
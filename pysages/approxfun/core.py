@@ -4,13 +4,16 @@
 from abc import ABC
 from dataclasses import dataclass
 from functools import partial
-from itertools import product
 
+import numpy
 from jax import jit
 from jax import numpy as np
 from jax import vmap
+from jax.lax import cond
+from jax.scipy.fft import dctn
+from numpy.polynomial.chebyshev import poly2cheb
 
-from pysages.grids import Chebyshev, Grid
+from pysages.grids import Chebyshev, Grid, Periodic
 from pysages.typing import JaxArray, NamedTuple
 from pysages.utils import dispatch
 
@@ -26,6 +29,34 @@ class Fun(NamedTuple):
     c0: float
 
 
+class GradientFitState(NamedTuple):
+    """
+    Running state of the least-squares fit of a basis functions expansion to the
+    gradient `dy` of a function (see `pysages.approxfun.build_incremental_fitter`).
+
+    coefficients: JaxArray
+        Coefficients for the (unnormalized) target values, `model.pinv @ dy.flatten()`.
+
+    dy: JaxArray
+        Target values of the last fit.
+
+    sums: JaxArray
+        Sum of the target values along each dimension.
+
+    sq_sums: JaxArray
+        Sum of the squared target values along each dimension.
+
+    nfits: int
+        Number of fits performed since the last full fit.
+    """
+
+    coefficients: JaxArray
+    dy: JaxArray
+    sums: JaxArray
+    sq_sums: JaxArray
+    nfits: int
+
+
 @dataclass
 class AbstractFit(ABC):
     """
@@ -33,24 +64,38 @@ class AbstractFit(ABC):
     of a basis (Fourier of Chebyshev) expansion of a function (ℝⁿ ↦ ℝ)
     that minimizes the squared error with respect to a set of given
     target values.
+
+    The multi-indices of the basis functions are selected according to `index_set`
+    (see `pysages.approxfun.collect_exponents`).
     """
 
     grid: Grid
     mesh: JaxArray
-    pinv: JaxArray
     exponents: JaxArray
+    index_set: str
 
-    def __init__(self, grid: Grid):
-        ns = collect_exponents(grid)
+    def __init__(self, grid: Grid, index_set: str = "euclidean"):
+        ns = collect_exponents(grid, index_set)
         self.grid = grid
         self.mesh = compute_mesh(grid)
         self.exponents = ns
-        self.pinv = pinv(self)
+        self.index_set = index_set
+        self._pinv = None
 
     @property
     def is_periodic(self):
         return self.grid.is_periodic
 
+    @property
+    def pinv(self):
+        """
+        Dense pseudo-inverse of the least-squares problem. It is only computed when
+        first accessed, as the fitters avoid it whenever a fast transform is available.
+        """
+        if getattr(self, "_pinv", None) is None:
+            self._pinv = pinv(self)
+        return self._pinv
+
 
 class SpectralGradientFit(AbstractFit):
     """
@@ -70,30 +115,60 @@ class SpectralSobolev1Fit(AbstractFit):
     pass
 
 
-def collect_exponents(grid):
-    if grid.shape.size > 2:
-        raise ValueError("Only 1D and 2D grids are supported")
+INDEX_SETS = {
+    "euclidean": lambda ns: (ns**2).sum(axis=1),
+    "total_degree": lambda ns: numpy.abs(ns).sum(axis=1),
+    "hyperbolic_cross": lambda ns: (1 + numpy.abs(ns)).prod(axis=1) - 1,
+}
+
+
+def collect_exponents(grid, index_set: str = "euclidean"):
+    """
+    Returns the exponents (one row per basis function) of the expansion over `grid`.
+
+    The highest degree `k = ⌊√r⌋` along each axis grows with the resolution of the grid,
+    and `index_set` selects which of the multi-indices `n` with `|nᵢ| ≤ k` are kept:
+
+    * `"euclidean"` (default): `∑ nᵢ² ≤ r`.
+    * `"total_degree"`: `∑ |nᵢ| ≤ k`.
+    * `"hyperbolic_cross"`: `∏ (1 + |nᵢ|) ≤ k + 1`.
+
+    Each set is contained in the previous one. The sparser sets keep the size of the
+    basis manageable for grids of more than two or three dimensions. For periodic grids,
+    only one of `n` and `-n` is kept.
+    """
+    if index_set not in INDEX_SETS:
+        raise ValueError(f"Unknown index set {index_set!r}, expected one of {tuple(INDEX_SETS)}")
     #
     if grid.is_periodic:
         r = grid.shape.sum() / 4
     else:
         r = np.square(grid.shape).sum() / 16
-    n = int(np.floor(np.sqrt(r))) + 1
-    r = float(r)
+    k = int(np.floor(np.sqrt(r)))
+    bound = float(r) if index_set == "euclidean" else k
+    cost = INDEX_SETS[index_set]
     #
-    if grid.shape.size == 1:
-        return np.arange(1, n).reshape(-1, 1)
+    # Add one axis at a time, dropping the multi-indices beyond the bound as we go
+    # (the costs never decrease when adding axes)
+    values = numpy.arange(-k if grid.is_periodic else 0, k + 1)
+    exponents = numpy.zeros((1, 0), dtype=int)
+    for _ in range(grid.shape.size):
+        exponents = numpy.hstack(
+            (
+                numpy.repeat(exponents, values.size, axis=0),
+                numpy.tile(values, len(exponents)).reshape(-1, 1),
+            )
+        )
+        exponents = exponents[cost(exponents) <= bound]
     #
-    m = 1 - n if grid.is_periodic else 1
-    pairs = product(range(1, n), range(m, n))
-    exponents = np.vstack(
-        [
-            [(0, i) for i in range(1, n)],
-            [(i, 0) for i in range(1, n)],
-            [t for t in pairs if t[1] != 0 and t[0] ** 2 + t[1] ** 2 <= r],
-        ]
-    )
-    return exponents
+    # Drop the constant term and, for periodic grids, the multi-indices whose
+    # first nonzero entry is negative
+    nonzero = exponents != 0
+    leading = exponents[numpy.arange(len(exponents)), nonzero.argmax(axis=1)]
+    exponents = exponents[leading > 0]
+    # List first the exponents along each axis
+    order = numpy.argsort((exponents != 0).sum(axis=1) > 1, kind="stable")
+    return np.asarray(exponents[order])
 
 
 def scale(x, grid: Grid):
@@ -166,28 +241,23 @@ def vandergrad_builder(grid, exponents):
     """
     s = 2 * (np.pi if grid.is_periodic else 1) / grid.size
     ns = exponents
+    is_other_axis = ~np.eye(grid.shape.size, dtype=bool)
 
-    if grid.shape.size == 1:
-
-        def flip_multiply(x, y):
-            return x
-
-    else:
-
-        def flip_multiply(x, y):
-            return x * np.fliplr(y)
+    def multiply_others(x, y):
+        # Multiplies each `x[:, i]` by the product of `y[:, j]` for all `j != i`
+        return x * np.where(is_other_axis, y[:, None, :], 1).prod(axis=-1)
 
     if grid.is_periodic:
 
         def expand(x):
             z = np.exp(-1j * np.pi * ns * x)
-            return flip_multiply(s * ns * z, z).T
+            return multiply_others(s * ns * z, z).T
 
     else:
 
         def expand(x):
             z = x ** (np.maximum(ns - 1, 0))
-            return flip_multiply(s * ns * z, x**ns).T
+            return multiply_others(s * ns * z, x**ns).T
 
     return jit(lambda xs: vmap(expand)(xs).reshape(-1, np.size(ns, 0)))
 
@@ -220,6 +290,143 @@ def pinv(model: SpectralSobolev1Fit):  # noqa: F811 # pylint: disable=C0116,E010
     return np.linalg.pinv(np.vstack((U, V)))
 
 
+def build_projector(model: SpectralGradientFit):
+    """
+    Returns a pair of functions `(project, columns)`, where `project(dy)` computes the
+    least-squares coefficients `model.pinv @ dy.flatten()` for the gradient `dy`, and
+    `columns(idx)` returns the columns of `model.pinv` (reshaped to `(n, -1, d)`) for the
+    points of the mesh with flat indices `idx`.
+
+    Both are evaluated with fast transforms (FFT for periodic grids, DCT for Chebyshev
+    grids) when the basis is resolved by the grid, so the dense pseudo-inverse is never
+    built. Otherwise, they fall back to `model.pinv`.
+    """
+    projector = _build_transform_projector(model.grid, model.exponents, model.mesh)
+
+    if projector is not None:
+        return projector
+
+    d = model.grid.shape.size
+    n = model.pinv.shape[0]
+    pinv = model.pinv.reshape(n, -1, d)
+
+    def project(dy):
+        return model.pinv @ dy.flatten()
+
+    def columns(idx):
+        return pinv[:, idx]
+
+    return project, columns
+
+
+@dispatch
+def _build_transform_projector(grid: Grid, exponents, mesh):
+    # No fast transform available, use the dense pseudo-inverse
+    return None
+
+
+@dispatch
+def _build_transform_projector(  # noqa: F811 # pylint: disable=C0116,E0102
+    grid: Grid[Periodic], exponents, mesh
+):
+    # On the uniform mesh, the Fourier modes with |n| < N / 2 are orthogonal, so the
+    # normal equations are diagonal and their right-hand side follows from a DFT of `dy`.
+    ns = numpy.asarray(exponents)
+    shape = numpy.asarray(grid.shape)
+
+    if numpy.any(2 * numpy.abs(ns) >= shape):
+        return None
+
+    d = shape.size
+    axes = tuple(range(d))
+    weights = 2 * numpy.pi / numpy.asarray(grid.size) * ns
+    # Relates the DFT to the sums over the cell-centered mesh
+    phases = numpy.exp(1j * numpy.pi * (ns * (1 - 1 / shape)).sum(axis=1))
+    modes = tuple((ns % shape).T)
+    norms = shape.prod() / 2 * (weights**2).sum(axis=1)
+    norms = numpy.concatenate((norms, norms))
+    ns = ns.astype(float)
+
+    def project(dy):
+        dy = dy.reshape(*shape, d)
+        # `np.fft.fftn` is limited to three axes, so we transform one axis at a time
+        for axis in axes:
+            dy = np.fft.fft(dy, axis=axis)
+        b = (weights * dy[modes]).sum(axis=1) * phases
+        return np.concatenate((np.imag(b), np.real(b))) / norms
+
+    def columns(idx):
+        z = np.exp(-1j * np.pi * mesh[idx] @ ns.T)[..., None] * weights
+        cs = np.concatenate((np.imag(z), np.real(z)), axis=1)
+        return cs.transpose(1, 0, 2) / norms[:, None, None]
+
+    return project, columns
+
+
+@dispatch
+def _build_transform_projector(  # noqa: F811 # pylint: disable=C0116,E0102
+    grid: Grid[Chebyshev], exponents, mesh
+):
+    # The gradients of the monomial basis are expanded in Chebyshev polynomials, which
+    # are orthogonal over the Chebyshev mesh. Their projections onto `dy` follow from a
+    # DCT, and only a small least-squares problem over the modes remains to be solved.
+    ns = numpy.asarray(exponents)
+    shape = numpy.asarray(grid.shape)
+    k = ns.max()
+
+    if numpy.any(ns.max(axis=0) >= shape):
+        return None
+
+    d = shape.size
+    axes = tuple(range(d))
+    s = 2 / numpy.asarray(grid.size)
+    # Chebyshev coefficients of the monomials up to degree `k`
+    C = numpy.zeros((k + 1, k + 1))
+    for i in range(k + 1):
+        C[i, : i + 1] = poly2cheb(numpy.eye(i + 1)[i])
+
+    # Exponents of the monomials of each gradient component, and the Chebyshev modes
+    # spanned by them (the multi-indices bounded above by any of those exponents)
+    ps = [ns - e for e in numpy.eye(d, dtype=int)]
+    modes = set(map(tuple, numpy.vstack(ps)[(numpy.vstack(ps) >= 0).all(axis=1)]))
+    pending = list(modes)
+    while pending:
+        m = pending.pop()
+        for e in numpy.eye(d, dtype=int):
+            lower = tuple(numpy.subtract(m, e))
+            if min(lower) >= 0 and lower not in modes:
+                modes.add(lower)
+                pending.append(lower)
+    modes = numpy.array(sorted(modes))
+
+    # Maps the coefficients to the Chebyshev coefficients of each gradient component
+    M = numpy.stack(
+        [
+            numpy.where(p[:, j] >= 0, s[j] * ns[:, j], 0)
+            * numpy.prod([C[p[:, i]][:, modes[:, i]] for i in axes], axis=0).T
+            for j, p in enumerate(ps)
+        ]
+    )
+    # Square roots of the (diagonal) Gram matrix of the Chebyshev modes over the mesh
+    g = numpy.sqrt(numpy.where(modes == 0, shape, shape / 2).prod(axis=1))
+    P = numpy.linalg.pinv((g[:, None] * M).reshape(d * len(modes), -1))
+    P = P.reshape(-1, d, len(modes)) / g
+    # T_k(-cos θ) = (-1)^k cos(k θ), and the unnormalized DCT-II has a factor of two
+    signs = ((-1) ** modes / 2).prod(axis=1)
+    indices = tuple(modes.T)
+    modes = modes.astype(float)
+
+    def project(dy):
+        t = dctn(dy.reshape(*shape, d), axes=axes)[indices]
+        return np.einsum("njm,mj->n", P, signs[:, None] * t)
+
+    def columns(idx):
+        T = np.cos(np.arccos(mesh[idx])[:, None, :] * modes).prod(axis=-1)
+        return np.einsum("njm,km->nkj", P, T)
+
+    return project, columns
+
+
 @dispatch
 def build_fitter(model: SpectralGradientFit):
     """
@@ -227,8 +434,12 @@ def build_fitter(model: SpectralGradientFit):
     of a function `f` evaluated over the set `x = compute_mesh(model.grid)`,
     and returns a `fun: Fun` object which approximates `f` over
     the domain [-1, 1]ⁿ.
+
+    The least-squares problem is solved via fast transforms when possible
+    (see `pysages.approxfun.build_projector`).
     """
     axes = tuple(range(model.grid.shape.size))
+    project, _ = build_projector(model)
 
     if model.is_periodic:
 
@@ -236,7 +447,7 @@ def build_fitter(model: SpectralGradientFit):
             std = dy.std(axis=axes).max()
             std = np.where(std == 0, 1, std)
             dy = (dy - dy.mean(axis=axes)) / std
-            return Fun(std, model.pinv @ dy.flatten(), np.array(0.0))
+            return Fun(std, project(dy), np.array(0.0))
 
     else:
 
@@ -244,7 +455,7 @@ def build_fitter(model: SpectralGradientFit):
             std = dy.std(axis=axes).max()
             std = np.where(std == 0, 1, std)
             dy = dy / std
-            return Fun(std, model.pinv @ dy.flatten(), np.array(0.0))
+            return Fun(std, project(dy), np.array(0.0))
 
     return jit(fit)
 
@@ -271,6 +482,61 @@ def build_fitter(model: SpectralSobolev1Fit):  # noqa: F811 # pylint: disable=C0
     return jit(fit)
 
 
+def build_incremental_fitter(model: SpectralGradientFit, max_updates: int, refit_freq: int):
+    """
+    Returns a pair of functions `(init, fit)` that perform the same least-squares fit as
+    `build_fitter(model)`, but where each fit only updates the coefficients from the
+    entries of `dy` that changed since the previous one (exploiting the linearity of
+    `model.pinv @ dy`, see `pysages.approxfun.build_projector`).
+
+    `init(dy)` fits `dy` from scratch and returns a `GradientFitState`, while
+    `fit(state, dy)` returns the updated state and the corresponding `fun: Fun`.
+
+    A full fit is performed instead when more than `max_updates` grid points changed,
+    or every `refit_freq` fits, to bound the accumulation of round-off errors.
+    """
+    d = model.grid.shape.size
+    project, columns = build_projector(model)
+    # Coefficients of a constant target along each dimension
+    constants = np.stack([project(np.ones((*model.grid.shape, d)) * e) for e in np.eye(d)], 1)
+
+    def to_fun(state):
+        size = state.dy.size // d
+        mean = state.sums / size
+        std = np.sqrt(np.maximum(state.sq_sums / size - mean**2, 0)).max()
+        std = np.where(std == 0, 1, std)
+        coefficients = state.coefficients
+        if model.is_periodic:
+            coefficients = coefficients - constants @ mean
+        return Fun(std, coefficients / std, np.array(0.0))
+
+    def init(dy):
+        coefficients = project(dy)
+        dy = dy.reshape(-1, d)
+        return GradientFitState(coefficients, dy, dy.sum(axis=0), (dy**2).sum(axis=0), 0)
+
+    def update(state, dy):
+        changed = np.any(dy != state.dy, axis=1)
+        (idx,) = np.nonzero(changed, size=max_updates, fill_value=0)
+        # Discard the padding entries of `idx`
+        is_update = (np.arange(max_updates) < changed.sum())[:, None]
+        old, new = state.dy[idx], np.where(is_update, dy[idx], state.dy[idx])
+        delta = new - old
+        coefficients = state.coefficients + np.einsum("nkd,kd->n", columns(idx), delta)
+        sums = state.sums + delta.sum(axis=0)
+        sq_sums = state.sq_sums + (new**2 - old**2).sum(axis=0)
+        return GradientFitState(coefficients, dy, sums, sq_sums, state.nfits + 1)
+
+    def fit(state, dy):
+        dy = dy.reshape(-1, d)
+        changes = np.any(dy != state.dy, axis=1).sum()
+        refit = (changes > max_updates) | (state.nfits + 1 >= refit_freq)
+        state = cond(refit, lambda s, dy: init(dy), update, state, dy)
+        return state, to_fun(state)
+
+    return jit(init), jit(fit)
+
+
 def build_evaluator(model):
     """
     Returns a method to evaluate the Fourier or Chebyshev expansion defined
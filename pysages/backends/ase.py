@@ -3,6 +3,7 @@
 
 from inspect import Parameter, signature
 
+import numpy
 from ase.calculators.calculator import Calculator
 from jax import jit
 from jax import numpy as np
@@ -14,6 +15,7 @@ from pysages.backends.snapshot import (
     Snapshot,
     SnapshotMethods,
     build_data_querier,
+    shared_helpers,
 )
 from pysages.backends.utils import view
 from pysages.typing import Callable, NamedTuple
@@ -85,13 +87,20 @@ class Sampler(Calculator):
         self._biased_forces = new_forces
         return self.biased_forces
 
+    def rebind(self, method_bundle, callback: Callable):
+        _, initialize, method_update = method_bundle
+        self.callback = callback
+        self.state = initialize()
+        self.update = method_update
+
     def restore(self, prev_snapshot):
         atoms = self.atoms
         momenta, masses = prev_snapshot.vel_mass
         atoms.set_positions(prev_snapshot.positions)
         atoms.set_masses(masses.flatten())  # masses need to be set before momenta
         atoms.set_momenta(momenta, apply_constraint=False)
-        atoms.set_cell(list(prev_snapshot.box.H))
+        # Convert on the host, as unpacking a device array would compile a function
+        atoms.set_cell(numpy.asarray(prev_snapshot.box.H))
         self.snapshot = prev_snapshot
 
     def take_snapshot(self):
@@ -141,14 +150,17 @@ def build_snapshot_methods(context, sampling_method):
 
 
 def build_helpers(context, sampling_method):
+    flags = frozenset(sampling_method.snapshot_flags)
+
     def dimensionality():
         return 3  # are all ASE simulations boxes 3-dimensional?
 
-    snapshot_methods = build_snapshot_methods(context, sampling_method)
-    flags = sampling_method.snapshot_flags
-    helpers = HelperMethods(build_data_querier(snapshot_methods, flags), dimensionality)
+    def build_helper_methods():
+        snapshot_methods = build_snapshot_methods(context, sampling_method)
+        return HelperMethods(build_data_querier(snapshot_methods, flags), dimensionality)
 
-    return helpers
+    # The helpers only depend on the snapshot data queried by the method
+    return shared_helpers(("ase", flags), build_helper_methods)
 
 
 class View(NamedTuple):
@@ -169,3 +181,14 @@ def bind(sampling_context: SamplingContext, callback: Callable, **kwargs):
     sampling_context.view = View((lambda: None))
     sampling_context.run = context.run
     return sampler
+
+
+def rebind(sampling_context: SamplingContext, callback: Callable, **kwargs):
+    """
+    Builds `sampling_context.method` and swaps it in place of the sampling method
+    currently bound to the simulation context, which is otherwise left untouched.
+    """
+    sampler = sampling_context.sampler
+    sampling_method = sampling_context.method
+    helpers = build_helpers(sampling_context, sampling_method)
+    sampler.rebind(sampling_method.build(sampler.take_snapshot(), helpers), callback)
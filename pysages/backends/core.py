@@ -98,8 +98,8 @@ class SamplingContext:
         self.view = None
         self.run = None
 
-        backend = import_module("." + self._backend_name, package="pysages.backends")
-        self.sampler = backend.bind(self, callback, **kwargs)
+        self._backend = import_module("." + self._backend_name, package="pysages.backends")
+        self.sampler = self._backend.bind(self, callback, **kwargs)
 
         # `self.view` and `self.run` *must* be set by the backend bind function.
         assert self.view is not None
@@ -109,6 +109,17 @@ class SamplingContext:
     def backend_name(self):
         return self._backend_name
 
+    def rebind(self, sampling_method, callback: Optional[Callable] = None, **kwargs):
+        """
+        Binds a new sampling method (and callback) to the simulation context, without
+        regenerating the context nor hooking PySAGES again into the backend.
+        The current configuration of the system is kept, while the state of the
+        sampling method is initialized from it.
+        """
+        self.method = sampling_method
+        self._backend.rebind(self, callback, **kwargs)
+        return self.sampler
+
     def __enter__(self):
         """
         Trampoline 'with statements' to the wrapped context when the backend supports it.
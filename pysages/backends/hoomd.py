@@ -31,6 +31,7 @@ from pysages.backends.snapshot import (
     build_data_querier,
 )
 from pysages.backends.snapshot import restore as _restore
+from pysages.backends.snapshot import shared_helpers
 from pysages.typing import Callable
 from pysages.utils import check_device_array, copy
 
@@ -97,7 +98,7 @@ class Sampler(SamplerBase):
 
         def update(positions, vel_mass, rtags, images, forces, timestep):
             snapshot = self._pack_snapshot(positions, vel_mass, forces, rtags, images)
-            self.state = method_update(snapshot, self.state)
+            self.state = self._method_update(snapshot, self.state)
             self.bias(snapshot, self.state)
             if self.callback:
                 self.callback(snapshot, self.state, timestep)
@@ -108,8 +109,15 @@ class Sampler(SamplerBase):
         self.box = initial_snapshot.box
         self.callback = callback
         self.dt = initial_snapshot.dt
+        self._method_update = method_update
         self._restore = restore
 
+    def rebind(self, method_bundle, callback: Callable):
+        _, initialize, method_update = method_bundle
+        self.callback = callback
+        self.state = initialize()
+        self._method_update = method_update
+
     def restore(self, prev_snapshot):
         def restore_callback(positions, vel_mass, rtags, images, forces, n):
             snapshot = self._pack_snapshot(positions, vel_mass, forces, rtags, images)
@@ -233,10 +241,14 @@ def build_helpers(context, sampling_method):
     def dimensionality():
         return 3  # all HOOMD-blue simulations boxes are 3-dimensional
 
-    snapshot_methods = build_snapshot_methods(sampling_method)
-    flags = sampling_method.snapshot_flags
+    def build_helper_methods():
+        snapshot_methods = build_snapshot_methods(sampling_method)
+        return HelperMethods(build_data_querier(snapshot_methods, flags), dimensionality)
+
+    flags = frozenset(sampling_method.snapshot_flags)
     restore = partial(_restore, view)
-    helpers = HelperMethods(build_data_querier(snapshot_methods, flags), dimensionality)
+    key = ("hoomd", flags, sampling_method.requires_box_unwrapping)
+    helpers = shared_helpers(key, build_helper_methods)
 
     return helpers, restore, bias
 
@@ -262,6 +274,17 @@ def bind(sampling_context: SamplingContext, callback: Callable, **kwargs):
     return sampler
 
 
+def rebind(sampling_context: SamplingContext, callback: Callable, **kwargs):
+    """
+    Builds `sampling_context.method` and swaps it in place of the sampling method
+    currently bound to the simulation context, which is otherwise left untouched.
+    """
+    sampler = sampling_context.sampler
+    sampling_method = sampling_context.method
+    helpers, *_ = build_helpers(sampling_context.context, sampling_method)
+    sampler.rebind(sampling_method.build(sampler.take_snapshot(), helpers), callback)
+
+
 def detach(context):
     """
     If pysages was bound to this context, this removes the corresponding
@@ -12,6 +12,7 @@ from pysages.backends.snapshot import (
     Snapshot,
     SnapshotMethods,
     build_data_querier,
+    shared_helpers,
 )
 from pysages.typing import Callable, NamedTuple
 from pysages.utils import check_device_array, copy
@@ -26,6 +27,12 @@ class Sampler:
         self.snapshot = initial_snapshot
         self.update = method_update
 
+    def rebind(self, method_bundle, callback: Callable):
+        _, initialize, method_update = method_bundle
+        self.callback = callback
+        self.state = initialize()
+        self.update = method_update
+
     def restore(self, prev_snapshot):
         self.snapshot = prev_snapshot
 
@@ -75,14 +82,17 @@ def build_snapshot_methods(context, sampling_method):
 
 
 def build_helpers(context, sampling_method):
+    dim = context.box.shape[0]
+    flags = frozenset(sampling_method.snapshot_flags)
+
     def dimensionality():
-        return context.box.shape[0]
+        return dim
 
-    snapshot_methods = build_snapshot_methods(context, sampling_method)
-    flags = sampling_method.snapshot_flags
-    helpers = HelperMethods(build_data_querier(snapshot_methods, flags), dimensionality)
+    def build_helper_methods():
+        snapshot_methods = build_snapshot_methods(context, sampling_method)
+        return HelperMethods(build_data_querier(snapshot_methods, flags), dimensionality)
 
-    return helpers
+    return shared_helpers(("jax-md", flags, dim), build_helper_methods)
 
 
 def build_runner(context, sampler, jit_compile=True):
@@ -134,3 +144,19 @@ def bind(sampling_context: SamplingContext, callback: Callable, **kwargs):
         context, sampler, jit_compile=kwargs.get("jit_compile", True)
     )
     return sampler
+
+
+def rebind(sampling_context: SamplingContext, callback: Callable, **kwargs):
+    """
+    Builds `sampling_context.method` and swaps it in place of the sampling method
+    currently bound to the simulation context, which is otherwise left untouched.
+    """
+    context = sampling_context.context
+    sampler = sampling_context.sampler
+    sampling_method = sampling_context.method
+    helpers = build_helpers(context, sampling_method)
+    sampler.rebind(sampling_method.build(sampler.take_snapshot(), helpers), callback)
+    # The method update gets traced into the simulation step, so we need a new runner
+    sampling_context.run = build_runner(
+        context, sampler, jit_compile=kwargs.get("jit_compile", True)
+    )
@@ -26,6 +26,7 @@ from pysages.backends.snapshot import (
     Snapshot,
     SnapshotMethods,
     build_data_querier,
+    shared_helpers,
 )
 from pysages.typing import Callable, Optional
 from pysages.utils import copy, identity
@@ -71,13 +72,14 @@ class Sampler(FixDLExt):  # pylint: disable=R0902
         self.callback = callback
         self.snapshot = initial_snapshot
         self.state = initialize()
+        self._method_update = method_update
         self._restore = restore
         self._update_box = lambda: self.snapshot.box
 
         def update(timestep):
             self.view.synchronize()
             self.snapshot = self._update_snapshot()
-            self.state = method_update(self.snapshot, self.state)
+            self.state = self._method_update(self.snapshot, self.state)
             bias(self.snapshot, self.state)
             if self.callback:
                 self.callback(self.snapshot, self.state, timestep)
@@ -109,6 +111,15 @@ class Sampler(FixDLExt):  # pylint: disable=R0902
 
         return Snapshot(s.positions, vel_mass, s.forces, s.ids[1:], s.images, box, dt)
 
+    def rebind(self, sampling_method, callback: Optional[Callable]):
+        """Replaces the sampling method (and callback) bound to this fix."""
+        on_gpu = self.location != dlext.kOnHost
+        helpers, *_ = build_helpers(self.context, sampling_method, on_gpu, pbs.restore)
+        _, initialize, method_update = sampling_method.build(self.take_snapshot(), helpers)
+        self.callback = callback
+        self.state = initialize()
+        self._method_update = method_update
+
     def restore(self, prev_snapshot):
         """Replaces this sampler's snapshot with `prev_snapshot`."""
         self._restore(self.snapshot, prev_snapshot)
@@ -174,10 +185,14 @@ def build_helpers(context, sampling_method, on_gpu, restore_fn):
         add_bias(forces, biases)
         sync_forces()
 
-    snapshot_methods = build_snapshot_methods(sampling_method, on_gpu)
-    flags = sampling_method.snapshot_flags
+    def build_helper_methods():
+        snapshot_methods = build_snapshot_methods(sampling_method, on_gpu)
+        return HelperMethods(build_data_querier(snapshot_methods, flags), lambda: dim)
+
+    flags = frozenset(sampling_method.snapshot_flags)
     restore = partial(restore_fn, view, restore_vm=restore_vm)
-    helpers = HelperMethods(build_data_querier(snapshot_methods, flags), lambda: dim)
+    key = ("lammps", flags, sampling_method.requires_box_unwrapping, bool(on_gpu), dim)
+    helpers = shared_helpers(key, build_helper_methods)
 
     return helpers, restore, bias
 
@@ -268,3 +283,12 @@ def bind(sampling_context: SamplingContext, callback: Optional[Callable], **kwar
     weakref.finalize(context, context.finalize)
 
     return sampler
+
+
+def rebind(sampling_context: SamplingContext, callback: Optional[Callable], **kwargs):
+    """
+    Builds `sampling_context.method` and swaps it in place of the sampling method
+    currently bound to the simulation context, which is otherwise left untouched.
+    """
+    identity(kwargs)  # we ignore the kwargs for now
+    sampling_context.sampler.rebind(sampling_context.method, callback)
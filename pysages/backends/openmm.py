@@ -22,6 +22,7 @@ from pysages.backends.snapshot import (
 )
 from pysages.backends.snapshot import restore as _restore
 from pysages.backends.snapshot import restore_vm as _restore_vm
+from pysages.backends.snapshot import shared_helpers
 from pysages.typing import Callable
 from pysages.utils import check_device_array, copy, try_import
 
@@ -45,6 +46,12 @@ class Sampler:
         if self.callback:
             self.callback(self.snapshot, self.state, timestep)
 
+    def rebind(self, method_bundle, callback: Callable):
+        _, initialize, method_update = method_bundle
+        self.callback = callback
+        self.state = initialize()
+        self._update = method_update
+
     def restore(self, prev_snapshot):
         self._restore(self.snapshot, prev_snapshot)
 
@@ -168,10 +175,13 @@ def build_helpers(context, sampling_method):
     def dimensionality():
         return 3  # all OpenMM simulations boxes are 3-dimensional
 
-    snapshot_methods = build_snapshot_methods(context, sampling_method)
-    flags = sampling_method.snapshot_flags
+    def build_helper_methods():
+        snapshot_methods = build_snapshot_methods(context, sampling_method)
+        return HelperMethods(build_data_querier(snapshot_methods, flags), dimensionality)
+
+    flags = frozenset(sampling_method.snapshot_flags)
     restore = partial(_restore, view, restore_vm=restore_vm)
-    helpers = HelperMethods(build_data_querier(snapshot_methods, flags), dimensionality)
+    helpers = shared_helpers(("openmm", flags, is_on_gpu(context)), build_helper_methods)
 
     return helpers, restore, bias
 
@@ -201,3 +211,14 @@ def bind(sampling_context: SamplingContext, callback: Callable, **kwargs):
     sampler = Sampler(method_bundle, sync_and_bias, callback, restore)
     force.set_callback_in(context, sampler.update)
     return sampler
+
+
+def rebind(sampling_context: SamplingContext, callback: Callable, **kwargs):
+    """
+    Builds `sampling_context.method` and swaps it in place of the sampling method
+    currently bound to the simulation context, which is otherwise left untouched.
+    """
+    sampler = sampling_context.sampler
+    sampling_method = sampling_context.method
+    helpers, *_ = build_helpers(sampling_context.view, sampling_method)
+    sampler.rebind(sampling_method.build(sampler.take_snapshot(), helpers), callback)
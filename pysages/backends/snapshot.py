@@ -52,6 +52,23 @@ class HelperMethods(NamedTuple):
     dimensionality: Callable[[], int]
 
 
+# Helper methods built so far, see `shared_helpers`
+_HELPERS = {}
+
+
+def shared_helpers(key, build: Callable[[], HelperMethods]):
+    """
+    Returns the helper methods stored under `key`, building them with `build` the first
+    time. Backends key the helpers by everything these depend on (e.g. the snapshot data
+    being queried and the device) rather than by simulation context, so that methods bound
+    to different contexts (such as the replicas of `UmbrellaIntegration` or `SplineString`)
+    share them, along with the updates compiled for them.
+    """
+    if key not in _HELPERS:
+        _HELPERS[key] = build()
+    return _HELPERS[key]
+
+
 @dispatch(precedence=1)
 def copy(s: Box, *args):
     return Box(*(copy(x, *args) for x in s))
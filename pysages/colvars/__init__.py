@@ -10,14 +10,17 @@ PySAGES tries to support a variety common collective variables, but it is easy t
 PySAGES with your own.
 """
 
-from .angles import Angle, DihedralAngle
+from .angles import Angle, DihedralAngle, DihedralAngles
+from .contacts import ContactCount, CoordinationNumber
 from .coordinates import Component, Displacement, Distance
+from .paths import PathCoordinates, PathDistance, PathProgress
 from .shape import (
     Acylindricity,
     Asphericity,
     PrincipalMoment,
     RadiusOfGyration,
     ShapeAnisotropy,
+    ShapeDescriptors,
 )
 from .utils import get_periods, wrap
 
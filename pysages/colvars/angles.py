@@ -9,7 +9,9 @@ It is common to describe such angles inside a molecule or protein characteristic
 conformation change.
 """
 
+import numpy
 from jax import numpy as np
+from jax import vmap
 from jax.numpy import linalg
 
 from pysages.colvars.coordinates import barycenter
@@ -128,6 +130,113 @@ def dihedral_angle(p1, p2, p3, p4):
     return np.arctan2(np.dot(np.cross(r, s), q), np.dot(r, s) * linalg.norm(q))
 
 
+@multicomponent
+class DihedralAngles(CollectiveVariable):
+    r"""
+    Computes several dihedral angles at once, as a single multicomponent collective
+    variable. All angles (and their Jacobian) are evaluated by a single vectorized
+    kernel, so the compilation time and cost per step barely grow with the number
+    of angles, as opposed to stacking many `DihedralAngle` collective variables.
+
+    Optionally, the angles can be featurized as their cosines and sines, and the
+    resulting features linearly projected, e.g. onto dihedral principal components.
+
+    Parameters
+    ----------
+    indices: list[tuple(int)]
+        Array-like of shape `(n, 4)` with the indices of the atoms spanning each angle.
+    features: str
+        Either "angles" (default) to return the angles, or "sincos" to return
+        :math:`[\cos\theta_1, \sin\theta_1, \ldots, \cos\theta_n, \sin\theta_n]`.
+    projection: Optional[JaxArray]
+        Matrix of shape `(k, m)`, with `m` the number of features, onto whose rows the
+        features are projected.
+    mean: Optional[JaxArray]
+        Features average subtracted before the projection. Defaults to zero.
+    """
+
+    feature_options = ("angles", "sincos")
+
+    def __init__(self, indices, features="angles", projection=None, mean=None):
+        indices = numpy.asarray(indices, dtype=int)
+        if indices.ndim != 2 or indices.shape[1] != 4:
+            raise ValueError(f"Expected indices with shape (n, 4), got {indices.shape}")
+        if features not in self.feature_options:
+            raise ValueError(
+                f"Invalid features {features}. Valid options are: {self.feature_options}."
+            )
+
+        super().__init__([tuple(int(i) for i in row) for row in indices])
+        self.features = features
+        self.number_of_angles = indices.shape[0]
+
+        m = self.number_of_features
+        if projection is not None:
+            projection = np.atleast_2d(np.asarray(projection))
+            if projection.shape[1] != m:
+                raise ValueError(f"Expected a projection with {m} columns")
+        if mean is not None and projection is None:
+            raise ValueError("A projection must be provided along with the features mean")
+        self.projection = projection
+        self.mean = None if mean is None else np.asarray(mean)
+
+    @property
+    def number_of_features(self):
+        """Number of angular features before the projection."""
+        return self.number_of_angles * (1 if self.features == "angles" else 2)
+
+    @property
+    def number_of_components(self):
+        """Number of components of this collective variable."""
+        if self.projection is None:
+            return self.number_of_features
+        return self.projection.shape[0]
+
+    @property
+    def periodic(self):
+        """Whether the components of this collective variable are periodic angles."""
+        return self.features == "angles" and self.projection is None
+
+    @property
+    def function(self):
+        """
+        Returns
+        -------
+        Function that calculates the dihedral angles from a simulation snapshot.
+        Look at `pysages.colvars.angles.dihedral_angles` for details.
+        """
+        features = self.features
+        projection = self.projection
+        mean = self.mean
+
+        def evaluate(rs):
+            xs = dihedral_angles(rs.reshape(-1, 4, 3))
+            if features == "sincos":
+                xs = np.stack((np.cos(xs), np.sin(xs)), axis=-1).flatten()
+            if projection is None:
+                return xs
+            return projection @ (xs if mean is None else xs - mean)
+
+        return evaluate
+
+
+def dihedral_angles(ps):
+    """
+    Vectorized version of `pysages.colvars.angles.dihedral_angle`.
+
+    Parameters
+    ----------
+    ps: jax.Array
+        Array of shape `(n, 4, 3)` with the four points spanning each angle.
+
+    Returns
+    -------
+    jax.Array
+        Array with the `n` dihedral angles.
+    """
+    return vmap(dihedral_angle)(ps[:, 0], ps[:, 1], ps[:, 2], ps[:, 3])
+
+
 @multicomponent
 class RingPuckeringCoordinates(CollectiveVariable):
     """
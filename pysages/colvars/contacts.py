@@ -0,0 +1,248 @@
+# SPDX-License-Identifier: MIT
+# See LICENSE.md and CONTRIBUTORS.md at https://github.com/SSAGESLabs/PySAGES
+
+"""
+Collective variables that count contacts between particles.
+
+Pairs within the cutoff are found with the cell and neighbor lists from
+`pysages.colvars.neighbors`, so the cost of evaluating these collective variables
+(and their gradients) grows linearly with the number of particles.
+"""
+
+from jax import numpy as np
+
+from pysages.colvars.core import CollectiveVariable
+from pysages.colvars.neighbors import (
+    build_neighbor_list,
+    default_capacities,
+    periodic_displacement,
+)
+
+
+class ContactsCV(CollectiveVariable):
+    """
+    Base class for collective variables built from a smooth switching function
+    over the pairs of particles within a cutoff in a periodic box.
+
+    Parameters
+    ----------
+    indices: Union[list[int], list[tuple(int)]]
+        Must be a list or tuple of atoms (integers or ranges) or groups of atoms.
+    box: Union[Box, JaxArray]
+        Periodic simulation box, e.g. `snapshot.box`, a `3 x 3` matrix whose columns
+        are the box vectors, or the side lengths of an orthorhombic box.
+    r0: float
+        Switching distance (see `pysages.colvars.contacts.rational_switch`).
+    d0: float
+        Distance offset of the switching function. Defaults to `0`.
+    n: int
+        Exponent of the numerator of the switching function. Defaults to `6`.
+    m: int
+        Exponent of the denominator of the switching function. Defaults to `12`.
+    cutoff: Optional[float]
+        Distance beyond which pairs are ignored. Defaults to `d0 + 2 * r0`.
+    max_neighbors: Optional[int]
+        Capacity of the neighbor buffer of each particle.
+        By default, it is estimated from the number of particles and the box volume.
+    cell_capacity: Optional[int]
+        Maximum number of particles per cell of the cell list.
+        By default, it is estimated from the number of particles and the box volume.
+
+    Notes
+    -----
+    If either buffer overflows, the collective variable evaluates to `NaN`,
+    in which case `max_neighbors` or `cell_capacity` need to be increased.
+    """
+
+    def __init__(
+        self,
+        indices,
+        box,
+        r0,
+        d0=0.0,
+        n=6,
+        m=12,
+        cutoff=None,
+        max_neighbors=None,
+        cell_capacity=None,
+    ):
+        super().__init__(indices)
+        self.box = getattr(box, "H", box)
+        self.r0 = r0
+        self.d0 = d0
+        self.n = n
+        self.m = m
+        self.cutoff = d0 + 2 * r0 if cutoff is None else cutoff
+        self.requires_box_unwrapping = False
+
+        number_of_targets = len(self.indices) if len(self.groups) == 0 else len(self.groups[-1])
+        default_cell_capacity, default_max_neighbors = default_capacities(
+            self.box, self.cutoff, number_of_targets
+        )
+        self.max_neighbors = default_max_neighbors if max_neighbors is None else max_neighbors
+        self.cell_capacity = default_cell_capacity if cell_capacity is None else cell_capacity
+
+    @property
+    def switch(self):
+        """
+        Switching function smoothly going from one at `d0` to zero at `cutoff`.
+        """
+        return build_switching_function(self.r0, self.d0, self.n, self.m, self.cutoff)
+
+    @property
+    def neighbor_list(self):
+        """
+        Fixed capacity neighbor list for this collective variable's parameters.
+        """
+        return build_neighbor_list(self.box, self.cutoff, self.max_neighbors, self.cell_capacity)
+
+
+class CoordinationNumber(ContactsCV):
+    """
+    Average coordination number of a group of atoms.
+
+    When `indices` is a flat list of atoms, it computes the average number of
+    neighbors of each atom within the same group. When `indices` consists of two groups,
+    it computes the average number of atoms of the second group around each atom of the
+    first one.
+
+    See `pysages.colvars.contacts.ContactsCV` for a description of the parameters.
+    """
+
+    def __init__(self, indices, box, r0, **kwargs):
+        super().__init__(indices, box, r0, **kwargs)
+        if len(self.groups) not in (0, 2):
+            raise ValueError("Either a flat list of atoms or two groups must be provided")
+
+    @property
+    def function(self):
+        """
+        Returns
+        -------
+        Callable
+            See `pysages.colvars.contacts.coordination_numbers` for details.
+        """
+        neighbor_list = self.neighbor_list
+        displacement = periodic_displacement(self.box)
+        switch = self.switch
+
+        def coordination_number(r1, r2=None):
+            cn, did_overflow = coordination_numbers(r1, r2, neighbor_list, displacement, switch)
+            return np.where(did_overflow, np.nan, np.mean(cn))
+
+        if len(self.groups) == 0:
+            return lambda rs: coordination_number(rs)
+
+        return coordination_number
+
+
+class ContactCount(ContactsCV):
+    """
+    Smooth count of the number of contacts between two groups of atoms.
+
+    See `pysages.colvars.contacts.ContactsCV` for a description of the parameters.
+    """
+
+    def __init__(self, indices, box, r0, **kwargs):
+        super().__init__(indices, box, r0, **kwargs)
+        if len(self.groups) != 2:
+            raise ValueError("Exactly two groups of atoms must be provided")
+
+    @property
+    def function(self):
+        """
+        Returns
+        -------
+        Callable
+            See `pysages.colvars.contacts.coordination_numbers` for details.
+        """
+        neighbor_list = self.neighbor_list
+        displacement = periodic_displacement(self.box)
+        switch = self.switch
+
+        def contact_count(r1, r2):
+            cn, did_overflow = coordination_numbers(r1, r2, neighbor_list, displacement, switch)
+            return np.where(did_overflow, np.nan, np.sum(cn))
+
+        return contact_count
+
+
+def rational_switch(r, r0, d0=0.0, n=6, m=12):
+    r"""
+    Rational switching function
+
+    :math:`s(r) = \frac{1 - x^n}{1 - x^m}, \quad x = \frac{r - d_0}{r_0}`
+
+    which is one for :math:`r \leq d_0`.
+
+    Parameters
+    ----------
+    r: jax.Array
+        Distances at which to evaluate the switching function.
+    r0: float
+        Switching distance.
+    d0: float
+        Distance offset.
+    n: int
+        Exponent of the numerator.
+    m: int
+        Exponent of the denominator.
+    """
+    x = np.maximum((r - d0) / r0, 0.0)
+    # Avoid the removable singularity at `x == 1` (and its derivative) by using a first
+    # order expansion around it.
+    near_one = np.abs(x - 1) < 1e-4
+    x_safe = np.where(near_one, 0.0, x)
+    s = (1 - x_safe**n) / (1 - x_safe**m)
+    return np.where(near_one, n / m + n * (n - m) * (x - 1) / (2 * m), s)
+
+
+def build_switching_function(r0, d0, n, m, cutoff):
+    """
+    Returns a rational switching function (see `pysages.colvars.contacts.rational_switch`)
+    shifted and scaled, so that it is one at `d0` and goes continuously to zero at `cutoff`.
+    """
+    s_cutoff = rational_switch(cutoff, r0, d0, n, m)
+
+    def switch(r):
+        s = (rational_switch(r, r0, d0, n, m) - s_cutoff) / (1 - s_cutoff)
+        return np.where(r < cutoff, s, 0.0)
+
+    return switch
+
+
+def coordination_numbers(r1, r2, neighbor_list, displacement, switch):
+    """
+    Computes the coordination number of each particle in `r1` with respect to the
+    particles in `r2`, or with respect to the other particles in `r1` if `r2` is `None`.
+
+    Parameters
+    ----------
+    r1: jax.Array
+        Positions of the particles whose coordination numbers are computed.
+    r2: Optional[jax.Array]
+        Positions of the neighboring particles.
+    neighbor_list: Callable
+        See `pysages.colvars.neighbors.build_neighbor_list`.
+    displacement: Callable
+        See `pysages.colvars.neighbors.periodic_displacement`.
+    switch: Callable
+        Switching function applied to each pair distance.
+
+    Returns
+    -------
+    coordination_numbers: jax.Array
+        Sum of the switching function over the neighbors of each particle in `r1`.
+    did_overflow: jax.Array
+        Whether the neighbor list overflowed, in which case the result is incomplete.
+    """
+    neighbors = neighbor_list(r1, r2)
+    targets = r1 if r2 is None else r2
+    mask = neighbors.idx < targets.shape[0]
+
+    padded_targets = np.concatenate((targets, np.zeros((1, 3), dtype=targets.dtype)))
+    dr = displacement(r1[:, None, :], padded_targets[neighbors.idx])
+    # Keep the gradients finite for the padding entries
+    r = np.sqrt(np.where(mask, np.sum(dr**2, axis=-1), 1.0))
+
+    return np.sum(np.where(mask, switch(r), 0.0), axis=1), neighbors.did_overflow
@@ -44,13 +44,7 @@ def weighted_barycenter(positions, weights):
     weighted_barycenter : jax.Array
         3D array with the weighted barycenter coordinates.
     """
-    group_length = positions.shape[0]
-    center = np.zeros(3)
-    # TODO: Replace by `np.sum` and `vmap`  # pylint:disable=fixme
-    for i in range(group_length):
-        w, p = weights[i], positions[i]
-        center += w * p
-    return center
+    return np.dot(weights, positions)
 
 
 class Component(AxisCV):
@@ -7,6 +7,8 @@ Abstract base classes for collective variables.
 """
 
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from hashlib import blake2b
 from inspect import signature
 
 import numpy
@@ -20,6 +22,11 @@ UInt32 = np.uint32
 Index = Union[numpy.intp, numpy.int_, numpy.intc, int]
 Indices = Union[numpy.intp, numpy.int_, numpy.intc, int, range]
 
+# Memoized builds, keyed by the collective variables' types and parameters.
+# Only the `_BUILD_CACHE_SIZE` most recently used builds are kept.
+_BUILD_CACHE = OrderedDict()
+_BUILD_CACHE_SIZE = 128
+
 
 class CollectiveVariable(ABC):
     """
@@ -182,6 +189,14 @@ def _get_nargs(function: Callable):
 
 
 def _build(cv: CollectiveVariable, differentiate: bool = True):
+    key = _cv_key(cv)
+    if key is not None:
+        key = ("cv", key, differentiate)
+        return _cached_build(key, lambda: _build_uncached(cv, differentiate))
+    return _build_uncached(cv, differentiate)
+
+
+def _build_uncached(cv: CollectiveVariable, differentiate: bool = True):
     # TODO: Add support for compute weights from masses # pylint:disable=fixme
     xi = cv.function
     idx = cv.indices
@@ -245,7 +260,21 @@ def build(cv: CollectiveVariable, *cvs: CollectiveVariable, differentiate: bool
         positions and indices. With this information the collective variables
         (and their derivatives if `differentiate` is `True`)
         are computed and returned.
+
+    Notes
+    -----
+    Builds are memoized within a process by the type and parameters of the
+    collective variables, so that identical sets of collective variables (e.g. those
+    of several umbrella windows or replicas) share the same compiled function.
     """
+    keys = [_cv_key(cv)] + [_cv_key(cv) for cv in cvs]
+    if all(key is not None for key in keys):
+        key = ("stack", tuple(keys), differentiate)
+        return _cached_build(key, lambda: _build_stack(cv, *cvs, differentiate=differentiate))
+    return _build_stack(cv, *cvs, differentiate=differentiate)
+
+
+def _build_stack(cv: CollectiveVariable, *cvs: CollectiveVariable, differentiate: bool = True):
     cvs = [_build(cv, differentiate=differentiate)] + [
         _build(cv, differentiate=differentiate) for cv in cvs
     ]
@@ -274,6 +303,47 @@ def build(cv: CollectiveVariable, *cvs: CollectiveVariable, differentiate: bool
     return jit(apply)
 
 
+def _cached_build(key, builder: Callable):
+    # Returns the build stored under `key` (or stores the one returned by `builder`),
+    # evicting the least recently used builds once the cache is full
+    if key in _BUILD_CACHE:
+        _BUILD_CACHE.move_to_end(key)
+        return _BUILD_CACHE[key]
+    fn = _BUILD_CACHE[key] = builder()
+    while len(_BUILD_CACHE) > _BUILD_CACHE_SIZE:
+        _BUILD_CACHE.popitem(last=False)
+    return fn
+
+
+def _cv_key(cv: CollectiveVariable):
+    # Hashable representation of a collective variable's type and parameters,
+    # or `None` if some parameter cannot be represented.
+    try:
+        key = (type(cv), _freeze(vars(cv)))
+        hash(key)
+        return key
+    except TypeError:
+        return None
+
+
+def _freeze(obj):
+    if isinstance(obj, (numpy.ndarray, JaxArray)):
+        array = numpy.ascontiguousarray(obj)
+        return ("array", array.dtype.str, array.shape, blake2b(array.tobytes()).hexdigest())
+    if isinstance(obj, dict):
+        return ("dict", tuple(sorted((k, _freeze(v)) for (k, v) in obj.items())))
+    if isinstance(obj, (list, tuple)):
+        return (type(obj), tuple(_freeze(o) for o in obj))
+    if isinstance(obj, (set, frozenset)):
+        return (type(obj), frozenset(_freeze(o) for o in obj))
+    if callable(obj):
+        return obj
+    if not hasattr(obj, "__dict__"):
+        # Tell apart values that compare equal but have different types (e.g. `1` and `1.0`)
+        return (type(obj), obj)
+    return (type(obj), _freeze(vars(obj)))
+
+
 def _process_groups(indices: Union[Sequence, Tuple]):
     total_group_length = 0
     collected = []
@@ -0,0 +1,233 @@
+# SPDX-License-Identifier: MIT
+# See LICENSE.md and CONTRIBUTORS.md at https://github.com/SSAGESLabs/PySAGES
+
+"""
+Cell and neighbor lists for collective variables that depend on pairs of particles
+separated by less than a cutoff distance.
+
+All buffers have a fixed capacity, chosen when the lists are built, so that the
+resulting functions can be jit compiled. Whenever a buffer is too small to hold all
+the cells' particles or all the neighbors of a particle, the returned lists flag it
+via their `did_overflow` field.
+"""
+
+import numpy
+from jax import lax
+from jax import numpy as np
+from jax import vmap
+
+from pysages.typing import Callable, JaxArray, NamedTuple, Optional
+
+Int32 = np.int32
+
+
+class CellList(NamedTuple):
+    """
+    Spatial partition of a set of particles.
+
+    cells: JaxArray
+        Array of shape `(number_of_cells, cell_capacity)` with the indices of the
+        particles in each cell, padded with the number of particles.
+    cell_ids: JaxArray
+        Flattened cell index of each particle.
+    did_overflow: JaxArray
+        Whether any of the cells had more than `cell_capacity` particles.
+    """
+
+    cells: JaxArray
+    cell_ids: JaxArray
+    did_overflow: JaxArray
+
+    def __repr__(self):
+        return repr("PySAGES " + type(self).__name__)
+
+
+class NeighborList(NamedTuple):
+    """
+    Neighbors within a cutoff for each particle in a set of query points.
+
+    idx: JaxArray
+        Array of shape `(number_of_queries, max_neighbors)` with the indices of the
+        neighbors of each query point, padded with the number of target particles.
+    did_overflow: JaxArray
+        Whether any query point had more than `max_neighbors` neighbors, or the
+        underlying cell list overflowed.
+    """
+
+    idx: JaxArray
+    did_overflow: JaxArray
+
+    def __repr__(self):
+        return repr("PySAGES " + type(self).__name__)
+
+
+def box_matrix(box):
+    """
+    Returns the box transform matrix (with the box vectors as columns) as a numpy array.
+
+    Parameters
+    ----------
+    box: Union[Box, JaxArray]
+        Either a `pysages.backends.snapshot.Box`, a `3 x 3` matrix whose columns are the
+        box vectors, or the three side lengths of an orthorhombic box.
+    """
+    H = numpy.asarray(getattr(box, "H", box), dtype=float)
+    if H.ndim == 1:
+        H = numpy.diag(H)
+    if H.shape != (3, 3):
+        raise ValueError(f"Invalid box specification with shape {H.shape}")
+    return H
+
+
+def cells_per_side(box, cutoff: float):
+    """
+    Returns the number of cells along each box vector, such that the cells are at least
+    `cutoff` wide.
+    """
+    H = box_matrix(box)
+    a, b, c = H.T
+    volume = abs(numpy.linalg.det(H))
+    areas = numpy.linalg.norm([numpy.cross(b, c), numpy.cross(c, a), numpy.cross(a, b)], axis=1)
+    return numpy.maximum(numpy.floor(volume / areas / cutoff).astype(int), 1)
+
+
+def periodic_displacement(box):
+    """
+    Returns a function that computes the minimum image displacement `r2 - r1` between
+    two points within the periodic `box`.
+    """
+    H = np.asarray(box_matrix(box))
+    H_inv = np.linalg.inv(H)
+
+    def displacement(r1, r2):
+        ds = (r2 - r1) @ H_inv.T
+        return (ds - np.round(ds)) @ H.T
+
+    return displacement
+
+
+def build_cell_list(box, cutoff: float, cell_capacity: int) -> Callable[[JaxArray], CellList]:
+    """
+    Returns a function that bins a set of positions into the cells of `box`.
+
+    Parameters
+    ----------
+    box: Union[Box, JaxArray]
+        Periodic simulation box (see `pysages.colvars.neighbors.box_matrix`).
+    cutoff: float
+        Minimum width of the cells.
+    cell_capacity: int
+        Maximum number of particles that can be stored in a cell.
+    """
+    H_inv, ncells, strides = _cell_geometry(box, cutoff)
+    number_of_cells = int(numpy.prod(ncells))
+
+    def cell_list(positions):
+        n = positions.shape[0]
+        cell_ids = _cell_coordinates(positions, H_inv, ncells) @ strides
+        order = np.argsort(cell_ids)
+        sorted_ids = cell_ids[order]
+        rank = np.arange(n, dtype=Int32) - np.searchsorted(sorted_ids, sorted_ids)
+        cells = np.full((number_of_cells, cell_capacity), n, dtype=Int32)
+        cells = cells.at[sorted_ids, rank].set(order.astype(Int32), mode="drop")
+        return CellList(cells, cell_ids, np.any(rank >= cell_capacity))
+
+    return cell_list
+
+
+def build_neighbor_list(
+    box, cutoff: float, max_neighbors: int, cell_capacity: int
+) -> Callable[[JaxArray, Optional[JaxArray]], NeighborList]:
+    """
+    Returns a function that finds, for each of a set of query points, the indices of the
+    target particles within `cutoff` under periodic boundary conditions.
+
+    Candidate pairs are drawn only from the neighboring cells of each query point, so
+    the cost scales linearly with the number of particles.
+
+    Parameters
+    ----------
+    box: Union[Box, JaxArray]
+        Periodic simulation box (see `pysages.colvars.neighbors.box_matrix`).
+        The cutoff must be smaller than half the width of the box.
+    cutoff: float
+        Interaction cutoff distance.
+    max_neighbors: int
+        Capacity of the neighbor buffer of each query point.
+    cell_capacity: int
+        Maximum number of particles that can be stored in a cell.
+
+    Returns
+    -------
+    neighbor_list: Callable[[JaxArray, Optional[JaxArray]], NeighborList]
+        Function taking the positions of the query points and, optionally, those of the
+        target particles. When the targets are omitted, the neighbors of the query
+        points among themselves are computed, excluding self pairs.
+    """
+    cell_list = build_cell_list(box, cutoff, cell_capacity)
+    displacement = periodic_displacement(box)
+    H_inv, ncells, strides = _cell_geometry(box, cutoff)
+    stencil = np.asarray(_stencil(ncells), dtype=Int32)
+
+    def neighbor_list(queries, targets=None):
+        exclude_self = targets is None
+        targets = queries if exclude_self else targets
+        queries = lax.stop_gradient(queries)
+        targets = lax.stop_gradient(targets)
+        n = targets.shape[0]
+
+        cells = cell_list(targets)
+        coords = _cell_coordinates(queries, H_inv, ncells)
+        neighbor_cells = ((coords[:, None, :] + stencil) % ncells) @ strides
+        candidates = cells.cells[neighbor_cells].reshape(queries.shape[0], -1)
+
+        padded_targets = np.concatenate((targets, np.zeros((1, 3), dtype=targets.dtype)))
+        dr = displacement(queries[:, None, :], padded_targets[candidates])
+        mask = (candidates < n) & (np.sum(dr**2, axis=-1) < cutoff**2)
+        if exclude_self:
+            mask &= candidates != np.arange(queries.shape[0], dtype=Int32)[:, None]
+
+        def compact(row_mask, row_candidates):
+            (k,) = np.nonzero(row_mask, size=max_neighbors, fill_value=0)
+            return np.where(np.arange(max_neighbors) < np.sum(row_mask), row_candidates[k], n)
+
+        idx = vmap(compact)(mask, candidates)
+        did_overflow = cells.did_overflow | np.any(np.sum(mask, axis=1) > max_neighbors)
+
+        return NeighborList(idx, did_overflow)
+
+    return neighbor_list
+
+
+def default_capacities(box, cutoff: float, number_of_particles: int):
+    """
+    Estimates the cell and neighbor buffer capacities for `number_of_particles`
+    homogeneously distributed within `box`, allowing for twice the average density.
+    """
+    H = box_matrix(box)
+    volume = abs(numpy.linalg.det(H))
+    density = number_of_particles / volume
+    number_of_cells = int(numpy.prod(cells_per_side(box, cutoff)))
+    cell_capacity = int(numpy.ceil(2 * number_of_particles / number_of_cells)) + 4
+    max_neighbors = int(numpy.ceil(2 * density * 4 * numpy.pi * cutoff**3 / 3)) + 8
+    return min(cell_capacity, number_of_particles), min(max_neighbors, number_of_particles)
+
+
+def _cell_geometry(box, cutoff):
+    ncells = cells_per_side(box, cutoff)
+    H_inv = np.asarray(numpy.linalg.inv(box_matrix(box)))
+    strides = np.asarray([ncells[1] * ncells[2], ncells[2], 1], dtype=Int32)
+    return H_inv, ncells, strides
+
+
+def _cell_coordinates(positions, H_inv, ncells):
+    s = lax.stop_gradient(positions) @ H_inv.T
+    s = s - np.floor(s)
+    return np.clip(np.floor(s * ncells).astype(Int32), 0, np.asarray(ncells - 1, dtype=Int32))
+
+
+def _stencil(ncells):
+    # When there are less than three cells along a given direction, the neighboring
+    # cells wrap around onto each other, so we only keep the unique offsets.
+    offsets = [numpy.unique(numpy.arange(-1, 2) % n) for n in ncells]
+    return numpy.stack(numpy.meshgrid(*offsets, indexing="ij"), axis=-1).reshape(-1, 3)
@@ -17,11 +17,15 @@ eRMSD also only requires the knowledge of C2, C4 and C6 for each base.
 
 from typing import Callable, Optional
 
+import numpy
+from jax import lax
 from jax import numpy as np
+from jax import vmap
 from jax.numpy import linalg
 
 from pysages.colvars.coordinates import weighted_barycenter
 from pysages.colvars.core import CollectiveVariable, multicomponent
+from pysages.utils import quaternion_matrix
 
 
 def fitted_positions(positions, weights):
@@ -73,9 +77,87 @@ def kabsch(P, Q):
     return U
 
 
-def rmsd(r1: np.ndarray, Q: np.ndarray, w_0: Optional[np.ndarray], optimal_rotation: Callable):
+def qcp(P, Q, iterations: int = 50):
     """
-    Calculate the RMSD respect to a reference using rotation matrix.
+    Computes the optimal rotation between two sets of paired points P and Q (centered
+    around their centroids) with the quaternion characteristic polynomial (QCP) method.
+    It is a drop-in replacement for `pysages.colvars.orientation.kabsch` that avoids
+    computing a singular value decomposition.
+
+    The optimal rotation is given by the quaternion corresponding to the largest
+    eigenvalue of a symmetric 4 x 4 key matrix built from the covariance matrix of P and
+    Q. The eigenvalue is found by Newton iterations on the characteristic polynomial of
+    the key matrix, and the eigenvector from the adjugate of the shifted key matrix.
+    For more info see https://doi.org/10.1107/S0108767305015266 and
+    https://doi.org/10.1002/jcc.21439
+
+    Parameters
+    ----------
+    P: array
+        (N, 3) matrix, where N is the number of points.
+    Q: array
+        (N, 3) matrix, where N is the number of points.
+    iterations: int
+        Maximum number of Newton iterations used to find the largest eigenvalue.
+
+    Returns
+    -------
+    U: matrix
+        Rotation matrix (3, 3), such that `P @ U` is optimally aligned to `Q`.
+    """
+    M = np.dot(np.transpose(P), Q)
+    K = _key_matrix(M)
+
+    # Coefficients of the characteristic polynomial λ⁴ + c2 λ² + c1 λ + c0
+    c2 = -2 * np.sum(M**2)
+    c1 = -8 * linalg.det(M)
+    c0 = linalg.det(K)
+
+    def newton_step(_, lam):
+        lam2 = lam * lam
+        p = (lam2 + c2) * lam2 + c1 * lam + c0
+        dp = (4 * lam2 + 2 * c2) * lam + c1
+        return np.where(dp == 0, lam, lam - p / np.where(dp == 0, 1, dp))
+
+    # The largest eigenvalue is bounded above by (G_P + G_Q) / 2
+    lam0 = (np.sum(P**2) + np.sum(Q**2)) / 2
+    lam = lax.fori_loop(0, iterations, newton_step, lam0)
+
+    # Every nonzero column of the adjugate of (K - λI) is parallel to the eigenvector
+    adj = _adjugate(K - lam * np.identity(4))
+    norms = np.sum(adj**2, axis=0)
+    k = np.argmax(norms)
+    q = adj[:, k] / np.sqrt(np.where(norms[k] > 0, norms[k], 1))
+    q = np.where(norms[k] > 0, q, np.array([1.0, 0.0, 0.0, 0.0]))
+
+    return np.transpose(quaternion_matrix(q)[:3, :3])
+
+
+def _key_matrix(M):
+    (Sxx, Sxy, Sxz), (Syx, Syy, Syz), (Szx, Szy, Szz) = M
+    return np.array(
+        [
+            [Sxx + Syy + Szz, Syz - Szy, Szx - Sxz, Sxy - Syx],
+            [Syz - Szy, Sxx - Syy - Szz, Sxy + Syx, Szx + Sxz],
+            [Szx - Sxz, Sxy + Syx, -Sxx + Syy - Szz, Syz + Szy],
+            [Sxy - Syx, Szx + Sxz, Syz + Szy, -Sxx - Syy + Szz],
+        ]
+    )
+
+
+def _adjugate(A):
+    n = A.shape[0]
+    indices = numpy.arange(n)
+    # minors[i, j] is the determinant of A without row i and column j
+    rows = numpy.array([indices[indices != i] for i in range(n)])
+    minors = linalg.det(A[rows[:, None, :, None], rows[None, :, None, :]])
+    signs = (-1) ** (indices[:, None] + indices[None, :])
+    return np.transpose(signs * minors)
+
+
+def msd(r1: np.ndarray, Q: np.ndarray, w_0: Optional[np.ndarray], optimal_rotation: Callable):
+    """
+    Calculate the mean square deviation respect to a reference after optimal alignment.
 
     Parameters
     ----------
@@ -87,12 +169,35 @@ def rmsd(r1: np.ndarray, Q: np.ndarray, w_0: Optional[np.ndarray], optimal_rotat
         Weights of the selected atom positions
     optimal_rotation: Callable
         functions for the optimal rotation for aligning two positions
+
+    Notes
+    -----
+    Since the deviation is stationary with respect to the rotation at the optimal
+    alignment, its gradient does not depend on the derivatives of the rotation matrix, so
+    these are not propagated (which avoids differentiating through `optimal_rotation`).
     """
     P = fitted_positions(r1, w_0)
-    U = optimal_rotation(P, Q)
+    U = lax.stop_gradient(optimal_rotation(P, Q))
     optimal_P = np.dot(P, U)
-    error = np.sqrt(np.sum(np.square(optimal_P - Q)) / P.shape[0])
-    return error
+    return np.sum(np.square(optimal_P - Q)) / P.shape[0]
+
+
+def rmsd(r1: np.ndarray, Q: np.ndarray, w_0: Optional[np.ndarray], optimal_rotation: Callable):
+    """
+    Calculate the RMSD respect to a reference using rotation matrix.
+
+    Parameters
+    ----------
+    r1: np.ndarray
+        Atomic positions.
+    Q: np.ndarray
+        Cartesian coordinates of the reference position of the atoms.
+    w_0: np.ndarray
+        Weights of the selected atom positions
+    optimal_rotation: Callable
+        functions for the optimal rotation for aligning two positions
+    """
+    return np.sqrt(msd(r1, Q, w_0, optimal_rotation))
 
 
 class RMSD(CollectiveVariable):
@@ -126,6 +231,54 @@ class RMSD(CollectiveVariable):
         return lambda r: rmsd(r, self.Q, self.weights, self.optimal_rotation)
 
 
+@multicomponent
+class MultiReferenceRMSD(CollectiveVariable):
+    """
+    Computes the RMSD of a set of atoms with respect to each of several reference
+    structures, all in a single vectorized evaluation.
+
+    Parameters
+    ----------
+    indices: list[int], list[tuple(int)]
+       Select atom groups via indices.
+    references: list[list[tuple(float)]]
+       Cartesian coordinates of the reference structures, with shape
+       `(number_of_references, len(indices), 3)`. The coordinates must match the ones of
+       the atoms used in indices.
+    weights: Optional[list[float]]
+       Weights of the selected atom positions (used for centering).
+    optimal_rotation: Callable
+       Function for the optimal rotation aligning two sets of positions.
+       Defaults to `pysages.colvars.orientation.qcp`.
+    """
+
+    def __init__(self, indices, references, weights=None, optimal_rotation: Callable = qcp):
+        if weights is not None and len(indices) != len(weights):
+            raise RuntimeError("Indices and weights must be of the same length")
+        super().__init__(indices)
+        self.references = np.asarray(references)
+        if self.references.ndim != 3 or self.references.shape[1] != len(self.indices):
+            raise RuntimeError(
+                f"Expected references with shape (n, {len(self.indices)}, 3), "
+                f"got {self.references.shape}"
+            )
+        if weights is None:
+            self.weights = np.ones(len(indices)) / len(indices)
+        else:
+            self.weights = np.asarray(weights)
+        self.Qs = vmap(fitted_positions, in_axes=(0, None))(self.references, self.weights)
+        self.optimal_rotation = optimal_rotation
+
+    @property
+    def function(self):
+        def multi_rmsd(r):
+            return vmap(rmsd, in_axes=(None, 0, None, None))(
+                r, self.Qs, self.weights, self.optimal_rotation
+            )
+
+        return multi_rmsd
+
+
 @multicomponent
 class ERMSD(CollectiveVariable):
     """
@@ -160,18 +313,28 @@ class ERMSD(CollectiveVariable):
         re-scaling scale in x and y direction. Default is 0.5 (nm).
     b: float
         re-scaling scale in z direction. Default is 0.3 (nm).
+    max_pairs: Optional[int]
+        If provided, only the (ordered) pairs of nucleotides whose origins are within
+        interaction range in either the current or the reference structure are
+        evaluated, up to `max_pairs` of them (see `pysages.colvars.orientation.ermsd`).
+        By default, all pairs of nucleotides are evaluated.
     """
 
-    def __init__(self, indices, references, cutoff=2.4, a=0.5, b=0.3):
+    def __init__(self, indices, references, cutoff=2.4, a=0.5, b=0.3, max_pairs=None):
         super().__init__(indices)
         self.references = np.asarray(references)
         self.cutoff = cutoff
         self.a = a
         self.b = b
+        self.max_pairs = max_pairs
 
     @property
     def function(self):
-        return lambda r: ermsd(r, self.references, self.cutoff, self.a, self.b)
+        return lambda r: ermsd(r, self.references, self.cutoff, self.a, self.b, self.max_pairs)
+
+
+# Used to move self-contacts beyond the cutoff
+_MASK_VAL = 10.0
 
 
 def calc_local_reference_systems(rs):
@@ -269,25 +432,85 @@ def g_vector(local_reference_systems, origins, cutoff, a, b):
     # prevent the derivatives from diverging
     # because of the 0,0,0 self-contact entry
     N = r.shape[0]
-    mask_val = 10.0  # this will ensure that r_tilde_norm > cutoff
-    r = r.at[np.arange(N), np.arange(N)].set(np.array([mask_val, mask_val, mask_val]))
+    r = r.at[np.arange(N), np.arange(N)].set(np.array([_MASK_VAL, _MASK_VAL, _MASK_VAL]))
+
+    return _g_vector_local(r, cutoff, a, b)
+
+
+def g_vector_pairs(local_reference_systems, origins, pairs, cutoff, a, b):
+    """
+    Same as `pysages.colvars.orientation.g_vector`, but only computed for the given
+    (ordered) pairs of nucleotides.
+
+    Parameters
+    -----------
+    local_reference_systems: (n_nucleotides, 3, 3) array
+        arrays of coordinates of the xyz unit vectors
+    origins: (n_nucleotides, 3) array
+        arrays of origins
+    pairs: (n_pairs, 2) array
+        indices (i, j) of the pairs of nucleotides. Pairs with i == j are ignored
+        (they can be used as padding).
+    cutoff: float
+        unitless cutoff for eRMSD
+    a: float
+        re-scaling factor in x, y direction, usually it's 0.5 nm
+    b: float
+        re-scaling factor in z direction, usually it's 0.3 nm
 
+    Returns
+    ---------
+    G: (n_pairs, 4) array
+    """
+    i, j = pairs[:, 0], pairs[:, 1]
+    # origins[i] - origins[j] evaluated in the reference system of base j
+    r = np.einsum("pk,plk->pl", origins[i] - origins[j], local_reference_systems[j])
+    # Padding (and self-contact) entries are moved beyond the cutoff
+    r = np.where((i != j)[:, None], r, _MASK_VAL)
+    return _g_vector_local(r, cutoff, a, b)
+
+
+def _g_vector_local(r, cutoff, a, b):
     # we need to introduce an anisotropic reduction
-    r_tilde = np.einsum("ijk,k->ijk", r, np.array([1 / a, 1 / a, 1 / b]))
+    r_tilde = np.einsum("...k,k->...k", r, np.array([1 / a, 1 / a, 1 / b]))
 
     r_tilde_norm = np.linalg.norm(r_tilde, axis=-1)
     gamma = np.pi / cutoff
     inverse_r_tilde_norm = np.where(r_tilde_norm != 0, 1 / r_tilde_norm, 0)
-    G123 = np.einsum("ijk,ij->ijk", r_tilde, np.sin(gamma * r_tilde_norm) * inverse_r_tilde_norm)
+    G123 = np.einsum("...k,...->...k", r_tilde, np.sin(gamma * r_tilde_norm) * inverse_r_tilde_norm)
     G4 = 1 + np.cos(gamma * r_tilde_norm)
     G = np.concatenate((G123, np.expand_dims(G4, axis=-1)), axis=-1)
     G_end = np.einsum(
-        "ijk,ij->ijk", G, np.heaviside(cutoff - r_tilde_norm, np.zeros(r_tilde_norm.shape)) / gamma
+        "...k,...->...k",
+        G,
+        np.heaviside(cutoff - r_tilde_norm, np.zeros(r_tilde_norm.shape)) / gamma,
     )
 
     return G_end
 
 
+def candidate_pairs(origins, origins_ref, cutoff, a, b, max_pairs):
+    r"""
+    Returns a fixed-size list of the ordered pairs of nucleotides that might have
+    non-vanishing G-vectors in either of two structures, and whether there were more
+    than `max_pairs` of them.
+
+    Since :math:`|\tilde{r}| \geq |r| / \max(a, b)`, pairs of nucleotides with
+    origins farther apart than `cutoff * max(a, b)` in both structures do not
+    contribute to the eRMSD. The list is padded with `(0, 0)` pairs.
+    """
+    rc = cutoff * max(a, b)
+
+    def within_range(x):
+        x = lax.stop_gradient(x)
+        return np.sum((x[:, None] - x[None, :]) ** 2, axis=-1) < rc**2
+
+    N = origins.shape[0]
+    mask = (within_range(origins) | within_range(origins_ref)) & ~np.eye(N, dtype=bool)
+    i, j = np.nonzero(mask, size=max_pairs, fill_value=0)
+    return np.stack((i, j), axis=-1), np.sum(mask) > max_pairs
+
+
 def reshape_coordinates(rs, reference):
     """
     reshape the coordinates so that they have easier dimensions to work with.
@@ -320,7 +543,7 @@ def reshape_coordinates(rs, reference):
     return rs, reference
 
 
-def ermsd_core(rs, reference, cutoff, a, b):
+def ermsd_core(rs, reference, cutoff, a, b, max_pairs=None):
     r"""
     compute the eRMSD given the current snapshots and the reference coordinates
     Mathematical details can be found in
@@ -341,6 +564,11 @@ def ermsd_core(rs, reference, cutoff, a, b):
         (n_nucleotides, 3, 3) array, positions of the selected C2/4/6 atoms
     reference:
         (n_nucleotides, 3, 3) array, reference positions
+    max_pairs: Optional[int]
+        If provided, the G-vectors are only computed for up to `max_pairs` candidate
+        pairs of nucleotides (see `pysages.colvars.orientation.candidate_pairs`),
+        which gives the same result as evaluating all pairs as long as there are no
+        more candidates than `max_pairs`. Otherwise, the eRMSD evaluates to `NaN`.
 
     Return
     -----------
@@ -352,13 +580,19 @@ def ermsd_core(rs, reference, cutoff, a, b):
     system_and_origins_ref = calc_local_reference_systems(reference)
     local_reference_systems_ref, origins_ref = system_and_origins_ref
     N_res = origins.shape[0]
-    Gs = g_vector(local_reference_systems, origins, cutoff, a, b)
-    Gs_ref = g_vector(local_reference_systems_ref, origins_ref, cutoff, a, b)
+    if max_pairs is None:
+        Gs = g_vector(local_reference_systems, origins, cutoff, a, b)
+        Gs_ref = g_vector(local_reference_systems_ref, origins_ref, cutoff, a, b)
+        return np.sqrt(np.sum(np.square(Gs - Gs_ref)) / N_res)
+
+    pairs, did_overflow = candidate_pairs(origins, origins_ref, cutoff, a, b, max_pairs)
+    Gs = g_vector_pairs(local_reference_systems, origins, pairs, cutoff, a, b)
+    Gs_ref = g_vector_pairs(local_reference_systems_ref, origins_ref, pairs, cutoff, a, b)
     ermsd_hot = np.sqrt(np.sum(np.square(Gs - Gs_ref)) / N_res)
-    return ermsd_hot
+    return np.where(did_overflow, np.nan, ermsd_hot)
 
 
-def ermsd(rs, reference, cutoff, a, b):
+def ermsd(rs, reference, cutoff, a, b, max_pairs=None):
     """
     compute the eRMSD between the current snapshot and the reference
 
@@ -368,6 +602,9 @@ def ermsd(rs, reference, cutoff, a, b):
         (n_nucleotides*3, 3) array, positions of the selected C2/4/6 atoms
     reference:
         (n_nucleotides*3, 3) array, reference positions
+    max_pairs: Optional[int]
+        Maximum number of candidate pairs of nucleotides to evaluate
+        (see `pysages.colvars.orientation.ermsd_core`).
 
     Return
     -----------
@@ -375,7 +612,7 @@ def ermsd(rs, reference, cutoff, a, b):
         value of the eRMSD
     """
     rs, reference = reshape_coordinates(rs, reference)
-    return ermsd_core(rs, reference, cutoff, a, b)
+    return ermsd_core(rs, reference, cutoff, a, b, max_pairs)
 
 
 @multicomponent
@@ -437,6 +674,9 @@ class ERMSDCG(CollectiveVariable):
         re-scaling scale in x and y direction. Default is 0.5 (nm).
     b: float
         re-scaling scale in z direction. Default is 0.3 (nm).
+    max_pairs: Optional[int]
+        If provided, only up to `max_pairs` candidate pairs of nucleotides are
+        evaluated (see `pysages.colvars.orientation.ERMSD`).
     """
 
     def __init__(
@@ -469,6 +709,7 @@ class ERMSDCG(CollectiveVariable):
         cutoff=2.4,
         a=0.5,
         b=0.3,
+        max_pairs=None,
     ):
         super().__init__(indices)
         self.reference = np.asarray(reference)
@@ -477,11 +718,19 @@ class ERMSDCG(CollectiveVariable):
         self.cutoff = cutoff
         self.a = a
         self.b = b
+        self.max_pairs = max_pairs
 
     @property
     def function(self):
         return lambda r: ermsd_cg(
-            r, self.reference, self.sequence, self.local_coordinates, self.cutoff, self.a, self.b
+            r,
+            self.reference,
+            self.sequence,
+            self.local_coordinates,
+            self.cutoff,
+            self.a,
+            self.b,
+            self.max_pairs,
         )
 
 
@@ -527,7 +776,7 @@ def infer_base_coordinates(local_reference_systems, origins, sequence, local_coo
     return C246_coords
 
 
-def ermsd_cg(rs, reference, sequence, local_coordinates, cutoff, a, b):
+def ermsd_cg(rs, reference, sequence, local_coordinates, cutoff, a, b, max_pairs=None):
     """
     coarse-grained version of eRMSD which pass in different base sites
     other than the default C2/4/6 used by eRMSD.
@@ -555,6 +804,9 @@ def ermsd_cg(rs, reference, sequence, local_coordinates, cutoff, a, b):
         re-scaling scale in x and y direction. Default is 0.5 (nm).
     b: float
         re-scaling scale in z direction. Default is 0.3 (nm).
+    max_pairs: Optional[int]
+        Maximum number of candidate pairs of nucleotides to evaluate
+        (see `pysages.colvars.orientation.ermsd_core`).
     """
     rs, reference = reshape_coordinates(rs, reference)
     system_and_origins = calc_local_reference_systems(rs)
@@ -573,4 +825,4 @@ def ermsd_cg(rs, reference, sequence, local_coordinates, cutoff, a, b):
     C246_coords_ref = infer_base_coordinates(
         local_reference_systems_ref, origins_ref, sequence, local_coordinates
     )
-    return ermsd_core(C246_coords, C246_coords_ref, cutoff, a, b)
+    return ermsd_core(C246_coords, C246_coords_ref, cutoff, a, b, max_pairs)
@@ -0,0 +1,183 @@
+# SPDX-License-Identifier: MIT
+# See LICENSE.md and CONTRIBUTORS.md at https://github.com/SSAGESLabs/PySAGES
+
+"""
+Path collective variables describe the progress along, and the distance from, a path
+in configuration space discretized by a sequence of reference frames.
+
+Mathematical details can be found in
+[D. Branduardi, F. L. Gervasio, and M. Parrinello, JCP, 2007](https://doi.org/10.1063/1.2432340)
+
+The distances to all frames are computed by a single vectorized kernel over an array
+holding all the reference frames, so the cost of building and evaluating these
+collective variables barely depends on the number of frames.
+"""
+
+from typing import Callable
+
+from jax import numpy as np
+from jax import vmap
+from jax.nn import softmax
+from jax.scipy.special import logsumexp
+
+from pysages.colvars.core import CollectiveVariable, multicomponent
+from pysages.colvars.orientation import fitted_positions, msd, qcp
+
+
+class PathCV(CollectiveVariable):
+    """
+    Base class for collective variables defined with respect to a path given by a
+    sequence of reference frames.
+
+    Parameters
+    ----------
+    indices: list[int], list[tuple(int)]
+        Select atom groups via indices.
+    references: list[list[tuple(float)]]
+        Cartesian coordinates of the reference frames along the path, with shape
+        `(number_of_frames, len(indices), 3)`.
+    lam: Optional[float]
+        Smoothing parameter :math:`\\lambda` (inverse of a squared length).
+        Defaults to `2.3` over the mean square distance between consecutive frames.
+    align: bool
+        Whether to optimally align the configuration to each frame before computing
+        the mean square distances. Defaults to `True`.
+    weights: Optional[list[float]]
+        Weights of the selected atom positions (used for centering when `align=True`).
+    optimal_rotation: Callable
+        Function for the optimal rotation aligning two sets of positions.
+        Defaults to `pysages.colvars.orientation.qcp`.
+    """
+
+    def __init__(
+        self,
+        indices,
+        references,
+        lam=None,
+        align: bool = True,
+        weights=None,
+        optimal_rotation: Callable = qcp,
+    ):
+        if weights is not None and len(indices) != len(weights):
+            raise RuntimeError("Indices and weights must be of the same length")
+        super().__init__(indices)
+        references = np.asarray(references)
+        if references.ndim != 3 or references.shape[1] != len(self.indices):
+            raise RuntimeError(
+                f"Expected references with shape (n, {len(self.indices)}, 3), "
+                f"got {references.shape}"
+            )
+        if references.shape[0] < 2:
+            raise RuntimeError("At least two reference frames are required")
+
+        self.weights = np.ones(len(indices)) / len(indices) if weights is None else weights
+        self.weights = np.asarray(self.weights)
+        self.align = align
+        self.optimal_rotation = optimal_rotation
+        if align:
+            references = vmap(fitted_positions, in_axes=(0, None))(references, self.weights)
+        self.references = references
+
+        if lam is None:
+            distance = self.distances
+            d = np.mean(vmap(distance)(references[1:], references[:-1][:, None]))
+            if d == 0:
+                raise RuntimeError("Consecutive reference frames must not be identical")
+            lam = 2.3 / d
+        self.lam = lam
+
+    @property
+    def distances(self):
+        """
+        Returns a function that computes the mean square distances between a
+        configuration and each one of the given frames.
+        """
+        weights = self.weights
+        optimal_rotation = self.optimal_rotation
+
+        if self.align:
+
+            def distances(r, frames):
+                return vmap(msd, in_axes=(None, 0, None, None))(
+                    r, frames, weights, optimal_rotation
+                )
+
+        else:
+
+            def distances(r, frames):
+                return np.mean(np.sum((frames - r) ** 2, axis=-1), axis=-1)
+
+        return distances
+
+
+@multicomponent
+class PathCoordinates(PathCV):
+    """
+    Computes both the progress along and the distance from a path, as a
+    two-component collective variable. The distances to the frames (and their
+    derivatives) are only evaluated once for both components.
+
+    See `pysages.colvars.paths.PathCV` for a description of the parameters, and
+    `pysages.colvars.paths.path_coordinates` for the definitions.
+    """
+
+    @property
+    def function(self):
+        return lambda r: path_coordinates(self.distances(r, self.references), self.lam)
+
+
+class PathProgress(PathCV):
+    """
+    Computes the progress :math:`s \\in [0, 1]` along a path.
+
+    See `pysages.colvars.paths.PathCV` for a description of the parameters, and
+    `pysages.colvars.paths.path_coordinates` for the definition.
+    """
+
+    @property
+    def function(self):
+        return lambda r: path_coordinates(self.distances(r, self.references), self.lam)[0]
+
+
+class PathDistance(PathCV):
+    """
+    Computes the distance :math:`z` from a path.
+
+    See `pysages.colvars.paths.PathCV` for a description of the parameters, and
+    `pysages.colvars.paths.path_coordinates` for the definition.
+    """
+
+    @property
+    def function(self):
+        return lambda r: path_coordinates(self.distances(r, self.references), self.lam)[1]
+
+
+def path_coordinates(distances, lam):
+    r"""
+    Computes the progress along and the distance from a path given the mean square
+    distances :math:`d_i` from a configuration to each of the :math:`M` frames of the
+    path.
+
+    :math:`s = \frac{1}{M - 1}
+    \frac{\sum_i (i - 1) e^{-\lambda d_i}}{\sum_i e^{-\lambda d_i}}`
+
+    :math:`z = -\frac{1}{\lambda} \log \sum_i e^{-\lambda d_i}`
+
+    Both quantities are computed in a numerically stable way with the log-sum-exp trick.
+
+    Parameters
+    ----------
+    distances: jax.Array
+        Mean square distances to each frame of the path.
+    lam: float
+        Smoothing parameter :math:`\lambda`.
+
+    Returns
+    -------
+    jax.Array: [s: float, z: float]
+    """
+    M = distances.shape[0]
+    x = -lam * distances
+    s = np.dot(softmax(x), np.arange(M)) / (M - 1)
+    z = -logsumexp(x) / lam
+    return np.array([s, z])
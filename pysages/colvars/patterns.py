@@ -1,8 +1,6 @@
 # SPDX-License-Identifier: MIT
 # See LICENSE.md and CONTRIBUTORS.md at https://github.com/SSAGESLabs/PySAGES
 
-import time
-
 from jax import lax
 from jax import numpy as np
 from jax import random, vmap
@@ -11,7 +9,13 @@ from jax_md.partition import space
 from jaxopt import GradientDescent as minimize
 
 from pysages.colvars.core import CollectiveVariable
-from pysages.utils import gaussian, quaternion_from_euler, quaternion_matrix
+from pysages.typing import Any, JaxArray, NamedTuple, Optional
+from pysages.utils import (
+    gaussian,
+    quaternion_from_euler,
+    quaternion_matrix,
+    quaternion_multiply,
+)
 
 
 def rotate_pattern_with_quaternions(rot_q, pattern):
@@ -22,6 +26,25 @@ def func_to_optimise(Q, modified_pattern, local_pattern):
     return np.linalg.norm(rotate_pattern_with_quaternions(Q, modified_pattern) - local_pattern)
 
 
+class GeMState(NamedTuple):
+    """
+    Data carried from one evaluation of the GeM CV to the next.
+
+    neighbors: jax_md.partition.NeighborList
+        Neighbor list of the last evaluated configuration. Updating it only rebuilds
+        the list when some atom has moved more than half its skin since then.
+    rotations: Optional[JaxArray]
+        Optimal orientation of the reference for each site, from which the matching of
+        the next configuration is warm-started (`None` for a full search).
+    """
+
+    neighbors: Any
+    rotations: Optional[JaxArray]
+
+    def __repr__(self):
+        return repr("PySAGES " + type(self).__name__)
+
+
 # Main class implementing the GeM CV
 class Pattern:
     """
@@ -30,6 +53,9 @@ class Pattern:
     neighborlist library is utilized. This requires the user
     to define the indices of all the atoms in the system and a JAX MD
     neighbor list callable for updating the state.
+
+    If `positions` are provided, they are used (together with the neighbor list indices)
+    to build the local patterns, instead of the neighbor list reference positions.
     """
 
     def __init__(
@@ -42,6 +68,7 @@ class Pattern:
         centre_j_id,
         standard_deviation,
         mesh_size,
+        positions=None,
     ):
 
         self.characteristic_distance = characteristic_distance
@@ -51,7 +78,9 @@ class Pattern:
         self.centre_j_id = centre_j_id
         # This is added to handle neighborlists with fractional coordinates
         # (needed for NPT simulations)
-        if fractional_coords:
+        if positions is not None:
+            self.positions = positions
+        elif fractional_coords:
             self.positions = self.neighborlist.reference_position * np.diag(self.simulation_box)
         else:
             self.positions = self.neighborlist.reference_position
@@ -157,10 +186,7 @@ class Pattern:
         settled_neighbor_indices = np.where(np.sum(indices, axis=0) >= 1, 1, 0)
         return settled_neighbor_indices
 
-    def driver_match(self, number_of_rotations, number_of_opt_steps, num):
-
-        self._generate_neighborhood()
-
+    def scale_reference(self):
         """Step2: Scale the reference so that the spread matches
         with the current local pattern"""
         local_distance = 0.0
@@ -171,6 +197,11 @@ class Pattern:
 
         self.reference *= np.sqrt(local_distance / reference_distance)
 
+    def driver_match(self, number_of_rotations, number_of_opt_steps, num):
+
+        self._generate_neighborhood()
+        self.scale_reference()
+
         """Step3: mesh-loop -> Define angles in reduced Euler domain,
         and for each rotate, resort and score the pattern
 
@@ -185,7 +216,8 @@ class Pattern:
 
         def get_all_scores(newkey, euler_point):
             # b. Rotate the reference pattern
-            rotated_reference = self.rotate_reference(euler_point)
+            rot_q = quaternion_from_euler(*euler_point)
+            rotated_reference = rotate_pattern_with_quaternions(rot_q, self.reference)
             # c. Resort; shuffle the local pattern
             # and assign ids to the closest reference sites
             newkey, newsubkey = random.split(random.PRNGKey(newkey))
@@ -212,6 +244,7 @@ class Pattern:
                 reshuffled_pattern=reshuffled_reference,
                 pattern=optimal_reference,
                 quaternions=optim.params,
+                rotation=quaternion_multiply(optim.params, rot_q),
             )
             return result
 
@@ -247,6 +280,7 @@ class Pattern:
             reshuffled_pattern=scoring_results["reshuffled_pattern"][optimal_case],
             pattern=scoring_results["pattern"][optimal_case],
             quaternions=scoring_results["quaternions"][optimal_case],
+            rotation=scoring_results["rotation"][optimal_case],
             settled=settled_neighbor_ids,
             centre_atom=self.centre_j_coords,
             neighborhood=self._neighbor_coords,
@@ -254,13 +288,53 @@ class Pattern:
         )
         return optimal_result
 
+    def warm_match(self, rotation, number_of_opt_steps, num):
+        """
+        Matches the local pattern by optimizing a single orientation of the reference,
+        starting from the previously found optimal `rotation` for this site, instead of
+        searching over randomly rotated references.
+        """
+        self._generate_neighborhood()
+        self.scale_reference()
+
+        rotated_reference = rotate_pattern_with_quaternions(rotation, self.reference)
+        reshuffled_reference, _ = self.resort(rotated_reference, random.PRNGKey(num))
+        solver = minimize(fun=func_to_optimise, maxiter=number_of_opt_steps)
+        optim = solver.run(
+            init_params=np.array([1.0, 0.0, 0.0, 0.0]),
+            modified_pattern=reshuffled_reference,
+            local_pattern=self._neighbor_coords,
+        )
+        optimal_reference = rotate_pattern_with_quaternions(optim.params, reshuffled_reference)
+
+        return dict(
+            score=self.compute_score(optimal_reference),
+            rotation=quaternion_multiply(optim.params, rotation),
+        )
+
 
-def calculate_lom(all_positions: np.array, neighborlist, simulation_box, params):
+def update_neighbors(neighborlist, all_positions: np.array, simulation_box, fractional_coords):
+    """
+    Updates `neighborlist` for `all_positions`. JAX MD only rebuilds the list when
+    some atom has moved more than half the skin (`dr_threshold`) since the list was
+    last built, so carrying the updated list forward avoids rebuilding it every time.
+    """
+    if fractional_coords:
+        return neighborlist.update(np.divide(all_positions, np.diag(simulation_box)))
+    return neighborlist.update(all_positions)
 
-    if params.fractional_coords:
-        update_neighborlist = neighborlist.update(np.divide(all_positions, np.diag(simulation_box)))
-    else:
-        update_neighborlist = neighborlist.update(all_positions)
+
+def match_sites(all_positions: np.array, neighborlist, simulation_box, params, rotations=None):
+    """
+    Matches the local pattern around each site against the reference and returns the
+    scores and optimal orientations of the reference for every site. `neighborlist`
+    must be up to date with `all_positions` (see `update_neighbors`).
+
+    When `rotations` are provided, each site is warm-started from the corresponding
+    orientation (see `Pattern.warm_match`), otherwise a full search over
+    `params.number_of_rotations` random orientations is performed.
+    Sites are processed in chunks of `params.chunk_size` to bound the memory usage.
+    """
 
     """Step1: Move the reference and
     local patterns so that their centers coincide with the origin"""
@@ -269,26 +343,70 @@ def calculate_lom(all_positions: np.array, neighborlist, simulation_box, params)
         params.reference_positions - np.mean(params.reference_positions, axis=0)
     )
 
-    # Calculate scores
-    seed = np.int64(time.process_time() * 1e5)
-    optimal_results = vmap(
-        lambda i: Pattern(
+    def pattern(i, positions=None):
+        return Pattern(
             params.box,
             params.fractional_coords,
             reference_positions,
-            update_neighborlist,
+            neighborlist,
             params.characteristic_distance,
             i,
             params.standard_deviation,
             params.mesh_size,
-        ).driver_match(
+            positions,
+        )
+
+    def full_match(i):
+        result = pattern(i).driver_match(
             params.number_of_rotations,
             params.number_of_opt_it,
-            seed + i * params.number_of_rotations,
+            params.seed + i * params.number_of_rotations,
         )
-    )(np.arange(len(all_positions), dtype=np.int64))
-    average_score = np.sum(optimal_results["score"]) / len(all_positions)
-    return average_score
+        return dict(score=result["score"], rotation=result["rotation"])
+
+    def warm_match(i):
+        return pattern(i, all_positions).warm_match(
+            rotations[i], params.number_of_opt_it, params.seed + i
+        )
+
+    match = full_match if rotations is None else warm_match
+    return map_in_chunks(match, len(all_positions), params.chunk_size)
+
+
+def map_in_chunks(fn, n, chunk_size=None):
+    """
+    Evaluates `fn` over `np.arange(n)`, vectorizing over chunks of `chunk_size` indices
+    at a time (all at once if `chunk_size` is `None`).
+    """
+    indices = np.arange(n, dtype=np.int64)
+    if chunk_size is None or chunk_size >= n:
+        return vmap(fn)(indices)
+
+    number_of_chunks = -(-n // chunk_size)
+    # Pad by repeating the last index, the extra results are discarded
+    padded_indices = np.minimum(np.arange(number_of_chunks * chunk_size), n - 1)
+    results = lax.map(vmap(fn), padded_indices.reshape(number_of_chunks, chunk_size))
+
+    return {key: value.reshape(-1, *value.shape[2:])[:n] for key, value in results.items()}
+
+
+def evolve_lom(all_positions: np.array, state: GeMState, simulation_box, params):
+    """
+    Returns the average score of `all_positions` along with the `GeMState` to carry to
+    the next evaluation, i.e. the updated neighbor list and the optimal orientations
+    of the reference for each site.
+    """
+    neighbors = update_neighbors(
+        state.neighbors, all_positions, simulation_box, params.fractional_coords
+    )
+    results = match_sites(all_positions, neighbors, simulation_box, params, state.rotations)
+    average_score = np.sum(results["score"]) / len(all_positions)
+    return average_score, GeMState(neighbors, results["rotation"])
+
+
+def calculate_lom(all_positions: np.array, neighborlist, simulation_box, params, rotations=None):
+    state = GeMState(neighborlist, rotations)
+    return evolve_lom(all_positions, state, simulation_box, params)[0]
 
 
 class GeM(CollectiveVariable):
@@ -339,6 +457,26 @@ class GeM(CollectiveVariable):
     fractional_coords: bool
             Set to True if NPT simulation is considered and the box size
             changes; use periodic_general for constructing the neighborlist.
+    seed: integer
+            Seed for the random orientations and shuffles of the reference.
+            Defaults to 0, so that evaluations are reproducible.
+    chunk_size: Optional[integer]
+            Number of sites matched simultaneously. Setting it bounds the memory
+            needed when evaluating the CV over many atoms. By default, all sites
+            are matched at once.
+
+    Notes
+    -----
+    The neighbor list and the optimal orientations of the reference for each site are
+    kept in `GeM.state` (see `GeMState`). `GeM.update_warm_start` advances this state
+    to a new configuration of the atoms, and can be called as often as needed (e.g.
+    before building a sampling method, or periodically on long runs). Subsequently,
+    each site is matched by optimizing a single orientation of the reference, starting
+    from its last optimal orientation, rather than searching over `number_of_rotations`
+    random orientations, and the neighbor list is only rebuilt once the atoms have
+    moved beyond its skin. To carry the state on every evaluation, e.g. when analyzing
+    a trajectory, use `GeM.stateful_function` instead of `GeM.function`.
+
     Returns
     -------
     calculate_lom: float
@@ -357,6 +495,8 @@ class GeM(CollectiveVariable):
         mesh_size,
         nbrs,
         fractional_coords,
+        seed=0,
+        chunk_size=None,
     ):
         super().__init__(indices, group_length=None)
 
@@ -367,9 +507,41 @@ class GeM(CollectiveVariable):
         self.standard_deviation = standard_deviation
         self.characteristic_distance = standard_deviation * 2
         self.mesh_size = mesh_size
-        self.nbrs = nbrs
         self.fractional_coords = fractional_coords
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.state = GeMState(nbrs, None)
+
+    @property
+    def nbrs(self):
+        return self.state.neighbors
+
+    def update_warm_start(self, positions):
+        """
+        Advances `GeM.state` to the given configuration: the neighbor list is updated
+        (and only rebuilt if needed), and the optimal orientation of the reference for
+        each site is found, starting from the previous ones if available. Subsequently
+        built functions for this CV are warm-started from the new state.
+
+        Parameters
+        ----------
+        positions: JaxArray
+            Positions of the atoms selected by `indices` (in the same order).
+        """
+        _, state = evolve_lom(np.asarray(positions), self.state, self.box, self)
+        if state.neighbors.did_buffer_overflow:
+            raise ValueError("The neighbor list overflowed, allocate it with a larger capacity")
+        self.state = state
 
     @property
     def function(self):
-        return lambda rs: calculate_lom(rs, self.nbrs, self.box, self)
+        state = self.state
+        return lambda rs: evolve_lom(rs, state, self.box, self)[0]
+
+    @property
+    def stateful_function(self):
+        """
+        Function of the positions and a `GeMState` that returns the CV value together
+        with the state for the next evaluation.
+        """
+        return lambda rs, state: evolve_lom(rs, state, self.box, self)
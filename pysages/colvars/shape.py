@@ -6,9 +6,10 @@ Collective Variables that are calculated from the shape of group of atoms.
 """
 
 import jax.numpy as np
-from jax.numpy import linalg
+from jax import custom_jvp
 
-from pysages.colvars.core import AxisCV, CollectiveVariable
+from pysages.colvars.core import AxisCV, CollectiveVariable, multicomponent
+from pysages.utils import eps
 
 
 class RadiusOfGyration(CollectiveVariable):
@@ -49,12 +50,7 @@ def radius_of_gyration(positions):
     jax.Array
         Radius of gyration vector
     """
-    group_length = positions.shape[0]
-    rog = np.zeros((3,))
-    # TODO: Replace by `np.sum` and `vmap`  # pylint:disable=fixme
-    for r in positions:
-        rog += np.dot(r, r)
-    return rog / group_length
+    return np.full((3,), squared_radius_of_gyration(positions))
 
 
 def weighted_radius_of_gyration(positions, weights):
@@ -73,13 +69,46 @@ def weighted_radius_of_gyration(positions, weights):
     jax.Array
         Weighted radius of gyration vector
     """
+    return np.full((3,), weighted_squared_radius_of_gyration(positions, weights))
+
+
+def squared_radius_of_gyration(positions):
+    """
+    Calculate the mean squared distance of a group of atoms to the origin, that is,
+    the trace of its gyration tensor. Unlike `radius_of_gyration`, which returns it
+    repeated over three entries, this returns a scalar.
+
+    Parameters
+    ----------
+    positions: jax.Array
+        Array of particle positions used to calculate the radius of gyration.
+
+    Returns
+    -------
+    float
+        Squared radius of gyration
+    """
     group_length = positions.shape[0]
-    rog = np.zeros((3,))
-    # TODO: Replace by `np.sum` and `vmap` # pylint:disable=fixme
-    for i in range(group_length):
-        w, r = weights[i], positions[i]
-        rog += w * np.dot(r, r)
-    return rog
+    return np.sum(positions**2) / group_length
+
+
+def weighted_squared_radius_of_gyration(positions, weights):
+    """
+    Scalar counterpart of `weighted_radius_of_gyration`.
+
+    Parameters
+    ----------
+    positions: jax.Array
+        Array of particle positions used to calculate the radius of gyration.
+    weights: jax.Array
+        Array of weights for the positions.
+
+    Returns
+    -------
+    float
+        Weighted squared radius of gyration
+    """
+    return np.dot(weights, np.sum(positions**2, axis=-1))
 
 
 class PrincipalMoment(AxisCV):
@@ -126,10 +155,7 @@ def gyration_tensor(positions):
         Gyration tensor
     """
     group_length = positions.shape[0]
-    gyr = np.zeros((3, 3))
-    for r in positions:
-        gyr += np.outer(r, r)
-    return gyr / group_length
+    return np.dot(positions.T, positions) / group_length
 
 
 def weighted_gyration_tensor(positions, weights):
@@ -148,12 +174,7 @@ def weighted_gyration_tensor(positions, weights):
     jax.Array
         Gyration tensor
     """
-    group_length = positions.shape[0]
-    gyr = np.zeros((3, 3))
-    for i in range(group_length):
-        w, r = weights[i], positions[i]
-        gyr += w * np.outer(r, r)
-    return gyr
+    return np.einsum("i,ij,ik->jk", weights, positions, positions)
 
 
 def principal_moments(positions):
@@ -172,7 +193,87 @@ def principal_moments(positions):
     jax.Array
         Eigenvalues of the gyration tensor
     """
-    return linalg.eigvalsh(gyration_tensor(positions))
+    return eigvalsh3(gyration_tensor(positions))
+
+
+@custom_jvp
+def eigvalsh3(A):
+    """
+    Closed-form eigenvalues, in ascending order, of a symmetric 3 x 3 matrix `A`
+    (only its upper triangular part is used). It supports batches of matrices.
+
+    The eigenvalues are computed with the trigonometric solution of the characteristic
+    cubic polynomial, see [O. K. Smith, CACM, 1961](https://doi.org/10.1145/355578.366316).
+    Their derivatives are given by the eigenprojectors of `A`, which for degenerate
+    eigenvalues are split evenly among them, so the gradients are always finite.
+
+    Parameters
+    ----------
+    A: jax.Array
+        Symmetric matrix (or array of matrices) of shape `(..., 3, 3)`.
+
+    Returns
+    -------
+    jax.Array
+        Eigenvalues with shape `(..., 3)`.
+    """
+    a00, a11, a22 = A[..., 0, 0], A[..., 1, 1], A[..., 2, 2]
+    a01, a02, a12 = A[..., 0, 1], A[..., 0, 2], A[..., 1, 2]
+
+    q = (a00 + a11 + a22) / 3
+    b00, b11, b22 = a00 - q, a11 - q, a22 - q
+    p1 = a01**2 + a02**2 + a12**2
+    p = np.sqrt((b00**2 + b11**2 + b22**2 + 2 * p1) / 6)
+
+    is_isotropic = p <= eps() * np.abs(q)
+    p_safe = np.where(is_isotropic, 1, p)
+    det_B = (
+        b00 * (b11 * b22 - a12**2) - a01 * (a01 * b22 - a12 * a02) + a02 * (a01 * a12 - b11 * a02)
+    )
+    r = np.where(is_isotropic, 0, det_B / (2 * p_safe**3))
+    phi = np.arccos(np.clip(r, -1, 1)) / 3
+
+    lambda3 = q + 2 * p * np.cos(phi)
+    lambda1 = q + 2 * p * np.cos(phi + 2 * np.pi / 3)
+    lambda2 = 3 * q - lambda1 - lambda3
+
+    return np.stack((lambda1, lambda2, lambda3), axis=-1)
+
+
+@eigvalsh3.defjvp
+def _eigvalsh3_jvp(primals, tangents):
+    (A,), (dA,) = primals, tangents
+    lambdas = eigvalsh3(A)
+    P = eigenprojectors3(A, lambdas)
+    return lambdas, np.einsum("...kij,...ij->...k", P, dA)
+
+
+def eigenprojectors3(A, lambdas):
+    """
+    Projectors onto the eigenspaces of a symmetric 3 x 3 matrix `A` given its
+    eigenvalues in ascending order. Projectors of (numerically) degenerate eigenvalues
+    are replaced by an even split of the projector onto their common eigenspace.
+    """
+    Id = np.broadcast_to(np.identity(3), A.shape)
+    l1, l2, l3 = (lambdas[..., i, None, None] for i in range(3))
+    tol = 1e3 * eps() * np.maximum(np.abs(l1), np.abs(l3))
+    gap12 = l2 - l1
+    gap23 = l3 - l2
+
+    def safe(x):
+        return np.where(x > tol, x, 1)
+
+    # Projectors of the smallest and largest eigenvalues when they are not degenerate
+    P1 = (A - l2 * Id) @ (A - l3 * Id) / safe(gap12 * (l3 - l1))
+    P3 = (A - l1 * Id) @ (A - l2 * Id) / safe(gap23 * (l3 - l1))
+
+    is_split12 = gap12 > tol
+    is_split23 = gap23 > tol
+    P1 = np.where(is_split12, P1, np.where(is_split23, (Id - P3) / 2, Id / 3))
+    P3 = np.where(is_split23, P3, np.where(is_split12, (Id - P1) / 2, Id / 3))
+    P2 = Id - P1 - P3
+
+    return np.stack((P1, P2, P3), axis=-3)
 
 
 class Asphericity(CollectiveVariable):
@@ -218,7 +319,11 @@ def asphericity(positions):
     float
         Asphericity
     """
-    lambda1, lambda2, lambda3 = principal_moments(positions)
+    return _asphericity(principal_moments(positions))
+
+
+def _asphericity(lambdas):
+    lambda1, lambda2, lambda3 = lambdas
     return lambda3 - (lambda1 + lambda2) / 2
 
 
@@ -285,7 +390,10 @@ def acylindricity(positions, axes):
     float
         Acylindricity
     """
-    lambdas = principal_moments(positions)
+    return _acylindricity(principal_moments(positions), axes)
+
+
+def _acylindricity(lambdas, axes):
     lambda1, lambda2 = [lambdas[i] for i in axes]
     return lambda2 - lambda1
 
@@ -338,7 +446,100 @@ def shape_anisotropy(positions):
     float
         Shape Anisotropy
     """
-    lambda1, lambda2, lambda3 = principal_moments(positions)
-    return (
-        3 * (lambda1**2 + lambda2**2 + lambda3**2) / (lambda1 + lambda2 + lambda3) ** 2 - 1
-    ) / 2
+    return _shape_anisotropy(principal_moments(positions))
+
+
+def _shape_anisotropy(lambdas):
+    lambda1, lambda2, lambda3 = lambdas
+    return (3 * (lambda1**2 + lambda2**2 + lambda3**2) / (lambda1 + lambda2 + lambda3) ** 2 - 1) / 2
+
+
+@multicomponent
+class ShapeDescriptors(CollectiveVariable):
+    """
+    Computes several shape descriptors of the same group of atoms as a single
+    multicomponent collective variable. The gyration tensor and its eigenvalues (and
+    their derivatives) are only computed once for all the descriptors, instead of once
+    per collective variable as when stacking the individual ones.
+
+    Parameters
+    ----------
+    indices: list[int], list[tuple(int)]
+        Must be a list or tuple of atoms (integers or ranges) or groups of atoms.
+        A group is specified as a nested list or tuple of atoms.
+    descriptors: Sequence[str]
+        Names of the descriptors to compute, in order. Options are:
+        radius_of_gyration, asphericity, acylindricity, shape_anisotropy
+    axes: str
+        Axis combination used for the acylindricity (see
+        `pysages.colvars.shape.Acylindricity`). Defaults to "xy".
+    group_length: Optional[int]
+        Specify if a fixed group length is expected.
+    """
+
+    options = ("radius_of_gyration", "asphericity", "acylindricity", "shape_anisotropy")
+
+    def __init__(
+        self,
+        indices,
+        descriptors=("asphericity", "acylindricity", "shape_anisotropy"),
+        axes="xy",
+        group_length=None,
+    ):
+        descriptors = tuple(descriptors)
+        invalid = [d for d in descriptors if d not in self.options]
+        if len(descriptors) == 0 or invalid:
+            error_msg = f"Invalid shape descriptors {invalid}."
+            error_msg += f" Valid options are: {self.options}."
+            raise RuntimeError(error_msg)
+
+        axes = "".join(sorted(axes.lower()))
+        if axes not in Acylindricity.symmetry_axes:
+            error_msg = f"Invalid acylindrity axes specification {axes}."
+            error_msg += f" Valid options are: {tuple(Acylindricity.symmetry_axes.keys())}."
+            raise RuntimeError(error_msg)
+
+        super().__init__(indices, group_length)
+        self.descriptors = descriptors
+        self.axes = axes
+
+    @property
+    def function(self):
+        """
+        Returns
+        -------
+        Callable
+            See `pysages.colvars.shape.shape_descriptors` for details.
+        """
+        axes = Acylindricity.symmetry_axes[self.axes]
+        return lambda rs: shape_descriptors(rs, self.descriptors, axes)
+
+
+def shape_descriptors(positions, descriptors, axes=(1, 2)):
+    """
+    Calculate several shape descriptors of a group of atoms from a single evaluation of
+    its gyration tensor and principal moments.
+
+    Parameters
+    ----------
+    positions: jax.Array
+        Points in space that are equally weighted to calculate the principal moments from.
+    descriptors: Sequence[str]
+        Names of the descriptors (see `pysages.colvars.shape.ShapeDescriptors`).
+    axes: Tuple[int, int]
+        Indices of the axes used for the acylindricity.
+
+    Returns
+    -------
+    jax.Array
+        Values of the descriptors in the same order as `descriptors`.
+    """
+    S = gyration_tensor(positions)
+    lambdas = eigvalsh3(S)
+    values = {
+        "radius_of_gyration": lambda: np.trace(S),
+        "asphericity": lambda: _asphericity(lambdas),
+        "acylindricity": lambda: _acylindricity(lambdas, axes),
+        "shape_anisotropy": lambda: _shape_anisotropy(lambdas),
+    }
+    return np.stack([values[d]() for d in descriptors])
@@ -7,16 +7,23 @@ Extra utilities for computations involving collective variables.
 
 from jax import numpy as np
 
-from pysages.colvars.angles import Angle, DihedralAngle
+from pysages.colvars.angles import Angle, DihedralAngle, DihedralAngles
 
 
 def get_periods(cvs):
     """
     Returns an array with `2 * np.pi` for each cv in `cvs` that is of periodic type
-    and `inf` for the rest of the entries.
+    and `inf` for the rest of the entries. `DihedralAngles` contribute one entry per
+    component.
     """
     periodic_types = (Angle, DihedralAngle)
-    return np.array([2 * np.pi if type(cv) in periodic_types else np.inf for cv in cvs])
+    periods = []
+    for cv in cvs:
+        if type(cv) is DihedralAngles:
+            periods += [2 * np.pi if cv.periodic else np.inf] * cv.number_of_components
+        else:
+            periods.append(2 * np.pi if type(cv) in periodic_types else np.inf)
+    return np.array(periods)
 
 
 def wrap(x, P):
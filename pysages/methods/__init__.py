@@ -60,6 +60,7 @@ to sample multiple replicas along a path to estimate free energy differences.
 """
 
 from .abf import ABF
+from .analysis import AnalysisStrategy, GradientLearning, PoissonIntegration
 from .ann import ANN
 from .bias import Bias
 from .cff import CFF
@@ -76,8 +77,10 @@ from .umbrella_integration import UmbrellaIntegration
 from .unbiased import Unbiased
 from .utils import (
     HistogramLogger,
+    MetaDBiasLogger,
     MetaDLogger,
     ReplicasConfiguration,
     SerialExecutor,
+    StatisticsLogger,
     methods_dispatch,
 )
@@ -260,7 +260,7 @@ def build_force_estimator(method: ABF):
 def analyze(result: Result[ABF], **kwargs):
     """
     Computes the free energy from the result of an `ABF` run.
-    Integrates the forces via a gradient learning strategy.
+    Integrates the forces via a gradient learning strategy by default.
 
     Parameters
     ----------
@@ -272,6 +272,11 @@ def analyze(result: Result[ABF], **kwargs):
         Defines the architecture of the neural network
         (number of nodes in each hidden layer).
 
+    strategy: Optional[AnalysisStrategy] = GradientLearning()
+        How to integrate the mean forces. `PoissonIntegration()` solves for the
+        free energy directly on the grid, which is much faster than training a
+        neural network (`topology` is ignored in that case).
+
     Returns
     -------
 
@@ -299,5 +304,6 @@ def analyze(result: Result[ABF], **kwargs):
     for each attribute.
     """
     topology = kwargs.get("topology", (8, 8))
-    _result = _analyze(result, GradientLearning(), topology)
+    strategy = kwargs.get("strategy", GradientLearning())
+    _result = _analyze(result, strategy, topology)
     return numpyfy_vals(_result)
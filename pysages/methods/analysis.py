@@ -6,15 +6,27 @@ Collection of analysis methods to compute the free energy from the results of a
 biased simulation.
 """
 
-from functools import partial
+from functools import lru_cache, partial
 
-from jax import jit
+import jax
+from jax import jit, lax
 from jax import numpy as np
 from jax import vmap
+from jax.scipy.fft import dctn, idctn
+from jax.scipy.ndimage import map_coordinates
+from jax.scipy.sparse.linalg import cg
 
 from pysages.approxfun import compute_mesh
 from pysages.approxfun import scale as _scale
-from pysages.grids import grid_transposer
+from pysages.grids import (
+    Chebyshev,
+    Grid,
+    Periodic,
+    Regular,
+    build_grid,
+    get_info,
+    grid_transposer,
+)
 from pysages.methods.core import Result
 from pysages.ml.models import MLP
 from pysages.ml.objectives import GradientsSSE, L2Regularization
@@ -41,6 +53,30 @@ class GradientLearning(AnalysisStrategy):
     pass
 
 
+class PoissonIntegration(AnalysisStrategy):
+    """
+    Analysis strategy that computes free energies by directly solving on the grid
+    the least-squares problem of finding the function whose finite differences best
+    match the mean forces (a discrete Poisson equation).
+
+    The equations are solved with fast Fourier transforms on periodic grids, and with
+    discrete cosine transforms (Neumann boundary conditions) on regular grids. On
+    Chebyshev grids, or when `weighted=True`, the mean forces are weighted by the
+    number of visits to each bin and the equations are solved with a preconditioned
+    conjugate gradient method.
+
+    Parameters
+    ----------
+
+    weighted: bool = False
+        Whether to weight the mean forces at each bin by its number of visits, so that
+        poorly sampled regions have less influence on the free energy.
+    """
+
+    def __init__(self, weighted: bool = False):
+        self.weighted = weighted
+
+
 @dispatch
 def _analyze(result: Result, strategy: GradientLearning, topology):
     """
@@ -83,19 +119,61 @@ def _analyze(result: Result, strategy: GradientLearning, topology):
     NOTE:
     For multiple-replicas runs we return a list (one item per-replica)
     for each attribute.
+    The networks of all replicas are fitted within a single compiled function. On
+    accelerators the fits run in lockstep (vectorized), while on CPUs they run one
+    after another, so that each fit can stop as soon as it converges.
     """
 
-    # The ForceNN based analysis occurs in two stages:
+    method = result.method
+    states = result.states
+    grid = method.grid
+
+    # Accelerators can fit all replicas in lockstep, while on CPUs it pays off to let
+    # each fit stop as soon as it converges
+    batching = "map" if jax.default_backend() == "cpu" else "vmap"
+    fit, free_energy = _build_gradient_learning(get_info(grid), tuple(topology), batching)
+
+    # All replicas are trained at once, and share the same compiled free energy evaluator
+    hist = np.stack([state.hist for state in states])
+    Fsum = np.stack([state.Fsum for state in states])
+    nn = fit(hist, Fsum)
+    mesh = _mesh(grid)
+    A = vmap(free_energy, in_axes=(0, None))(nn, mesh)
+
+    # We transpose the data for convenience when plotting
+    transpose = grid_transposer(grid)
+    d = mesh.shape[-1]
+
+    replicas = range(len(states))
+    hists = [transpose(hist[i]) for i in replicas]
+    mean_forces = [transpose(_average_forces(hist[i], Fsum[i])) for i in replicas]
+    free_energies = [transpose(A[i]) for i in replicas]
+    fes_fns = [partial(free_energy, NNData(*(p[i] for p in nn))) for i in replicas]
+
+    return {
+        "histogram": first_or_all(hists),
+        "mean_force": first_or_all(mean_forces),
+        "free_energy": first_or_all(free_energies),
+        "fes_fn": first_or_all(fes_fns),
+        "mesh": transpose(mesh).reshape(-1, d).squeeze(),
+    }
+
+
+@lru_cache
+def _build_gradient_learning(grid_info, topology, batching):
+    # Builds (once per grid, network topology and batching mode) the jitted functions
+    # that fit the mean forces of a stack of replicas, and that evaluate the free energy
+    # from the parameters of any of the fitted networks.
+    #
+    # The fitting occurs in two stages:
     #
     #  1. The data is smoothed and a first quick fitting is performed to obtain
     #     an approximate set of network parameters.
     #  2. A second training pass is then performed over the raw data starting
     #     with the parameters from previous step.
 
-    method = result.method
-    states = result.states
-    grid = method.grid
-    mesh = inputs = (compute_mesh(grid) + 1) * grid.size / 2 + grid.lower
+    grid = build_grid(*grid_info)
+    inputs = _mesh(grid)
 
     model = MLP(grid.shape.size, 1, topology, transform=partial(_scale, grid=grid))
     loss = GradientsSSE()
@@ -117,54 +195,91 @@ def _analyze(result: Result, strategy: GradientLearning, topology):
         data = np.asarray(data, dtype=conv_dtype)
         return np.asarray(convolve(data.T, kernel, boundary=boundary), dtype=data_dtype).T
 
-    @jit
     def pre_train(nn, data):
         params = pre_fit(nn.params, inputs, smooth(data)).params
         return NNData(params, nn.mean, nn.std)
 
-    @jit
     def train(nn, data):
         params = fit(nn.params, inputs, data).params
         return NNData(params, nn.mean, nn.std)
 
-    def build_fes_fn(state):
-        hist = np.expand_dims(state.hist, state.hist.ndim)
-        F = state.Fsum / np.maximum(hist, 1)
+    ps, layout = unpack(model.parameters)
+
+    def fit_replica(hist, Fsum):
+        F = _average_forces(hist, Fsum)
 
         # Scale the mean forces
         s = np.abs(F).max()
         F = F / s
 
-        ps, layout = unpack(model.parameters)
         nn = pre_train(NNData(ps, 0.0, s), F)
-        nn = train(nn, F)
+        return train(nn, F)
+
+    if batching == "vmap":
+        fit_replicas = jit(vmap(fit_replica))
+    else:
+        fit_replicas = jit(
+            lambda hist, Fsum: lax.map(lambda args: fit_replica(*args), (hist, Fsum))
+        )
+
+    @jit
+    def free_energy(nn, x):
+        params = pack(nn.params, layout)
+        A = nn.std * model.apply(params, x) + nn.mean
+        return A.max() - A
+
+    return fit_replicas, free_energy
+
+
+@dispatch
+def _analyze(  # noqa: F811 # pylint: disable=C0116,E0102
+    result: Result, strategy: PoissonIntegration, topology=None
+):
+    """
+    Computes the free energy from the result of an `ABF`-based run.
+    Integrates the forces by solving a discrete Poisson equation on the grid.
+
+    Parameters
+    ----------
+
+    result: Result:
+        Result bundle containing method, final ABF-like state, and callback.
+
+    strategy: PoissonIntegration
+
+    topology: Optional[Tuple[int]]
+        Ignored, accepted for compatibility with other strategies.
+
+    Returns
+    -------
 
-        def fes_fn(x):
-            params = pack(nn.params, layout)
-            A = nn.std * model.apply(params, x) + nn.mean
-            return A.max() - A
+    dict: A dictionary with the same keys as for the `GradientLearning` strategy.
+    Here `fes_fn` linearly interpolates the free energy between the bins of the grid.
 
-        return jit(fes_fn)
+    NOTE:
+    For multiple-replicas runs we return a list (one item per-replica)
+    for each attribute.
+    """
+    method = result.method
+    states = result.states
+    grid = method.grid
 
-    def average_forces(hist, Fsum):
-        shape = (*Fsum.shape[:-1], 1)
-        return Fsum / np.maximum(hist.reshape(shape), 1)
+    integrate, interpolate = _build_poisson_integration(get_info(grid), strategy.weighted)
 
-    hists = []
-    mean_forces = []
-    free_energies = []
-    fes_fns = []
+    hist = np.stack([state.hist for state in states])
+    Fsum = np.stack([state.Fsum for state in states])
+    A = integrate(hist, Fsum)
+    mesh = _mesh(grid)
 
     # We transpose the data for convenience when plotting
     transpose = grid_transposer(grid)
     d = mesh.shape[-1]
 
-    for state in states:
-        fes_fn = build_fes_fn(state)
-        hists.append(transpose(state.hist))
-        mean_forces.append(transpose(average_forces(state.hist, state.Fsum)))
-        free_energies.append(transpose(fes_fn(mesh)))
-        fes_fns.append(fes_fn)
+    replicas = range(len(states))
+    hists = [transpose(hist[i]) for i in replicas]
+    mean_forces = [transpose(_average_forces(hist[i], Fsum[i])) for i in replicas]
+    free_energies = [transpose(A[i]) for i in replicas]
+    fes_fns = [partial(interpolate, A[i]) for i in replicas]
 
     return {
         "histogram": first_or_all(hists),
@@ -173,3 +288,202 @@ def _analyze(result: Result, strategy: GradientLearning, topology):
         "fes_fn": first_or_all(fes_fns),
         "mesh": transpose(mesh).reshape(-1, d).squeeze(),
     }
+
+
+@lru_cache
+def _build_poisson_integration(grid_info, weighted):
+    # Builds (once per grid) the jitted functions that integrate the mean forces of a
+    # stack of replicas, and that interpolate the resulting free energies.
+    grid = build_grid(*grid_info)
+    solve = _weighted_poisson_solver(grid) if weighted else _poisson_solver(grid)
+
+    def integrate(hist, Fsum):
+        u = solve(hist, _average_forces(hist, Fsum))
+        return u.max() - u
+
+    nodes = _nodes_locator(grid)
+    mode = "wrap" if grid.is_periodic else "nearest"
+    shape = grid_info[-1]
+
+    @jit
+    def interpolate(A, x):
+        # Points are given as rows, so one dimensional meshes `(N,)` become `(N, 1)`
+        x = _scale(np.asarray(x).reshape(-1, len(shape)), grid)
+        coords = [nodes(x[:, i], n) for i, n in enumerate(shape)]
+        return map_coordinates(A, coords, order=1, mode=mode).reshape(-1, 1)
+
+    return jit(vmap(integrate)), interpolate
+
+
+@dispatch
+def _poisson_solver(grid: Grid[Periodic]):
+    # Least-squares solution of `(u[i + 1] - u[i]) / h = (F[i] + F[i + 1]) / 2` along
+    # each axis, which is diagonal in Fourier space
+    axes = tuple(range(grid.shape.size))
+    thetas = [2 * np.pi * np.fft.fftfreq(n) for n in _grid_shape(grid)]
+    spacings = grid.size / grid.shape
+
+    def solve(_, F):
+        numerator = 0
+        denominator = 0
+        for i, (theta, h) in enumerate(zip(thetas, spacings)):
+            z = _along_axis(np.exp(1j * theta), i, len(axes))
+            d = (z - 1) / h
+            numerator = numerator + np.conj(d) * (1 + z) / 2 * np.fft.fftn(F[..., i])
+            denominator = denominator + np.abs(d) ** 2
+        u_hat = np.where(denominator > 0, numerator / np.where(denominator > 0, denominator, 1), 0)
+        return np.real(np.fft.ifftn(u_hat, axes=axes)).astype(F.dtype)
+
+    return solve
+
+
+@dispatch
+def _poisson_solver(grid: Grid[Regular]):  # noqa: F811 # pylint: disable=C0116,E0102
+    # Least-squares solution of `(u[i + 1] - u[i]) / h = (F[i] + F[i + 1]) / 2` along
+    # each axis, whose normal equations (a Poisson equation with Neumann boundary
+    # conditions) are diagonalized by the type-II discrete cosine transform
+    d = grid.shape.size
+    spacings = grid.size / grid.shape
+    eigenvalues = 0
+    for i, (n, h) in enumerate(zip(_grid_shape(grid), spacings)):
+        eigenvalues = (
+            eigenvalues + _along_axis((2 - 2 * np.cos(np.pi * np.arange(n) / n)), i, d) / h**2
+        )
+
+    def solve(_, F):
+        b = 0
+        for i, h in enumerate(spacings):
+            g = _face_averages(F[..., i], i, periodic=False)
+            b = b + _divergence(g / h, i, periodic=False)
+        b_hat = dctn(b, norm="ortho")
+        u_hat = np.where(eigenvalues > 0, b_hat / np.where(eigenvalues > 0, eigenvalues, 1), 0)
+        return idctn(u_hat, norm="ortho")
+
+    return solve
+
+
+@dispatch
+def _poisson_solver(grid: Grid[Chebyshev]):  # noqa: F811 # pylint: disable=C0116,E0102
+    return _weighted_poisson_solver(grid)
+
+
+def _weighted_poisson_solver(grid, floor=1e-2, tol=1e-6):
+    # Weighted least-squares solution of `(u[i + 1] - u[i]) / h = (F[i] + F[i + 1]) / 2`
+    # along each axis, where each equation is weighted by the number of visits to both
+    # bins. Unvisited bins are given a small weight, so that the free energy gets
+    # smoothly continued over them. The normal equations are solved with a Jacobi
+    # preconditioned conjugate gradient method.
+    d = grid.shape.size
+    periodic = grid.is_periodic
+    mesh = _mesh(grid).reshape(*_grid_shape(grid), d)
+    spacings = []
+    for i in range(d):
+        x = mesh[..., i]
+        if periodic:
+            h = np.full(x.shape, grid.size[i] / grid.shape[i])
+        else:
+            h = np.diff(x, axis=i)
+        spacings.append(h)
+    maxiter = 10 * int(grid.shape.prod())
+
+    def solve(hist, F):
+        hist = np.asarray(hist, dtype=F.dtype)
+        weights = []
+        for i in range(d):
+            h0, h1 = _face_pairs(hist, i, periodic)
+            weights.append(2 * h0 * h1 / np.maximum(h0 + h1, 1))
+        w_max = np.max(np.array([w.max() for w in weights]))
+        weights = [w / np.maximum(w_max, 1) + floor for w in weights]
+
+        def gradient(u):
+            return [_differences(u, i, periodic) / h for i, h in enumerate(spacings)]
+
+        def divergence(gs):
+            return sum(
+                _divergence(g / h, i, periodic) for i, (g, h) in enumerate(zip(gs, spacings))
+            )
+
+        def operator(u):
+            return divergence([w * g for w, g in zip(weights, gradient(u))])
+
+        b = divergence([w * _face_averages(F[..., i], i, periodic) for i, w in enumerate(weights)])
+        diagonal = sum(
+            _face_sums(w / h**2, i, periodic) for i, (w, h) in enumerate(zip(weights, spacings))
+        )
+        u, _ = cg(operator, b, M=lambda r: r / diagonal, tol=tol, maxiter=maxiter)
+        return u
+
+    return solve
+
+
+def _mesh(grid):
+    return (compute_mesh(grid) + 1) * grid.size / 2 + grid.lower
+
+
+def _average_forces(hist, Fsum):
+    shape = (*Fsum.shape[:-1], 1)
+    return Fsum / np.maximum(hist.reshape(shape), 1)
+
+
+def _grid_shape(grid):
+    return tuple(int(n) for n in grid.shape)
+
+
+def _along_axis(v, axis, ndim):
+    # Reshapes the 1D array `v` so that it broadcasts along `axis` of a `ndim` array
+    shape = [1] * ndim
+    shape[axis] = -1
+    return v.reshape(shape)
+
+
+def _face_pairs(u, axis, periodic):
+    # Values of `u` at both sides of each face between consecutive bins along `axis`
+    if periodic:
+        return u, np.roll(u, -1, axis)
+    n = u.shape[axis]
+    return lax.slice_in_dim(u, 0, n - 1, axis=axis), lax.slice_in_dim(u, 1, n, axis=axis)
+
+
+def _differences(u, axis, periodic):
+    u0, u1 = _face_pairs(u, axis, periodic)
+    return u1 - u0
+
+
+def _face_averages(u, axis, periodic):
+    u0, u1 = _face_pairs(u, axis, periodic)
+    return (u0 + u1) / 2
+
+
+def _face_sums(g, axis, periodic):
+    # Adds to each bin the values of `g` at its adjacent faces along `axis`
+    if periodic:
+        return g + np.roll(g, 1, axis)
+    g = _pad_axis(g, axis)
+    n = g.shape[axis]
+    return lax.slice_in_dim(g, 0, n - 1, axis=axis) + lax.slice_in_dim(g, 1, n, axis=axis)
+
+
+def _divergence(g, axis, periodic):
+    # Transpose of `_differences` (note the sign convention of a negative divergence)
+    if periodic:
+        return np.roll(g, 1, axis) - g
+    g = _pad_axis(g, axis)
+    n = g.shape[axis]
+    return lax.slice_in_dim(g, 0, n - 1, axis=axis) - lax.slice_in_dim(g, 1, n, axis=axis)
+
+
+def _pad_axis(g, axis):
+    pad_width = [(0, 0)] * g.ndim
+    pad_width[axis] = (1, 1)
+    return np.pad(g, pad_width)
+
+
+@dispatch
+def _nodes_locator(grid: Grid):
+    # Maps coordinates in [-1, 1] to fractional indices of the grid nodes
+    return lambda x, n: (x + 1) * n / 2 - 1 / 2
+
+
+@dispatch
+def _nodes_locator(grid: Grid[Chebyshev]):  # noqa: F811 # pylint: disable=C0116,E0102
+    return lambda x, n: n * np.arccos(-np.clip(x, -1, 1)) / np.pi - 1 / 2
@@ -59,7 +59,9 @@ class Bias(SamplingMethod):
         """
         Set the center of the collective variable to a new position.
         """
-        center = np.asarray(center)
+        # Use an explicit dtype so that centers given as python scalars (weakly typed) and
+        # centers computed later on (e.g. by `SplineString`) share the compiled updates
+        center = np.asarray(center, dtype=float)
         if center.shape == ():
             center = center.reshape(1)
         if len(center.shape) != 1 or center.shape[0] != self.cv_dimension:
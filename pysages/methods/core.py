@@ -2,12 +2,15 @@
 # See LICENSE.md and CONTRIBUTORS.md at https://github.com/SSAGESLabs/PySAGES
 
 from abc import ABCMeta, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from functools import reduce
 from inspect import getfullargspec
 from operator import or_
+from pathlib import Path
 from sys import modules as sys_modules
 
-from jax import jit
+import dill as pickle
+from jax import jit, tree_util
 from plum import parametric
 
 from pysages.backends import SamplingContext
@@ -15,7 +18,7 @@ from pysages.colvars.core import build
 from pysages.grids import Grid, build_grid, get_info
 from pysages.methods.restraints import canonicalize
 from pysages.methods.utils import ReplicasConfiguration
-from pysages.typing import Callable, Optional, Union
+from pysages.typing import Callable, JaxArray, Optional, Union
 from pysages.utils import (
     ToCPU,
     copy,
@@ -63,6 +66,89 @@ class ReplicaResult(Result):
     pass
 
 
+DEFAULT_CHECKPOINT_PATH = "checkpoint.pkl"
+
+
+class Checkpointer:
+    """
+    Periodically stores the state of a running single replica simulation, so that it
+    can be restarted from the last checkpoint (see `pysages.serialization.load`).
+
+    The method state, callback and a copy of the current system snapshot are taken
+    when `save` gets called, while writing them to disk happens in a background thread,
+    so that the simulation can continue in the meantime. The callback is serialized
+    right away (as it may be updated in place by the simulation), and the copies of
+    the state and snapshot arrays to the host are started immediately. At most one
+    checkpoint is written at a time, and files are replaced atomically, so `path`
+    always holds the last complete checkpoint.
+
+    Parameters
+    ----------
+    method: ``SamplingMethod``
+        The sampling method used.
+    path: ``Union[str, Path]``
+        File where the checkpoints are written.
+    """
+
+    def __init__(self, method, path=DEFAULT_CHECKPOINT_PATH):
+        self.method = method
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._future = None
+
+    def save(self, sampler):
+        """
+        Takes a checkpoint of the simulation driven by `sampler` and schedules it to be
+        written to disk once the previous checkpoint (if any) has been written.
+        """
+        # Method states are immutable, but snapshots and callbacks are updated in place
+        state = sampler.state
+        snapshot = sampler.take_snapshot()
+        callbacks = None if sampler.callback is None else [_PickledCallback(sampler.callback)]
+        for x in tree_util.tree_leaves((state, snapshot)):
+            if isinstance(x, JaxArray):
+                x.copy_to_host_async()
+        result = Result(self.method, [state], callbacks, [snapshot])
+        self.wait()
+        self._future = self._executor.submit(_save, result, self.path)
+
+    def wait(self):
+        """
+        Blocks until the last scheduled checkpoint has been written, re-raising any
+        errors that happened while writing it.
+        """
+        if self._future is not None:
+            future, self._future = self._future, None
+            future.result()
+
+    def close(self):
+        """
+        Waits for any pending checkpoint and releases the background thread.
+        """
+        try:
+            self.wait()
+        finally:
+            self._executor.shutdown()
+
+
+class _PickledCallback:
+    # Serialized copy of a callback, which is stored (and loaded back) as the callback
+    # itself. Pickling it once is cheaper than deep copying it and pickling the copy.
+
+    def __init__(self, callback):
+        self.data = pickle.dumps(callback)
+
+    def __reduce__(self):
+        return (pickle.loads, (self.data,))
+
+
+def _save(result, path):
+    # Deferred import to avoid circular imports
+    from pysages.serialization import save  # pylint: disable=C0415
+
+    save(result, path)
+
+
 class SamplingMethodMeta(ABCMeta):
     """
     Metaclass for enhanced sampling methods.
@@ -93,12 +179,24 @@ class SamplingMethod(metaclass=SamplingMethodMeta):
 
     def __init__(self, cvs, **kwargs):
         self.cvs = cvs
-        self.cv = build(*cvs, differentiate=kwargs.get("cv_grad", True))
+        self._cv = None
         self.requires_box_unwrapping = reduce(
             or_, (cv.requires_box_unwrapping for cv in cvs), False
         )
         self.kwargs = kwargs
 
+    @property
+    def cv(self):
+        """
+        Jit compiled function computing the collective variables (and their
+        derivatives unless ``cv_grad=False`` was passed). It is only built on first
+        access, and shared among methods with identical collective variables
+        (see ``pysages.colvars.core.build``).
+        """
+        if self._cv is None:
+            self._cv = build(*self.cvs, differentiate=self.kwargs.get("cv_grad", True))
+        return self._cv
+
     def __getstate__(self):
         return default_getstate(self)
 
@@ -211,10 +309,20 @@ def run(  # noqa: F811 # pylint: disable=C0116,E0102
     #     or threads in case the multiple simulation are to be run in parallel.
     #     Defaults to ReplicasConfiguration(1, SerialExecutor()),
     #     which means only one simulation is run.
+
+    # checkpoint_every: Optional[int] = None
+    #     If given, every `checkpoint_every` time steps the method state, callback and
+    #     a snapshot of the system are written (from a background thread) to
+    #     `checkpoint_path`. The checkpoint can be loaded with `pysages.load` and used to
+    #     restart the simulation via `pysages.run(result, ...)`.
+
+    # checkpoint_path: Union[str, Path] = "checkpoint.pkl"
+    #     File where the checkpoints are stored. When running several replicas,
+    #     the replica number is appended to the file stem.
     # """
     timesteps = int(timesteps)
 
-    def submit_work(executor, method, callback):
+    def submit_work(executor, method, callback, n):
         return executor.submit(
             _run_replica,
             method,
@@ -223,11 +331,11 @@ def run(  # noqa: F811 # pylint: disable=C0116,E0102
             context_args,
             callback,
             post_run_action,
-            **kwargs,
+            **_replica_kwargs(kwargs, n, config.copies),
         )
 
     with config.executor as ex:
-        futures = [submit_work(ex, method, callback) for _ in range(config.copies)]
+        futures = [submit_work(ex, method, callback, n) for n in range(config.copies)]
     results = [future.result() for future in futures]
     states = [r.states for r in results]
     snapshots = [r.snapshots for r in results]
@@ -253,7 +361,8 @@ def run(  # noqa: F811 # pylint: disable=C0116,E0102
     # timesteps: int
     #     Number of time steps the simulation is running.
     # kwargs: dict
-    #     These gets passed to the backend run function.
+    #     These gets passed to the backend run function (except for `checkpoint_every`
+    #     and `checkpoint_path`, see `pysages.run(method, context_generator, ...)`).
 
     # Notes
     # -----
@@ -272,11 +381,63 @@ def run(  # noqa: F811 # pylint: disable=C0116,E0102
     callback = None if sampler.callback is None else [sampler.callback]
 
     with sampling_context:
-        sampling_context.run(timesteps, **kwargs)
+        _run_sampling(sampling_context, timesteps, **kwargs)
 
     return Result(method, [sampler.state], callback, [sampler.take_snapshot()])
 
 
+@dispatch
+def run(  # noqa: F811 # pylint: disable=C0116,E0102
+    method: SamplingMethod,
+    sampling_context: SamplingContext,
+    timesteps: Union[int, float],
+    callback: Optional[Callable] = None,
+    **kwargs,
+):
+    # """
+    # Binds `method` to an already existing `sampling_context` and continues the
+    # simulation from its current configuration, with a freshly initialized method state.
+
+    # This allows chaining simulation segments (e.g. equilibration and production runs)
+    # with the same or different methods, without having to set up the simulation
+    # context again. See `pysages.backends.SamplingContext.rebind`.
+
+    # Notes
+    # -----
+    # This interface supports only single replica runs.
+    # """
+    sampling_context.rebind(method, callback)
+    return run(sampling_context, timesteps, **kwargs)
+
+
+@dispatch
+def run(  # noqa: F811 # pylint: disable=C0116,E0102
+    result: Result,
+    sampling_context: SamplingContext,
+    timesteps: Union[int, float],
+    **kwargs,
+):
+    # """
+    # Restarts a single replica simulation from a previously stored `result` within an
+    # already existing `sampling_context`.
+
+    # The sampling method of `result` is bound to the context (unless it is already the
+    # one bound to it), and the system configuration and method state are restored from
+    # `result` without regenerating the simulation context.
+    # """
+    if len(result.states) != 1:
+        raise ValueError("Only results of single replica runs can be restarted this way")
+
+    method = result.method
+    callback = None if result.callbacks is None else result.callbacks[0]
+    sampler = sampling_context.sampler
+    if method is not sampling_context.method or callback is not sampler.callback:
+        sampler = sampling_context.rebind(method, callback)
+    _restore(sampler, method, result.states[0], result.snapshots[0])
+
+    return run(sampling_context, timesteps, **kwargs)
+
+
 @dispatch
 def run(  # noqa: F811 # pylint: disable=C0116,E0102
     result: Result,
@@ -295,7 +456,7 @@ def run(  # noqa: F811 # pylint: disable=C0116,E0102
     callbacks_ = result.callbacks
     callbacks = [None] * len(result.states) if callbacks_ is None else callbacks_
 
-    def submit_work(executor, result):
+    def submit_work(executor, result, n):
         return executor.submit(
             _run_replica,
             result,
@@ -303,12 +464,14 @@ def run(  # noqa: F811 # pylint: disable=C0116,E0102
             timesteps,
             context_args,
             post_run_action,
-            **kwargs,
+            **_replica_kwargs(kwargs, n, len(result_args)),
         )
 
     with config.executor as ex:
-        result_args = zip(result.states, callbacks, result.snapshots)
-        futures = [submit_work(ex, ReplicaResult(method, *args)) for args in result_args]
+        result_args = list(zip(result.states, callbacks, result.snapshots))
+        futures = [
+            submit_work(ex, ReplicaResult(method, *args), n) for n, args in enumerate(result_args)
+        ]
 
     results = [future.result() for future in futures]
     states = [r.states for r in results]
@@ -373,7 +536,7 @@ def _run(  # noqa: F811 # pylint: disable=C0116,E0102
     sampler = sampling_context.sampler
 
     with sampling_context:
-        sampling_context.run(timesteps, **kwargs)
+        _run_sampling(sampling_context, timesteps, **kwargs)
         if post_run_action:
             post_run_action(**context_args)
 
@@ -399,20 +562,64 @@ def _run(  # noqa: F811 # pylint: disable=C0116,E0102
     sampling_context = SamplingContext(method, context_generator, callback, context_args)
     context_args["context"] = sampling_context.context
     sampler = sampling_context.sampler
-    prev_snapshot = result.snapshots
-    if device_platform(sampler.state.xi) == "cpu":
-        prev_snapshot = copy(prev_snapshot, ToCPU())
-    sampler.restore(prev_snapshot)
-    sampler.state = result.states
+    _restore(sampler, method, result.states, result.snapshots)
 
     with sampling_context:
-        sampling_context.run(timesteps, **kwargs)
+        _run_sampling(sampling_context, timesteps, **kwargs)
         if post_run_action:
             post_run_action(**context_args)
 
     return ReplicaResult(method, sampler.state, callback, sampler.take_snapshot())
 
 
+def _run_sampling(
+    sampling_context: SamplingContext,
+    timesteps: int,
+    checkpoint_every: Optional[int] = None,
+    checkpoint_path=DEFAULT_CHECKPOINT_PATH,
+    **kwargs,
+):
+    # Runs the simulation, in segments of `checkpoint_every` time steps if checkpointing
+    if not checkpoint_every:
+        sampling_context.run(timesteps, **kwargs)
+        return
+
+    checkpoint_every = int(checkpoint_every)
+    checkpointer = Checkpointer(sampling_context.method, checkpoint_path)
+    try:
+        for start in range(0, timesteps, checkpoint_every):
+            sampling_context.run(min(checkpoint_every, timesteps - start), **kwargs)
+            checkpointer.save(sampling_context.sampler)
+    finally:
+        checkpointer.close()
+
+
+def _replica_kwargs(kwargs, n, replicas):
+    # Gives each replica its own checkpoint file
+    if replicas == 1 or not kwargs.get("checkpoint_every"):
+        return kwargs
+    path = Path(kwargs.get("checkpoint_path", DEFAULT_CHECKPOINT_PATH))
+    return dict(kwargs, checkpoint_path=path.with_name(f"{path.stem}.{n}{path.suffix}"))
+
+
+def _restore(sampler, method, state, snapshot):
+    # Restores the system configuration and the state of `method` bound to `sampler`
+    if device_platform(sampler.state.xi) == "cpu":
+        snapshot = copy(snapshot, ToCPU())
+    sampler.restore(snapshot)
+    sampler.state = restore_state(method, state)
+
+
+@dispatch
+def restore_state(method: SamplingMethod, state):  # pylint: disable=unused-argument
+    """
+    Returns the state from which to restart a simulation with `method`. Methods that
+    carry some of their parameters in their state can overload this to make any
+    changes to those parameters, made after the state was stored, take effect.
+    """
+    return state
+
+
 @dispatch.abstract
 def analyze(result: Result):
     pass
@@ -10,26 +10,225 @@ The initial and final states are defined in terms of an order parameter.
 The method allows to calculate rate constants and generate transition paths.
 """
 
-import sys
+import json
+import os
+import shutil
+import tempfile
+from math import ceil
+from uuid import uuid4
 from warnings import warn
 
+import numpy
+from jax import jit
 from jax import numpy as np
+from jax import tree_util
+from jax.lax import cond
 
 from pysages.backends import SamplingContext
-from pysages.methods.core import SamplingMethod, generalize
+from pysages.backends.snapshot import Box, Snapshot
+from pysages.methods.core import SamplingMethod
+from pysages.methods.utils import SerialExecutor
 from pysages.typing import Callable, JaxArray, NamedTuple, Optional
 from pysages.utils import dispatch
 
 
 class FFSState(NamedTuple):
+    """
+    FFS internal state.
+
+    Parameters
+    ----------
+
     xi: JaxArray
+        Last collective variable recorded in the simulation.
+
     bias: Optional[JaxArray]
+        FFS does not bias the simulation, so this is always `None`.
+
+    bounds: JaxArray
+        Interfaces that define the outcome of the current trial `[lower, target, upper]`.
+        A trial fails when `xi < lower`, and succeeds when `target <= xi < upper`.
+
+    status: JaxArray
+        Outcome of the current trial: `0` while running, `1` on success, `-1` on failure.
+
+    crossing_ncalls: JaxArray
+        Value of `ncalls` when the current trial ended.
+
+    crossing: tuple
+        Copy of the snapshot fields (positions, velocities and masses, forces, ids and
+        images) at the step in which the current trial ended.
+
+    ncalls: int
+        Counts the number of times the method's update has been called.
+    """
+
+    xi: JaxArray
+    bias: Optional[JaxArray]
+    bounds: JaxArray
+    status: JaxArray
+    crossing_ncalls: JaxArray
+    crossing: tuple
     ncalls: int
 
     def __repr__(self):
         return repr("PySAGES " + type(self).__name__)
 
 
+class TrialResult(NamedTuple):
+    """
+    Outcome of an FFS trial run.
+
+    status: int
+        `1` if the trial reached the target interface and `-1` if it fell back into
+        the initial basin.
+    steps: int
+        Number of time steps it took the trial to reach either interface.
+    snapshot: Optional[str]
+        Key within the `SnapshotPool` of the configuration at the crossing of the
+        target interface (`None` for failed trials).
+    """
+
+    status: int
+    steps: int
+    snapshot: Optional[str]
+
+
+class FFSProgress(NamedTuple):
+    """
+    Completed stages of an FFS run, which are checkpointed after each stage.
+
+    windows: tuple[float]
+        Interfaces of the run.
+    basin: tuple[str]
+        Keys (within the `SnapshotPool`) of the configurations sampled in the basin.
+    flux: Optional[float]
+        Initial flux through the first interface.
+    initial_snapshots: tuple[str]
+        Keys of the configurations at the first interface.
+    probabilities: tuple[float]
+        Conditional probabilities of reaching each of the completed interfaces.
+    snapshots: tuple[str]
+        Keys of the configurations from which the next interface trials start.
+    rate: Optional[float]
+        Rate constant, set once all interfaces are completed.
+    """
+
+    windows: tuple
+    basin: tuple = ()
+    flux: Optional[float] = None
+    initial_snapshots: tuple = ()
+    probabilities: tuple = ()
+    snapshots: tuple = ()
+    rate: Optional[float] = None
+
+    def __repr__(self):
+        return repr("PySAGES " + type(self).__name__)
+
+    def save(self, path):
+        """
+        Atomically writes the progress to `path` as JSON.
+        """
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._asdict(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads the progress stored at `path`.
+        """
+        with open(path) as f:
+            fields = json.load(f)
+        # JSON stores tuples as lists
+        return cls(**{k: tuple(v) if isinstance(v, list) else v for k, v in fields.items()})
+
+
+class SnapshotPool:
+    """
+    Disk-backed store of the snapshots generated during an FFS run.
+
+    Only the snapshot fields needed to restore a simulation are written, each snapshot
+    to its own compressed file, and snapshots are only loaded when requested. Snapshots
+    are referred to by the keys returned by `add`, so they can be replicated (e.g. to
+    replenish the configurations of a window) without duplicating their data.
+
+    Parameters
+    ----------
+    directory: Optional[str]
+        Where to store the snapshots. By default, a temporary directory is created and
+        removed once the pool is garbage collected.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self._tmpdir = None
+        if directory is None:
+            self._tmpdir = tempfile.mkdtemp(prefix="pysages-ffs-")
+            directory = self._tmpdir
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+
+    def __getstate__(self):
+        # Copies sent to other processes do not own the storage
+        return {"_tmpdir": None, "directory": self.directory}
+
+    def __del__(self):
+        if getattr(self, "_tmpdir", None) is not None:
+            shutil.rmtree(self._tmpdir, ignore_errors=True)
+
+    def __contains__(self, key):
+        return os.path.exists(self._path(key))
+
+    def __getitem__(self, key) -> Snapshot:
+        with numpy.load(self._path(key)) as data:
+            fields = {k: np.asarray(data[k]) for k in data.files}
+        if "vel_mass" in fields:
+            vel_mass = fields["vel_mass"]
+        else:
+            vel_mass = (fields["vel"], fields["mass"])
+        images = fields.get("images", None)
+        box = Box(fields["H"], fields["origin"])
+        return Snapshot(
+            fields["positions"],
+            vel_mass,
+            fields["forces"],
+            fields["ids"],
+            images,
+            box,
+            fields["dt"],
+        )
+
+    def add(self, snapshot: Snapshot) -> str:
+        """
+        Stores `snapshot` and returns the key to retrieve it.
+        """
+        key = uuid4().hex
+        fields = dict(
+            positions=snapshot.positions,
+            forces=snapshot.forces,
+            ids=snapshot.ids,
+            H=snapshot.box.H,
+            origin=snapshot.box.origin,
+            dt=snapshot.dt,
+        )
+        if isinstance(snapshot.vel_mass, tuple):
+            fields["vel"], fields["mass"] = snapshot.vel_mass
+        else:
+            fields["vel_mass"] = snapshot.vel_mass
+        if snapshot.images is not None:
+            fields["images"] = snapshot.images
+        # Write to a temporary file first, so that no partially written snapshots
+        # are left behind if the run is interrupted
+        tmp_path = os.path.join(self.directory, key + ".tmp.npz")
+        numpy.savez_compressed(tmp_path, **{k: numpy.asarray(v) for k, v in fields.items()})
+        os.replace(tmp_path, self._path(key))
+        return key
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".npz")
+
+
 class FFS(SamplingMethod):
     """
     Constructor of the Forward Flux Sampling method.
@@ -76,6 +275,13 @@ def run(
     verbose: bool = False,
     callback: Optional[Callable] = None,
     context_args: dict = {},
+    chunk_size: int = 10,
+    trial_batches: int = 1,
+    snapshot_pool: Optional[SnapshotPool] = None,
+    checkpoint_dir: Optional[str] = None,
+    results_file: str = "ffs_results.dat",
+    executor=SerialExecutor(),
+    executor_shutdown: bool = True,
     **kwargs,
 ):
     # """
@@ -124,17 +330,80 @@ def run(
     # context_args: dict = {}
     #     Arguments to pass down to `context_generator` to setup the simulation context.
 
+    # chunk_size: int = 10
+    #     Number of time steps trials are advanced between checks of their outcome.
+    #     Interface crossings are detected (and the crossing configurations stored)
+    #     within the method's update, so this only affects how often the host
+    #     synchronizes with the simulation.
+
+    # trial_batches: int = 1
+    #     Number of batches in which the trials of each stage are split. When larger
+    #     than one, each batch is run on its own simulation context (created with
+    #     `context_generator`) and submitted to `executor`.
+
+    # snapshot_pool: Optional[SnapshotPool] = None
+    #     Store for the basin and interface configurations. By default, they are kept
+    #     in a temporary directory (or within `checkpoint_dir` if given). When running
+    #     trial batches on several machines, the pool directory must be on a shared
+    #     file system.
+
+    # checkpoint_dir: Optional[str] = None
+    #     Directory where the progress (see `FFSProgress`) is saved after each
+    #     completed stage. If it already holds the progress of a run with the same
+    #     interfaces, the run resumes after the last completed stage.
+
+    # results_file: str = "ffs_results.dat"
+    #     File to which the results of each completed stage are appended. As in
+    #     previous versions, one value is written per line (the flux, followed by the
+    #     probability of each window and the rate constant), unless the file name ends
+    #     with `.jsonl`, in which case a JSON record is written per stage instead.
+
+    # executor: Executor = SerialExecutor()
+    #     Task manager used to run the trial batches, e.g. a process pool.
+
+    # executor_shutdown: bool = True
+    #     Whether to shutdown `executor` once all stages are completed.
+
     # NOTE:
-    #     The current implementation runs a single simulation/replica,
-    #     but multiple concurrent simulations can be scripted on top of this.
+    #     Basin sampling is carried out on a single simulation.
     # """
+    trial_context_args = dict(context_args)
     sampling_context = SamplingContext(method, context_generator, callback, context_args)
     context_args["context"] = sampling_context.context
-
-    with sampling_context:
+    if snapshot_pool is None and checkpoint_dir is not None:
+        snapshot_pool = SnapshotPool(os.path.join(checkpoint_dir, "snapshots"))
+    pool = SnapshotPool() if snapshot_pool is None else snapshot_pool
+
+    def trials(snapshots, bounds):
+        if trial_batches == 1:
+            return run_trials(sampling_context, pool, snapshots, bounds, chunk_size)
+        futures = [
+            executor.submit(
+                _run_trials_batch,
+                method,
+                context_generator,
+                trial_context_args,
+                pool,
+                batch,
+                bounds,
+                chunk_size,
+            )
+            for batch in _split(snapshots, trial_batches)
+        ]
+        return [result for future in futures for result in future.result()]
+
+    windows = np.linspace(win_i, win_l, num=Nw)
+    progress = _load_progress(checkpoint_dir, windows)
+
+    def checkpoint(**kwargs):
+        nonlocal progress
+        progress = progress._replace(**kwargs)
+        if checkpoint_dir is not None:
+            progress.save(os.path.join(checkpoint_dir, "progress.json"))
+
+    with sampling_context, open(results_file, "a") as results:
         sampler = sampling_context.sampler
         xi = sampler.state.xi.block_until_ready()
-        windows = np.linspace(win_i, win_l, num=Nw)
 
         is_configuration_good = check_input(windows, xi, verbose=verbose)
         if not is_configuration_good:
@@ -147,40 +416,47 @@ def run(
         reference_snapshot = sampler.take_snapshot()
 
         # We Initially sample from basin A
-        # TODO: bundle the arguments into data structures
-        ini_snapshots = basin_sampling(
-            Nmax_replicas,
-            sampling_steps_basin,
-            windows,
-            run,
-            sampler,
-            reference_snapshot,
-            helpers,
-            cv,
-        )
+        if len(progress.basin) < Nmax_replicas:
+            # TODO: bundle the arguments into data structures
+            ini_snapshots = basin_sampling(
+                Nmax_replicas,
+                sampling_steps_basin,
+                windows,
+                run,
+                sampler,
+                reference_snapshot,
+                helpers,
+                cv,
+                pool,
+            )
+            checkpoint(basin=tuple(ini_snapshots))
 
         # Calculate initial flow
-        phi_a, snaps_0 = initial_flow(
-            Nmax_replicas, dt, windows, ini_snapshots, run, sampler, helpers, cv
-        )
-
-        write_to_file(phi_a)
-        hist = np.zeros(len(windows))
-        hist = hist.at[0].set(phi_a)
+        if progress.flux is None:
+            phi_a, snaps_0 = initial_flow(Nmax_replicas, dt, windows, progress.basin, trials)
+            snaps_0 = tuple(snaps_0)
+            checkpoint(flux=phi_a, initial_snapshots=snaps_0, snapshots=snaps_0)
+            write_record(results, window=0, interface=float(windows[0]), flux=phi_a)
 
         # Calculate conditional probability for each window
-        for k in range(1, len(windows)):
-            if k == 1:
-                old_snaps = snaps_0
-            prob, w1_snapshots = running_window(windows, k, old_snaps, run, sampler, helpers, cv)
-            write_to_file(prob)
-            hist = hist.at[k].set(prob)
-            old_snaps = increase_snaps(w1_snapshots, snaps_0)
+        for k in range(len(progress.probabilities) + 1, len(windows)):
+            prob, w1_snapshots = running_window(windows, k, progress.snapshots, trials)
+            write_record(results, window=k, interface=float(windows[k]), probability=prob)
+            if prob == 0:
+                warn(f"Unable to estimate probability, exiting early at window {k}\n")
+                break
+            old_snaps = increase_snaps(w1_snapshots, progress.initial_snapshots)
+            checkpoint(probabilities=(*progress.probabilities, prob), snapshots=tuple(old_snaps))
             print(f"size of snapshots: {len(old_snaps)}\n")
+        else:
+            # Runs resumed after all interfaces were completed already recorded the rate
+            if progress.rate is None:
+                K_t = progress.flux * float(numpy.prod(progress.probabilities))
+                checkpoint(rate=K_t)
+                write_record(results, rate=K_t)
 
-        K_t = np.prod(hist)
-        write_to_file("# Flux Constant")
-        write_to_file(K_t)
+    if executor_shutdown:
+        executor.shutdown()
 
     return sampling_context.sampler.state
 
@@ -211,23 +487,140 @@ def _ffs(method, snapshot, helpers):
     # initialize method
     def initialize():
         xi = cv(helpers.query(snapshot))
-        return FFSState(xi, None, 0)
+        bounds = np.array([-np.inf, np.inf, np.inf])
+        crossing = tree_util.tree_map(np.array, _crossing_fields(snapshot))
+        return FFSState(xi, None, bounds, np.int32(0), np.int32(0), crossing, 0)
 
-    def update(state, data):
-        xi = cv(data)
-        return FFSState(xi, None, state.ncalls + 1)
+    # Unlike other methods, the update takes the whole snapshot (not only the data
+    # queried by the helpers), so that it can store the configuration of each crossing
+    def update(snapshot, state):
+        xi = cv(helpers.query(snapshot))
+        ncalls = state.ncalls + 1
+        is_running = state.status == 0
+        status = np.where(is_running, trial_status(xi, state.bounds), state.status)
+        has_ended = is_running & (status != 0)
+        crossing_ncalls = np.where(has_ended, ncalls, state.crossing_ncalls)
+        # Only copy the configuration on the step in which the trial ends
+        crossing = cond(
+            has_ended, lambda: _crossing_fields(snapshot), lambda: tuple(state.crossing)
+        )
+        return FFSState(xi, None, state.bounds, status, crossing_ncalls, crossing, ncalls)
+
+    return snapshot, initialize, jit(update)
 
-    return snapshot, initialize, generalize(update, helpers)
 
+def trial_status(xi, bounds):
+    """
+    Returns `1` if `xi` lies within the target interfaces, `-1` if it lies below the
+    lower interface, and `0` otherwise (see `FFSState` for the definition of `bounds`).
+    """
+    lower, target, upper = bounds
+    has_succeeded = np.all(xi >= target) & np.all(xi < upper)
+    has_failed = np.all(xi < lower)
+    return np.where(has_succeeded, 1, np.where(has_failed, -1, 0)).astype(np.int32)
 
-def write_to_file(value):
-    with open("ffs_results.dat", "a+") as f:
-        f.write(str(value) + "\n")
+
+def run_trials(sampling_context, pool, snapshots, bounds, chunk_size):
+    """
+    Runs a trial from each of the given `snapshots` (keys of `pool`) until it either
+    crosses the target interface or falls back into the initial basin. Trials are
+    advanced `chunk_size` time steps at a time, and the host only synchronizes with
+    the simulation after each chunk.
+
+    Returns
+    -------
+    List of `TrialResult`, one per snapshot. The crossing configurations are stored
+    in `pool`.
+    """
+    sampler = sampling_context.sampler
+    run = sampling_context.run
+    bounds = np.asarray(bounds, dtype=sampler.state.bounds.dtype)
+    results = []
+
+    for key in snapshots:
+        sampler.restore(pool[key])
+        sampler.state = sampler.state._replace(bounds=bounds, status=np.int32(0))
+        status, steps = 0, 0
+        ncalls = int(sampler.state.ncalls)
+
+        while status == 0:
+            run(chunk_size)
+            state = sampler.state
+            status = int(state.status)
+            new_ncalls = int(state.ncalls)
+            if status == 0:
+                steps += chunk_size
+            else:
+                # The update may be called more than once per time step on some
+                # backends, so we estimate the crossing step within the last chunk
+                fraction = (int(state.crossing_ncalls) - ncalls) / max(new_ncalls - ncalls, 1)
+                steps += max(ceil(chunk_size * fraction), 1)
+            ncalls = new_ncalls
+
+        crossing_key = pool.add(_crossing_snapshot(sampler)) if status == 1 else None
+        results.append(TrialResult(status, steps, crossing_key))
+
+    return results
+
+
+def _run_trials_batch(method, context_generator, context_args, pool, snapshots, bounds, chunk_size):
+    sampling_context = SamplingContext(method, context_generator, None, context_args)
+    with sampling_context:
+        return run_trials(sampling_context, pool, snapshots, bounds, chunk_size)
+
+
+def _crossing_fields(snapshot):
+    return (snapshot.positions, snapshot.vel_mass, snapshot.forces, snapshot.ids, snapshot.images)
+
+
+def _crossing_snapshot(sampler):
+    positions, vel_mass, forces, ids, images = sampler.state.crossing
+    snapshot = sampler.take_snapshot()
+    return snapshot._replace(
+        positions=positions, vel_mass=vel_mass, forces=forces, ids=ids, images=images
+    )
+
+
+def _split(items, n):
+    size = max(ceil(len(items) / n), 1)
+    return [items[i : i + size] for i in range(0, len(items), size)]  # noqa: E203
+
+
+def write_record(results, **record):
+    """
+    Appends `record` to the open `results` file, as a line of JSON if the file name
+    ends with `.jsonl`, or otherwise as a plain text line with its value (the flux,
+    probability or rate), with the rate preceded by a `# Flux Constant` line.
+    """
+    if results.name.endswith(".jsonl"):
+        results.write(json.dumps(record) + "\n")
+    else:
+        if "rate" in record:
+            results.write("# Flux Constant\n")
+        value = next(record[k] for k in ("flux", "probability", "rate") if k in record)
+        results.write(str(value) + "\n")
+    results.flush()
+
+
+def _load_progress(checkpoint_dir, windows):
+    windows = tuple(float(w) for w in windows)
+    if checkpoint_dir is None:
+        return FFSProgress(windows)
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    path = os.path.join(checkpoint_dir, "progress.json")
+    if not os.path.exists(path):
+        return FFSProgress(windows)
+    progress = FFSProgress.load(path)
+    if not numpy.allclose(progress.windows, windows):
+        raise ValueError(f"The checkpoint at {checkpoint_dir} has different interfaces")
+    print(f"Resuming FFS run after {len(progress.probabilities)} completed windows\n")
+    return progress
 
 
 # Since snapshots are depleted each window, this function restores the list to
 # its initial values. This only works with stochastic integrators like BD or
-# Langevin, for other, velocity resampling is needed
+# Langevin, for other, velocity resampling is needed. Only the snapshot keys are
+# replicated, their data is shared through the `SnapshotPool`.
 def increase_snaps(windows, initial_w):
     if len(windows) > 0:
         ratio = len(initial_w) // len(windows)
@@ -252,10 +645,11 @@ def check_input(grid, xi, verbose=False):
 
 
 def basin_sampling(
-    max_num_snapshots, sampling_time, grid, run, sampler, reference_snapshot, helpers, cv
+    max_num_snapshots, sampling_time, grid, run, sampler, reference_snapshot, helpers, cv, pool
 ):
     """
     Sampling of basing configurations for initial flux calculations.
+    Returns the keys of the configurations stored in `pool`.
     """
     basin_snapshots = []
     win_A = grid[0]
@@ -267,8 +661,7 @@ def basin_sampling(
         xi = sampler.state.xi.block_until_ready()
 
         if np.all(xi < win_A):
-            snap = sampler.take_snapshot()
-            basin_snapshots.append(snap)
+            basin_snapshots.append(pool.add(sampler.take_snapshot()))
             print("Storing basing configuration with cv value:\n")
             print(xi)
         else:
@@ -282,39 +675,17 @@ def basin_sampling(
     return basin_snapshots
 
 
-def initial_flow(Num_window0, timestep, grid, initial_snapshots, run, sampler, helpers, cv):
+def initial_flow(Num_window0, timestep, grid, initial_snapshots, trials):
     """
     Selects snapshots from list generated with `basin_sampling`.
     """
+    print(f"Running initial flow trials from {Num_window0} stored configurations\n")
+    bounds = [-np.inf, grid[0], grid[1]]
+    results = trials(initial_snapshots[:Num_window0], bounds)
 
-    success = 0
-    time_count = 0.0
-    window0_snaps = []
-    win_A = grid[0]
-
-    for i in range(0, Num_window0):
-        print(f"Initial stored configuration: {i}\n")
-        snap = initial_snapshots[i]
-        sampler.restore(snap)
-        xi = cv(helpers.query(snap))
-        print(xi)
-
-        has_reached_A = False
-        while not has_reached_A:
-            # TODO: make the number of timesteps below a parameter of the method.
-            run(1)
-            time_count += timestep
-            xi = sampler.state.xi.block_until_ready()
-
-            if np.all(xi >= win_A) and np.all(xi < grid[1]):
-                success += 1
-                has_reached_A = True
-
-                if len(window0_snaps) <= Num_window0:
-                    snap = sampler.take_snapshot()
-                    window0_snaps.append(snap)
-
-                break
+    success = sum(r.status == 1 for r in results)
+    time_count = timestep * sum(r.steps for r in results)
+    window0_snaps = [r.snapshot for r in results if r.status == 1]
 
     print(f"Finish Initial Flow with {success} succeses over {time_count} time\n")
     phi_a = float(success) / (time_count)
@@ -322,42 +693,12 @@ def initial_flow(Num_window0, timestep, grid, initial_snapshots, run, sampler, h
     return phi_a, window0_snaps
 
 
-def running_window(grid, step, old_snapshots, run, sampler, helpers, cv):
-    success = 0
-    new_snapshots = []
-    win_A = grid[0]
-    win_value = grid[int(step)]
-    has_conf_stored = False
-
-    for i in range(0, len(old_snapshots)):
-        snap = old_snapshots[i]
-        sampler.restore(snap)
-        xi = cv(helpers.query(snap))
-        print(f"Stored configuration: {i} of window: {step}\n")
-        print(xi)
-
-        # limit running time to avoid zombie trajectories
-        # this can be probably be improved
-        running = True
-        while running:
-            run(1)
-            xi = sampler.state.xi.block_until_ready()
-
-            if np.all(xi < win_A):
-                running = False
-            elif np.all(xi >= win_value):
-                snap = sampler.take_snapshot()
-                new_snapshots.append(snap)
-                success += 1
-                running = False
-                if not has_conf_stored:
-                    has_conf_stored = True
-
-    if success == 0:
-        warn(f"Unable to estimate probability, exiting early at window {step}\n")
-        sys.exit(0)
-
-    if len(new_snapshots) > 0:
-        prob_local = float(success) / len(old_snapshots)
-        print(f"Finish window {step} with {len(new_snapshots)} snapshots\n")
-        return prob_local, new_snapshots
+def running_window(grid, step, old_snapshots, trials):
+    print(f"Running {len(old_snapshots)} trials for window: {step}\n")
+    bounds = [grid[0], grid[int(step)], np.inf]
+    results = trials(old_snapshots, bounds)
+    new_snapshots = [r.snapshot for r in results if r.status == 1]
+    success = len(new_snapshots)
+    prob_local = float(success) / len(old_snapshots) if len(old_snapshots) > 0 else 0.0
+    print(f"Finish window {step} with {len(new_snapshots)} snapshots\n")
+    return prob_local, new_snapshots
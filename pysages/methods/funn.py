@@ -308,6 +308,11 @@ def analyze(result: Result[FUNN], **kwargs):
         Defines the architecture of the neural network
         (number of nodes in each hidden layer).
 
+    strategy: Optional[AnalysisStrategy] = GradientLearning()
+        How to integrate the mean forces. `PoissonIntegration()` solves for the
+        free energy directly on the grid, which is much faster than training a
+        neural network (`topology` is ignored in that case).
+
     Returns
     -------
 
@@ -338,6 +343,7 @@ def analyze(result: Result[FUNN], **kwargs):
     for each attribute.
     """
     topology = kwargs.get("topology", result.method.topology)
-    _result = _analyze(result, GradientLearning(), topology)
+    strategy = kwargs.get("strategy", GradientLearning())
+    _result = _analyze(result, strategy, topology)
     _result["nn"] = first_or_all([state.nn for state in result.states])
     return numpyfy_vals(_result)
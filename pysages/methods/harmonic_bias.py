@@ -12,13 +12,21 @@ The Hamiltonian is amended with a term
 :math:`\\mathcal{H} = \\mathcal{H}_0 + \\mathcal{H}_\\mathrm{HB}(\\xi)` where
 :math:`\\mathcal{H}_\\mathrm{HB}(\\xi) = \\boldsymbol{K}/2 (\\xi_0 - \\xi)^2`
 biases the simulations around the collective variable :math:`\\xi_0`.
+
+The center and spring constant are carried in the method's state, rather than being
+compiled into the update function, so that the same compiled update is reused when
+they change between runs within a simulation context (e.g. for different umbrella
+windows or string iterations).
 """
 
+from functools import lru_cache
+
 from jax import numpy as np
 
 from pysages.methods.bias import Bias
 from pysages.methods.core import generalize
 from pysages.typing import JaxArray, NamedTuple
+from pysages.utils import dispatch
 
 
 class HarmonicBiasState(NamedTuple):
@@ -30,10 +38,21 @@ class HarmonicBiasState(NamedTuple):
 
     bias: JaxArray
         Array with harmonic biasing forces for each particle in the simulation.
+
+    center: JaxArray
+        Center of the harmonic biasing potential.
+
+    kspring: JaxArray
+        Spring constant matrix of the harmonic biasing potential.
+
+    ncalls: int
+        Counts the number of times the method's update has been called.
     """
 
     xi: JaxArray
     bias: JaxArray
+    center: JaxArray
+    kspring: JaxArray
     ncalls: int
 
     def __repr__(self):
@@ -119,14 +138,27 @@ def _harmonic_bias(method, snapshot, helpers):
     def initialize():
         xi, _ = cv(helpers.query(snapshot))
         bias = np.zeros((natoms, helpers.dimensionality()))
-        return HarmonicBiasState(xi, bias, 0)
+        return HarmonicBiasState(xi, bias, center, kspring, 0)
+
+    return snapshot, initialize, _harmonic_bias_update(cv, helpers)
+
+
+@dispatch
+def restore_state(method: HarmonicBias, state):
+    return state._replace(center=method.center, kspring=method.kspring)
+
 
+@lru_cache
+def _harmonic_bias_update(cv, helpers):
+    # The update only depends on the (memoized) collective variables and the backend
+    # helpers (which are shared across simulation contexts), so that all windows of an
+    # umbrella or string run share its compiled version.
     def update(state, data):
         xi, Jxi = cv(data)
-        forces = kspring @ (xi - center).flatten()
+        forces = state.kspring @ (xi - state.center).flatten()
         bias = -Jxi.T @ forces.flatten()
         bias = bias.reshape(state.bias.shape)
 
-        return HarmonicBiasState(xi, bias, state.ncalls + 1)
+        return state._replace(xi=xi, bias=bias, ncalls=state.ncalls + 1)
 
-    return snapshot, initialize, generalize(update, helpers)
+    return generalize(update, helpers)
@@ -6,14 +6,19 @@ Implementation of Standard and Well-tempered Metadynamics
 both with optional support for grids.
 """
 
+from functools import partial
+
+import numpy
 from jax import grad, jit
 from jax import numpy as np
 from jax import value_and_grad, vmap
 from jax.lax import cond
+from jax.lax import map as lax_map
+from jax.lax import scan
 
 from pysages.approxfun import compute_mesh
 from pysages.colvars import get_periods, wrap
-from pysages.grids import build_indexer
+from pysages.grids import build_indexer, get_info
 from pysages.methods.core import GriddedSamplingMethod, Result, generalize
 from pysages.methods.restraints import apply_restraints
 from pysages.methods.utils import numpyfy_vals
@@ -44,7 +49,8 @@ class MetadynamicsState(NamedTuple):
         Widths of the accumulated Gaussians.
 
     grid_potential: Optional[JaxArray]
-        Array of Metadynamics bias potentials stored on a grid.
+        Array of Metadynamics bias potentials stored on a grid (it is used to compute
+        the heights of well-tempered Gaussians, and for reweighting).
 
     grid_gradient: Optional[JaxArray]
         Array of Metadynamics bias gradients evaluated on a grid.
@@ -177,7 +183,7 @@ def _metadynamics(method, snapshot, helpers):
             grid_potential = grid_gradient = None
         else:
             shape = method.grid.shape
-            grid_potential = np.zeros((*shape,), dtype=np.float64) if method.deltaT else None
+            grid_potential = np.zeros((*shape,), dtype=np.float64)
             grid_gradient = np.zeros((*shape, shape.size), dtype=np.float64)
 
         return MetadynamicsState(
@@ -235,25 +241,18 @@ def build_gaussian_accumulator(method: Metadynamics):
     else:
         grid_mesh = (compute_mesh(grid) + 1) * (grid.size / 2) + grid.lower
         get_grid_index = build_indexer(grid)
-        # Reshape so the dimensions are compatible
-        accum = jit(lambda total, val: total + val.reshape(total.shape))
-
-        if deltaT is None:
-            transform = grad
-            pack = jit(lambda x: (x,))
-            # No need to accumulate values for the potential (V is None)
-            update = jit(lambda V, dV, vals: (V, accum(dV, vals)))
-        else:
-            transform = value_and_grad
-            pack = identity
-            update = jit(lambda V, dV, vals, grads: (accum(V, vals), accum(dV, grads)))
+
+        def accum(total, val):
+            # Reshape so the dimensions are compatible. States from earlier versions
+            # of standard metadynamics did not store the potential (`total is None`).
+            return None if total is None else total + val.reshape(total.shape)
 
         def update_grids(pstate, height, xi, sigma):
             # We use `sum_of_gaussians` since it already takes care of the wrapping
             current_gaussian = jit(lambda x: sum_of_gaussians(x, height, xi, sigma, periods))
-            # Evaluate gradient of bias (and bias potential for WT version)
-            grid_values = pack(vmap(transform(current_gaussian))(grid_mesh))
-            return update(pstate.grid_potential, pstate.grid_gradient, *grid_values)
+            # Evaluate the bias potential (also used for reweighting) and its gradient
+            V, dV = vmap(value_and_grad(current_gaussian))(grid_mesh)
+            return accum(pstate.grid_potential, V), accum(pstate.grid_gradient, dV)
 
         def should_deposit(in_deposition_step, I_xi):
             in_bounds = ~(np.any(np.array(I_xi) == grid.shape))
@@ -323,8 +322,122 @@ def sum_of_gaussians(xi, heights, centers, sigmas, periods):
     return gaussian(heights, sigmas, delta_x).sum()
 
 
+class Metapotential:
+    """
+    Bias potential deposited during a `Metadynamics` run.
+
+    Calling it on an array of CV values evaluates the sum of Gaussians in chunks of at
+    most `chunk_size` points and `hills_chunk_size` Gaussians, so that the memory used
+    does not grow with the number of points or deposited Gaussians. Slots for Gaussians
+    that were never deposited (those with zero height) are skipped.
+
+    Parameters
+    ----------
+
+    heights: JaxArray
+        Heights of the Gaussians.
+
+    centers: JaxArray
+        Centers of the Gaussians.
+
+    sigmas: JaxArray
+        Widths of the Gaussians (either one row for all of them, or one per Gaussian).
+
+    periods: JaxArray
+        Period of each CV (`inf` for non-periodic ones).
+
+    chunk_size: int = 1024
+        Maximum number of points evaluated at once.
+
+    hills_chunk_size: int = 1024
+        Maximum number of Gaussians summed at once.
+    """
+
+    def __init__(self, heights, centers, sigmas, periods, chunk_size=1024, hills_chunk_size=1024):
+        heights = numpy.asarray(heights)
+        centers = numpy.asarray(centers).reshape(heights.size, -1)
+        sigmas = numpy.broadcast_to(numpy.asarray(sigmas), centers.shape)
+        deposited = numpy.flatnonzero(heights)
+
+        # Pad the deposited Gaussians with zero-height ones to fill the last chunk
+        n = max(deposited.size, 1)
+        m = min(hills_chunk_size, n)
+        k = -(-n // m)
+        padding = k * m - deposited.size
+        d = centers.shape[1]
+
+        def pack(x, fill):
+            x = numpy.concatenate((x[deposited], numpy.full((padding, *x.shape[1:]), fill)))
+            return np.asarray(x.reshape(k, m, *x.shape[1:]))
+
+        self.hills = (pack(heights, 0.0), pack(centers, 0.0), pack(sigmas, 1.0))
+        self.periods = np.asarray(periods).reshape(d)
+        self.chunk_size = chunk_size
+        self._projections = {}
+
+    def __call__(self, xs):
+        return _evaluate_metapotential(np.asarray(xs), self.hills, self.periods, self.chunk_size)
+
+    def project(self, grid):
+        """
+        Returns the bias potential evaluated at the centers of the bins of `grid` (with
+        the same layout as the histograms of gridded methods). Since the Gaussians are
+        separable, this only requires a one-dimensional evaluation along each axis of
+        the grid. Results are cached, so repeated calls for the same grid are free.
+        """
+        key = get_info(grid)
+        if key not in self._projections:
+            mesh = (compute_mesh(grid) + 1) * (grid.size / 2) + grid.lower
+            mesh = mesh.reshape(*(int(n) for n in grid.shape), -1)
+            axes = tuple(
+                np.moveaxis(mesh[..., i], i, 0).reshape(mesh.shape[i], -1)[:, 0]
+                for i in range(mesh.shape[-1])
+            )
+            self._projections[key] = _project_metapotential(axes, self.hills, self.periods)
+        return self._projections[key]
+
+
+@partial(jit, static_argnames="chunk_size")
+def _evaluate_metapotential(xs, hills, periods, chunk_size):
+    n = xs.shape[0]
+    c = max(min(chunk_size, n), 1)
+    padding = -n % c
+    x = xs.reshape(n, -1)
+    x = np.concatenate((x, np.zeros((padding, x.shape[1]), dtype=x.dtype)))
+
+    def evaluate_chunk(x):
+        def accumulate(V, hills_chunk):
+            heights, centers, sigmas = hills_chunk
+            delta_x = wrap(x[:, None] - centers, periods)
+            return V + np.exp(-np.sum((delta_x / sigmas) ** 2, axis=-1) / 2) @ heights, None
+
+        V, _ = scan(accumulate, np.zeros(x.shape[0], dtype=hills[0].dtype), hills)
+        return V
+
+    return lax_map(evaluate_chunk, x.reshape(-1, c, x.shape[1])).reshape(-1)[:n]
+
+
+@jit
+def _project_metapotential(axes, hills, periods):
+    d = len(axes)
+    letters = "abcdefghijklmnopqrstuvwxy"[:d]
+    subscripts = ",".join(f"{a}z" for a in letters) + ",z->" + letters
+
+    def accumulate(V, hills_chunk):
+        heights, centers, sigmas = hills_chunk
+        factors = (
+            np.exp(-(((wrap(x[:, None] - centers[:, i], periods[i]) / sigmas[:, i]) ** 2) / 2))
+            for i, x in enumerate(axes)
+        )
+        return V + np.einsum(subscripts, *factors, heights), None
+
+    shape = tuple(x.size for x in axes)
+    V, _ = scan(accumulate, np.zeros(shape, dtype=hills[0].dtype), hills)
+    return V
+
+
 @dispatch
-def analyze(result: Result[Metadynamics]):
+def analyze(result: Result[Metadynamics], **kwargs):
     """
     Helper for calculating the free energy from the final state of a `Metadynamics` run.
 
@@ -334,6 +447,12 @@ def analyze(result: Result[Metadynamics]):
     result: Result[Metadynamics]:
         Result bundle containing method, final metadynamics state, and callback.
 
+    chunk_size: Optional[int] = 1024
+        Maximum number of points at which the metapotential is evaluated at once.
+
+    hills_chunk_size: Optional[int] = 1024
+        Maximum number of Gaussians summed at once when evaluating the metapotential.
+
     Returns
     -------
 
@@ -343,7 +462,7 @@ def analyze(result: Result[Metadynamics]):
         heights: JaxArray
             Height of the Gaussian bias potential during the simulation.
 
-        metapotential: Callable
+        metapotential: Metapotential
             Maps a user-provided array of CV values to the corresponding deposited bias
             potential. For standard metadynamics, the free energy along user-provided CV
             range is the same as `metapotential(cv)`.
@@ -351,27 +470,30 @@ def analyze(result: Result[Metadynamics]):
             `(T + deltaT) / deltaT * metapotential(cv)`, where `T` is the simulation
             temperature and `deltaT` is the user-defined parameter in
             well-tempered metadynamics.
+            The values over the centers of the bins of a grid can be obtained (and
+            are cached) with `metapotential.project(grid)`.
     """
     method = result.method
     states = result.states
 
     P = get_periods(method.cvs)
+    chunk_sizes = {
+        "chunk_size": kwargs.get("chunk_size", 1024),
+        "hills_chunk_size": kwargs.get("hills_chunk_size", 1024),
+    }
+
+    def build_metapotential(heights, centers, sigmas):
+        return Metapotential(heights, centers, sigmas, P, **chunk_sizes)
 
     if len(states) == 1:
         heights = states[0].heights
-        centers = states[0].centers
-        sigmas = states[0].sigmas
-
-        metapotential = jit(vmap(lambda x: sum_of_gaussians(x, heights, centers, sigmas, P)))
+        metapotential = build_metapotential(heights, states[0].centers, states[0].sigmas)
 
         return dict(heights=heights, metapotential=metapotential)
 
     # For multiple-replicas runs we return a list heights and functions
     # (one for each replica)
 
-    def build_metapotential(heights, centers, sigmas):
-        return jit(vmap(lambda x: sum_of_gaussians(x, heights, centers, sigmas, P)))
-
     heights = []
     metapotentials = []
 
@@ -19,17 +19,19 @@ from jax.lax import cond
 
 from pysages.approxfun import (
     Fun,
+    GradientFitState,
     SpectralGradientFit,
     build_evaluator,
     build_fitter,
     build_grad_evaluator,
+    build_incremental_fitter,
     compute_mesh,
 )
 from pysages.grids import Chebyshev, Grid, build_indexer, convert, grid_transposer
 from pysages.methods.core import GriddedSamplingMethod, Result, generalize
 from pysages.methods.restraints import apply_restraints
 from pysages.methods.utils import numpyfy_vals
-from pysages.typing import JaxArray, NamedTuple, Tuple
+from pysages.typing import JaxArray, NamedTuple, Optional, Tuple
 from pysages.utils import dispatch, first_or_all, linear_solver
 
 
@@ -68,6 +70,10 @@ class SpectralABFState(NamedTuple):
 
     ncalls: int
         Counts the number of times the method's update has been called.
+
+    fit_state: Optional[GradientFitState]
+        Running state of the least-squares fit, used to update `fun` incrementally
+        (`None` for states stored before incremental fits were introduced).
     """
 
     xi: JaxArray
@@ -79,6 +85,7 @@ class SpectralABFState(NamedTuple):
     Wp_: JaxArray
     fun: Fun
     ncalls: int
+    fit_state: Optional[GradientFitState] = None
 
     def __repr__(self):
         return repr("PySAGES " + type(self).__name__)
@@ -117,9 +124,22 @@ class SpectralABF(GriddedSamplingMethod):
     fit_freq: Optional[int] = 100
         Fitting frequency.
 
+    full_fit_freq: Optional[int] = 10
+        Number of fits between full least-squares fits. The fits in between only
+        update the coefficients from the bins visited since the previous fit, so their
+        cost does not grow with the number of bins. Set it to `1` to always perform
+        full fits.
+
     fit_threshold: Optional[int] = 500
         Number of time steps after which fitting starts to take place.
 
+    index_set: Optional[str] = "euclidean"
+        Multi-indices of the basis functions of the fit, either `"euclidean"`,
+        `"total_degree"` or `"hyperbolic_cross"` (see
+        `pysages.approxfun.collect_exponents`). Each of these is contained in the
+        previous one, and the latter two yield much smaller bases for more than two
+        collective variables.
+
     restraints: Optional[CVRestraints] = None
         If provided, indicate that harmonic restraints will be applied when any
         collective variable lies outside the box from `restraints.lower` to
@@ -138,8 +158,10 @@ class SpectralABF(GriddedSamplingMethod):
         self.N = np.asarray(self.kwargs.get("N", 500))
         self.fit_freq = self.kwargs.get("fit_freq", 100)
         self.fit_threshold = self.kwargs.get("fit_threshold", 500)
+        self.full_fit_freq = self.kwargs.get("full_fit_freq", 10)
         self.grid = self.grid if self.grid.is_periodic else convert(self.grid, Grid[Chebyshev])
-        self.model = SpectralGradientFit(self.grid)
+        self.index_set = self.kwargs.get("index_set", "euclidean")
+        self.model = SpectralGradientFit(self.grid, self.index_set)
         self.use_pinv = self.kwargs.get("use_pinv", False)
 
     def build(self, snapshot, helpers, *_args, **_kwargs):
@@ -163,7 +185,10 @@ def _spectral_abf(method, snapshot, helpers):
     tsolve = linear_solver(method.use_pinv)
     get_grid_index = build_indexer(grid)
     fit = build_fitter(method.model)
-    fit_forces = build_free_energy_fitter(method, fit)
+    init_fit, incremental_fit = build_incremental_fitter(
+        method.model, fit_freq, method.full_fit_freq
+    )
+    fit_forces = build_free_energy_fitter(method, incremental_fit)
     estimate_force = build_force_estimator(method)
 
     def initialize():
@@ -175,15 +200,18 @@ def _spectral_abf(method, snapshot, helpers):
         Wp = np.zeros(dims)
         Wp_ = np.zeros(dims)
         fun = fit(Fsum)
-        return SpectralABFState(xi, bias, hist, Fsum, force, Wp, Wp_, fun, 0)
+        fit_state = init_fit(Fsum)
+        return SpectralABFState(xi, bias, hist, Fsum, force, Wp, Wp_, fun, 0, fit_state)
 
     def update(state, data):
         # During the intial stage use ABF
         ncalls = state.ncalls + 1
         in_fitting_regime = ncalls > fit_threshold
         in_fitting_step = in_fitting_regime & (ncalls % fit_freq == 1)
+        if state.fit_state is None:
+            state = state._replace(fit_state=init_fit(_average_forces(state)))
         # Fit forces
-        fun = fit_forces(state, in_fitting_step)
+        fit_state, fun = fit_forces(state, in_fitting_step)
         # Compute the collective variable and its jacobian
         xi, Jxi = cv(data)
         #
@@ -201,7 +229,7 @@ def _spectral_abf(method, snapshot, helpers):
         )
         bias = np.reshape(-Jxi.T @ force, state.bias.shape)
         #
-        return SpectralABFState(xi, bias, hist, Fsum, force, Wp, state.Wp, fun, ncalls)
+        return SpectralABFState(xi, bias, hist, Fsum, force, Wp, state.Wp, fun, ncalls, fit_state)
 
     return snapshot, initialize, generalize(update, helpers)
 
@@ -210,16 +238,16 @@ def build_free_energy_fitter(_method: SpectralABF, fit):
     """
     Returns a function that given a `SpectralABFState` performs a least squares fit of the
     generalized average forces for finding the coefficients of a basis functions expansion
-    of the free energy.
+    of the free energy. Here `fit` is the incremental fitter from
+    `pysages.approxfun.build_incremental_fitter`, and the updated fit state is returned
+    along with the new coefficients.
     """
 
     def _fit_forces(state):
-        shape = (*state.Fsum.shape[:-1], 1)
-        force = state.Fsum / np.maximum(state.hist.reshape(shape), 1)
-        return fit(force)
+        return fit(state.fit_state, _average_forces(state))
 
     def skip_fitting(state):
-        return state.fun
+        return state.fit_state, state.fun
 
     def fit_forces(state, in_fitting_step):
         return cond(in_fitting_step, _fit_forces, skip_fitting, state)
@@ -227,6 +255,11 @@ def build_free_energy_fitter(_method: SpectralABF, fit):
     return fit_forces
 
 
+def _average_forces(state):
+    shape = (*state.Fsum.shape[:-1], 1)
+    return state.Fsum / np.maximum(state.hist.reshape(shape), 1)
+
+
 @dispatch
 def build_force_estimator(method: SpectralABF):
     """
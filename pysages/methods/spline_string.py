@@ -13,13 +13,16 @@ We aim to implement this:
 `Weinan, E., et. al. J. Chem. Phys. 126.16 (2007): 164103 <https://doi.org/10.1063/1.2720838>`_.
 """
 
+from concurrent.futures import FIRST_COMPLETED, wait
+from copy import copy
+
 import numpy as np
 from numpy.linalg import norm
 from scipy.interpolate import interp1d
 
 import pysages
 from pysages.methods.core import Result, SamplingMethod, get_method
-from pysages.methods.umbrella_integration import UmbrellaIntegration
+from pysages.methods.umbrella_integration import UmbrellaIntegration, _submit_replica
 from pysages.methods.utils import (
     SerialExecutor,
     listify,
@@ -176,8 +179,13 @@ class SplineString(SamplingMethod):
         return (*args, self.path_history)
 
     def __setstate__(self, state):
-        *args, path_history = state
-        self.__init__(*args)
+        umbrella_sampler, alpha, metric, spacing, freeze_idx, path_history = state
+        # The spacing is stored as the normalized positions of the images along the string,
+        # while `__init__` expects the distances between consecutive images
+        spacing = np.diff(spacing).tolist()
+        self.__init__(
+            umbrella_sampler, alpha, metric=metric, spacing=spacing, freeze_idx=freeze_idx
+        )
         self.path_history = path_history
 
     # We delegate the sampling work to UmbrellaIntegration
@@ -195,6 +203,8 @@ def run(  # pylint: disable=arguments-differ
     post_run_action: Optional[Callable] = None,
     executor=SerialExecutor(),
     executor_shutdown: bool = True,
+    reuse_snapshots: bool = True,
+    asynchronous: bool = False,
     **kwargs
 ):
     # """
@@ -229,12 +239,50 @@ def run(  # pylint: disable=arguments-differ
     #     Example uses for this include writing a final configuration file.
     #     This function gets `context_args` unpacked just like `context_generator`.
 
+    # reuse_snapshots: bool = True
+    #     If `True`, every string iteration (and the first one, when restarting from a
+    #     `Result`) continues each replica from its last configuration, which is
+    #     already equilibrated close to the updated centers, instead of starting over
+    #     from the configuration set up by `context_generator`. With a `SerialExecutor`,
+    #     each replica also keeps its simulation context, which is bound to the updated
+    #     method on later iterations, so `context_generator` is only called once per
+    #     replica (while `post_run_action` still gets the current `stringstep`).
+
+    # asynchronous: bool = False
+    #     If `True`, the string is updated every time a single replica finishes, and
+    #     that replica is immediately resubmitted with its new center, instead of
+    #     waiting for all replicas to complete each iteration. Each replica is run
+    #     `stringsteps` times and `path_history` is extended after every
+    #     `len(replicas)` replica updates. This keeps the workers of `executor` busy
+    #     when some windows take longer than others.
+
     # **Note**: This method does not accept a user defined callback.
     # """
     method = get_method(method_or_result)
     timesteps = int(timesteps)
     stringsteps = int(stringsteps)
-    cv_shape = np.asarray(method.cvs).shape
+    umbrella_sampler = method.umbrella_sampler
+    previous_result = method_or_result if isinstance(method_or_result, Result) else None
+    # Simulation contexts can only be kept across iterations when running in this process
+    reuse_contexts = reuse_snapshots and isinstance(executor, SerialExecutor)
+    sampling_contexts = [None] * len(umbrella_sampler.submethods) if reuse_contexts else None
+
+    if asynchronous:
+        result = _run_asynchronously(
+            method,
+            previous_result if reuse_snapshots else None,
+            context_generator,
+            timesteps,
+            stringsteps,
+            context_args,
+            post_run_action,
+            executor,
+            sampling_contexts,
+            **kwargs
+        )
+        if executor_shutdown:
+            executor.shutdown()
+        return result
 
     for step in range(stringsteps):
         context_args["stringstep"] = len(method.path_history)
@@ -242,49 +290,33 @@ def run(  # pylint: disable=arguments-differ
         for i in range(len(method.umbrella_sampler.histograms)):
             if i not in method.freeze_idx:
                 method.umbrella_sampler.histograms[i].reset()
+        if reuse_snapshots and previous_result is not None:
+            # Restart from the last snapshots, the states are reconciled with the
+            # new centers by `restore_state`
+            states, snapshots = previous_result.states, previous_result.snapshots
+            sampler_or_result = Result(
+                umbrella_sampler, states, umbrella_sampler.histograms, snapshots
+            )
+        else:
+            sampler_or_result = umbrella_sampler
         umbrella_result = pysages.run(
-            method.umbrella_sampler,
+            sampler_or_result,
             context_generator,
             timesteps,
             context_args,
             post_run_action,
             executor,
             executor_shutdown=False,
+            sampling_contexts=sampling_contexts,
             **kwargs
         )
+        previous_result = umbrella_result
 
         new_xi = []
         for i in range(len(umbrella_result.callbacks)):
             sampled_xi = umbrella_result.callbacks[i].get_means()
-            old_xi = method.umbrella_sampler.submethods[i].center
-            direction = (sampled_xi - old_xi) / method.metric(sampled_xi, old_xi)
-            new_xi.append(np.asarray(old_xi) + method.alpha * np.asarray(direction))
-        new_xi = np.asarray(new_xi)
-        new_spacing = [0]
-        for i in range(len(new_xi) - 1):
-            new_spacing.append(method.metric(new_xi[i], new_xi[i + 1]))
-        new_spacing = np.asarray(new_spacing)
-        # Normalize
-        new_spacing /= np.sum(new_spacing)
-        new_spacing = np.cumsum(new_spacing)
-        assert abs(new_spacing[0]) < 1e-6
-        assert abs(new_spacing[-1] - 1) < 1e-6
-        new_spacing[0] = 0.0
-        new_spacing[-1] = 1.0
-
-        # Transform into (Nreplica, X) shape for interpolation
-        transformed_xi = new_xi.reshape((len(new_xi), np.sum(cv_shape)))
-        # Interpolate path with splines
-
-        interpolator = interp1d(new_spacing, transformed_xi, kind="cubic", axis=0)
-        new_centers = []
-        for i in range(len(new_spacing)):
-            if i not in method.freeze_idx:
-                new_centers.append(interpolator(method.spacing[i]).reshape(cv_shape))
-            else:
-                new_centers.append(method.umbrella_sampler.submethods[i].center)
-
-            method.umbrella_sampler.submethods[i].center = new_centers[-1]
+            new_xi.append(_evolve_image(method, i, sampled_xi))
+        new_centers = _reparametrize(method, np.asarray(new_xi))
 
         method.path_history.append(new_centers)
 
@@ -296,6 +328,127 @@ def run(  # pylint: disable=arguments-differ
     )
 
 
+def _run_asynchronously(
+    method,
+    previous_result,
+    context_generator,
+    timesteps,
+    stringsteps,
+    context_args,
+    post_run_action,
+    executor,
+    sampling_contexts,
+    **kwargs
+):
+    umbrella_sampler = method.umbrella_sampler
+    histograms = umbrella_sampler.histograms
+    num_replicas = len(umbrella_sampler.submethods)
+    first_stringstep = len(method.path_history)
+
+    if previous_result is None:
+        states, snapshots = [None] * num_replicas, [None] * num_replicas
+    else:
+        states, snapshots = list(previous_result.states), list(previous_result.snapshots)
+
+    iterations = [0] * num_replicas
+    submitted_centers = [None] * num_replicas
+    updates = 0
+
+    def submit(i):
+        if i not in method.freeze_idx:
+            histograms[i].reset()
+        # Each window runs with a copy of its bias, as the string (and with it the
+        # centers of the windows) keeps being updated while the window is running
+        sampler = copy(umbrella_sampler)
+        sampler.submethods = list(umbrella_sampler.submethods)
+        sampler.submethods[i] = copy(umbrella_sampler.submethods[i])
+        submitted_centers[i] = sampler.submethods[i].center
+        if snapshots[i] is None:
+            sampler_or_result = sampler
+        else:
+            sampler_or_result = Result(sampler, states, histograms, snapshots)
+        replica_context_args = dict(context_args, stringstep=first_stringstep + iterations[i])
+        return _submit_replica(
+            executor,
+            sampler_or_result,
+            i,
+            context_generator,
+            timesteps,
+            replica_context_args,
+            post_run_action,
+            sampling_contexts,
+            **kwargs
+        )
+
+    pending = {submit(i): i for i in range(num_replicas)}
+
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            i = pending.pop(future)
+            replica_result = future.result()
+            states[i], snapshots[i] = replica_result.states, replica_result.snapshots
+            histograms[i] = replica_result.callbacks
+            iterations[i] += 1
+            updates += 1
+
+            # Move only the finished image (from the center it was sampled at), and let
+            # the reparametrization redistribute the rest of the centers
+            new_xi = [np.asarray(submethod.center) for submethod in umbrella_sampler.submethods]
+            sampled_xi = replica_result.callbacks.get_means()
+            new_xi[i] = _evolve_image(method, i, sampled_xi, submitted_centers[i])
+            new_centers = _reparametrize(method, np.asarray(new_xi))
+
+            if updates % num_replicas == 0:
+                method.path_history.append(new_centers)
+            if iterations[i] < stringsteps:
+                pending[submit(i)] = i
+
+    return Result(method, states, histograms, snapshots)
+
+
+def _evolve_image(method, i, sampled_xi, old_xi=None):
+    # Moves the `i`-th image of the string (by default, from its current center)
+    # towards the mean of its sampled CV values
+    if old_xi is None:
+        old_xi = method.umbrella_sampler.submethods[i].center
+    direction = (sampled_xi - old_xi) / method.metric(sampled_xi, old_xi)
+    return np.asarray(old_xi) + method.alpha * np.asarray(direction)
+
+
+def _reparametrize(method, new_xi):
+    # Interpolates the images `new_xi` with splines, and places the centers of the
+    # replicas (except for the frozen ones) at the spacing of `method` along the string
+    cv_shape = np.asarray(method.cvs).shape
+    new_spacing = [0]
+    for i in range(len(new_xi) - 1):
+        new_spacing.append(method.metric(new_xi[i], new_xi[i + 1]))
+    new_spacing = np.asarray(new_spacing)
+    # Normalize
+    new_spacing /= np.sum(new_spacing)
+    new_spacing = np.cumsum(new_spacing)
+    assert abs(new_spacing[0]) < 1e-6
+    assert abs(new_spacing[-1] - 1) < 1e-6
+    new_spacing[0] = 0.0
+    new_spacing[-1] = 1.0
+
+    # Transform into (Nreplica, X) shape for interpolation
+    transformed_xi = new_xi.reshape((len(new_xi), np.sum(cv_shape)))
+    # Interpolate path with splines
+
+    interpolator = interp1d(new_spacing, transformed_xi, kind="cubic", axis=0)
+    new_centers = []
+    for i in range(len(new_spacing)):
+        if i not in method.freeze_idx:
+            new_centers.append(interpolator(method.spacing[i]).reshape(cv_shape))
+        else:
+            new_centers.append(method.umbrella_sampler.submethods[i].center)
+
+        method.umbrella_sampler.submethods[i].center = new_centers[-1]
+
+    return new_centers
+
+
 @dispatch
 def analyze(result: Result[SplineString]):
     umbrella_result = Result(
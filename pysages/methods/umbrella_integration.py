@@ -13,13 +13,18 @@ However, the method is not very accurate and it is preferred that more advanced
 (e.g. the Weighted Histogram Analysis Method) are used for the analysis of the simulations.
 """
 
+from concurrent.futures import as_completed
 from copy import deepcopy
 
+from pysages.backends import SamplingContext
 from pysages.methods.core import (
     ReplicaResult,
     Result,
     SamplingMethod,
+    _replica_kwargs,
+    _restore,
     _run_replica,
+    _run_sampling,
     get_method,
 )
 from pysages.methods.harmonic_bias import HarmonicBias
@@ -55,6 +60,7 @@ class UmbrellaIntegration(SamplingMethod):
         centers,
         hist_periods: Union[list, int],
         hist_offsets: Union[list, int] = 0,
+        logger: Callable = HistogramLogger,
         **kwargs
     ):
         """
@@ -73,6 +79,11 @@ class UmbrellaIntegration(SamplingMethod):
 
         hist_offsets: Union[int, list[int]] = 0
             Offset before starting logging into each replica's histogram.
+
+        logger: Callable = HistogramLogger
+            Callback type (called with each period and offset) used to log the CVs of
+            each replica. Use `StatisticsLogger` to keep only streaming statistics, so
+            that memory use does not grow with the length of the runs.
         """
 
         super().__init__(cvs, **kwargs)
@@ -83,7 +94,7 @@ class UmbrellaIntegration(SamplingMethod):
         offsets = listify(hist_offsets, replicas, "hist_offsets", int)
 
         self.submethods = [HarmonicBias(cvs, k, c) for (k, c) in zip(ksprings, centers)]
-        self.histograms = [HistogramLogger(p, o) for (p, o) in zip(periods, offsets)]
+        self.histograms = [logger(p, o) for (p, o) in zip(periods, offsets)]
 
     @methods_dispatch
     def __init__(  # noqa: F811 # pylint: disable=C0116,E0102
@@ -91,6 +102,7 @@ class UmbrellaIntegration(SamplingMethod):
         biasers: list,
         hist_periods: Union[list, int],
         hist_offsets: Union[list, int] = 0,
+        logger: Callable = HistogramLogger,
         **kwargs
     ):
         cvs = None
@@ -109,7 +121,7 @@ class UmbrellaIntegration(SamplingMethod):
         offsets = listify(hist_offsets, replicas, "hist_offsets", int)
 
         self.submethods = biasers
-        self.histograms = [HistogramLogger(p, o) for (p, o) in zip(periods, offsets)]
+        self.histograms = [logger(p, o) for (p, o) in zip(periods, offsets)]
 
     def __getstate__(self):
         return (self.submethods, self.histograms)
@@ -134,6 +146,8 @@ def run(  # pylint: disable=arguments-differ
     post_run_action: Optional[Callable] = None,
     executor=SerialExecutor(),
     executor_shutdown: bool = True,
+    on_replica_done: Optional[Callable] = None,
+    sampling_contexts: Optional[list] = None,
     **kwargs
 ):
     # """
@@ -168,31 +182,52 @@ def run(  # pylint: disable=arguments-differ
     #     Example uses for this include writing a final configuration file.
     #     This function gets `context_args` unpacked just like `context_generator`.
 
+    # on_replica_done: Optional[Callable] = None
+    #     Called as `on_replica_done(n, replica_result)` as soon as the `n`-th replica
+    #     finishes (in order of completion rather than replica order), e.g. to update a
+    #     running free energy estimate while straggler windows are still being sampled.
+
+    # sampling_contexts: Optional[list] = None
+    #     List with an entry per replica, either `None` or a `SamplingContext` from a
+    #     previous run. Each replica runs within its entry, which is created (by calling
+    #     `context_generator`) when missing and otherwise bound to the replica's method
+    #     via `SamplingContext.rebind`, so that consecutive runs (e.g. the iterations of
+    #     `SplineString`) do not set up the simulation contexts again. Only supported
+    #     with a `SerialExecutor`.
+
     # **Note**: This method does not accept a user defined callback.
     # """
     method = get_method(method_or_result)
     timesteps = int(timesteps)
 
-    def submit_work(executor, method_or_result, context_args, callback):
-        return executor.submit(
-            _run_replica,
+    if sampling_contexts is not None:
+        if not isinstance(executor, SerialExecutor):
+            raise ValueError("Simulation contexts can only be reused with a SerialExecutor")
+        if len(sampling_contexts) != len(method.submethods):
+            raise ValueError("Expected a sampling context (or None) for each replica")
+
+    futures = {}
+    for n in range(len(method.submethods)):
+        future = _submit_replica(
+            executor,
             method_or_result,
+            n,
             context_generator,
             timesteps,
             context_args,
-            *callback,
             post_run_action,
+            sampling_contexts,
             **kwargs
         )
+        futures[future] = n
 
-    futures = []
-    for n in range(len(method.submethods)):
-        replica_context_args = deepcopy(context_args)
-        replica_context_args["replica_num"] = n
-        submethod_or_result, callback = _pack_args(method_or_result, n)
-        futures.append(submit_work(executor, submethod_or_result, replica_context_args, callback))
+    results = [None] * len(futures)
+    for future in as_completed(futures):
+        n = futures[future]
+        results[n] = future.result()
+        if on_replica_done is not None:
+            on_replica_done(n, results[n])
 
-    results = [future.result() for future in futures]
     states = [r.states for r in results]
     callbacks = [r.callbacks for r in results]
     snapshots = [r.snapshots for r in results]
@@ -203,6 +238,82 @@ def run(  # pylint: disable=arguments-differ
     return Result(method, states, callbacks, snapshots)
 
 
+def _submit_replica(
+    executor,
+    method_or_result,
+    n,
+    context_generator,
+    timesteps,
+    context_args,
+    post_run_action,
+    sampling_contexts=None,
+    **kwargs
+):
+    # Submits the simulation of the `n`-th window of `method_or_result` to `executor`
+    replica_context_args = deepcopy(context_args)
+    replica_context_args["replica_num"] = n
+    replicas = len(get_method(method_or_result).submethods)
+    if sampling_contexts is not None:
+        return executor.submit(
+            _run_in_context,
+            sampling_contexts,
+            method_or_result,
+            n,
+            context_generator,
+            timesteps,
+            replica_context_args,
+            post_run_action,
+            **_replica_kwargs(kwargs, n, replicas)
+        )
+    submethod_or_result, callback = _pack_args(method_or_result, n)
+    return executor.submit(
+        _run_replica,
+        submethod_or_result,
+        context_generator,
+        timesteps,
+        replica_context_args,
+        *callback,
+        post_run_action,
+        **_replica_kwargs(kwargs, n, replicas)
+    )
+
+
+def _run_in_context(
+    sampling_contexts,
+    method_or_result,
+    n,
+    context_generator,
+    timesteps,
+    context_args,
+    post_run_action,
+    **kwargs
+):
+    # Runs the `n`-th window of `method_or_result` within `sampling_contexts[n]`, which
+    # is only created the first time and afterwards bound to the window's method
+    method = get_method(method_or_result)
+    submethod, callback = method.submethods[n], method.histograms[n]
+    sampling_context = sampling_contexts[n]
+
+    if sampling_context is None:
+        sampling_context = SamplingContext(submethod, context_generator, callback, context_args)
+        sampling_contexts[n] = sampling_context
+    else:
+        sampling_context.rebind(submethod, callback)
+
+    sampler = sampling_context.sampler
+    if isinstance(method_or_result, Result):
+        states, snapshots = method_or_result.states, method_or_result.snapshots
+        _restore(sampler, submethod, states[n], snapshots[n])
+    context_args["context"] = sampling_context.context
+
+    with sampling_context:
+        _run_sampling(sampling_context, timesteps, **kwargs)
+        if post_run_action:
+            post_run_action(**context_args)
+
+    return ReplicaResult(submethod, sampler.state, callback, sampler.take_snapshot())
+
+
 @dispatch
 def _pack_args(method: UmbrellaIntegration, n: int):
     return method.submethods[n], (method.histograms[n],)
@@ -9,11 +9,16 @@ This includes callback functor objects (callable classes).
 
 import copy
 from concurrent.futures import Executor, Future
+from functools import reduce
 
 import numpy
+from jax import jit
 from jax import numpy as np
+from jax.scipy.special import logsumexp
 from plum import Dispatcher
 
+from pysages.typing import JaxArray, NamedTuple
+
 # We use this to dispatch on the different `run` implementations
 # for `SamplingMethod`s.
 methods_dispatch = Dispatcher()
@@ -126,6 +131,178 @@ class HistogramLogger:
         self.data = numpy.asarray(self.data)
 
 
+class RunningStatistics(NamedTuple):
+    """
+    Running count, mean, sum of squared deviations and histogram of a set of samples.
+    """
+
+    count: JaxArray
+    mean: JaxArray
+    M2: JaxArray
+    hist: JaxArray
+
+
+class StatisticsLogger:
+    """
+    Implements a Callback functor for methods.
+    Keeps streaming statistics (count, mean, covariance and, optionally, a fixed-bin
+    histogram) of the collective variables, updated with Welford's algorithm. Unlike
+    `HistogramLogger`, its memory use does not grow with the number of samples.
+
+    Parameters
+    ----------
+    period:
+        Time steps between logging of collective variables.
+
+    offset:
+        Time steps at the beginning of a run used for equilibration.
+
+    bins: Optional[Union[int, Sequence[int]]]
+        Number of histogram bins along each dimension (no histogram is kept by default).
+
+    ranges: Optional[Sequence[Tuple[float, float]]]
+        Lower and upper edges of the histogram along each dimension.
+        Must be provided along with `bins`.
+    """
+
+    def __init__(self, period: int, offset: int = 0, bins=None, ranges=None):
+        if (bins is None) != (ranges is None):
+            raise ValueError("Both bins and ranges must be provided for the histogram")
+        self.period = period
+        self.offset = offset
+        self.bins = bins
+        self.ranges = ranges
+        self.counter = 0
+        self.stats = None
+
+    def __call__(self, snapshot, state, timestep):
+        """
+        Implements the logging itself. Interface as expected for Callbacks.
+        """
+        self.counter += 1
+        if self.counter > self.offset and self.counter % self.period == 0:
+            xi = state.xi[0]
+            if self.stats is None:
+                self.stats = _init_statistics(xi, self.bins)
+            self.stats = _update_statistics(self.stats, xi, self.edges)
+
+    @property
+    def edges(self):
+        """
+        Histogram bin edges along each dimension (`None` if no histogram is kept).
+        """
+        if self.bins is None:
+            return None
+        ranges = numpy.asarray(self.ranges, dtype=float).reshape(-1, 2)
+        bins = numpy.broadcast_to(self.bins, (len(ranges),))
+        return tuple(numpy.linspace(lo, hi, n + 1) for ((lo, hi), n) in zip(ranges, bins))
+
+    @property
+    def count(self):
+        """
+        Number of samples logged so far.
+        """
+        return 0 if self.stats is None else int(self.stats.count)
+
+    def get_histograms(self, **kwargs):
+        """
+        Returns the histogram (as a density unless `density=False` is given) and bin
+        edges of the logged samples, in the same format as `numpy.histogramdd`.
+        The bins are fixed on construction, so `bins` and `range` are only accepted if
+        they match those of the logger (as with `HistogramLogger.get_histograms`).
+        """
+        if self.bins is None:
+            raise ValueError("No histogram is kept unless bins and ranges are provided")
+        density = kwargs.pop("density", True)
+        bins = kwargs.pop("bins", self.bins)
+        ranges = kwargs.pop("range", self.ranges)
+        if kwargs:
+            raise TypeError(f"Unsupported keyword arguments: {', '.join(kwargs)}")
+        edges = self.edges
+        if not _same_bins(edges, bins, ranges):
+            raise ValueError("The histogram bins were fixed when creating the logger")
+        hist = numpy.asarray(self.stats.hist, dtype=float)
+        if density:
+            volumes = reduce(numpy.multiply.outer, (numpy.diff(e) for e in edges))
+            hist = hist / (hist.sum() * volumes)
+        return hist, list(edges)
+
+    def get_means(self):
+        """
+        Returns mean values of the logged samples.
+        """
+        return numpy.asarray(self.stats.mean)
+
+    def get_cov(self):
+        """
+        Returns (unbiased) covariance matrix of the logged samples, with the same shape
+        as `numpy.cov` would return.
+        """
+        cov = numpy.asarray(self.stats.M2) / (self.count - 1)
+        return cov.squeeze() if cov.shape == (1, 1) else cov
+
+    def reset(self):
+        """
+        Reset internal state.
+        """
+        self.counter = 0
+        self.stats = None
+
+    def numpyfy(self):
+        if self.stats is not None:
+            self.stats = RunningStatistics(*(numpy.asarray(x) for x in self.stats))
+
+
+def _same_bins(edges, bins, ranges):
+    d = len(edges)
+    try:
+        ranges = numpy.asarray(ranges, dtype=float).reshape(d, 2)
+        bins = numpy.broadcast_to(bins, (d,))
+    except ValueError:
+        return False
+    return all(
+        len(e) == n + 1 and numpy.allclose((e[0], e[-1]), r)
+        for (e, n, r) in zip(edges, bins, ranges)
+    )
+
+
+def _init_statistics(xi, bins):
+    d = xi.shape[0]
+    dtype = np.result_type(xi.dtype, float)
+    shape = () if bins is None else tuple(numpy.broadcast_to(bins, (d,)))
+    return RunningStatistics(
+        np.zeros((), dtype=np.int32),
+        np.zeros(d, dtype=dtype),
+        np.zeros((d, d), dtype=dtype),
+        np.zeros(shape, dtype=np.int32),
+    )
+
+
+def _update_statistics(stats, xi, edges):
+    if edges is None:
+        return _welford_update(stats, xi, None, None)
+    lower = np.asarray([e[0] for e in edges])
+    upper = np.asarray([e[-1] for e in edges])
+    return _welford_update(stats, xi, lower, upper)
+
+
+@jit
+def _welford_update(stats, xi, lower, upper):
+    count = stats.count + 1
+    delta = xi - stats.mean
+    mean = stats.mean + delta / count
+    M2 = stats.M2 + np.outer(delta, xi - mean)
+    hist = stats.hist
+    if lower is not None:
+        bins = np.asarray(hist.shape)
+        idx = np.floor((xi - lower) / (upper - lower) * bins).astype(np.int32)
+        # Samples at the upper edge belong to the last bin (as in `numpy.histogramdd`)
+        idx = np.where(xi == upper, bins - 1, idx)
+        is_inside = np.all((idx >= 0) & (idx < bins))
+        hist = hist.at[tuple(idx)].add(np.where(is_inside, 1, 0), mode="drop")
+    return RunningStatistics(count, mean, M2, hist)
+
+
 # NOTE: for OpenMM; issue #16 on openmm-dlext should be resolved for this to work properly.
 class MetaDLogger:
     """
@@ -169,6 +346,171 @@ class MetaDLogger:
         self.counter += 1
 
 
+class MetaDBiasLogger:
+    """
+    Logs the Metadynamics bias potential at the current value of the collective
+    variables, :math:`V(\\xi(t), t)`, and the time-dependent bias offset :math:`c(t)`
+    introduced in [J. Phys. Chem. B 119, 736 (2015)](https://doi.org/10.1021/jp504920s),
+    so that observables can be reweighted from a Metadynamics run in a single pass over
+    the logged frames (see `MetaDBiasLogger.get_weights`).
+
+    When the method has a grid, the bias is read from the potential accumulated over
+    the grid, and :math:`c(t)` is only recomputed after a new Gaussian is deposited.
+    Otherwise, the bias is summed over the deposited Gaussians and :math:`c(t)`, which
+    requires integrating over the CV space, is logged as `nan`.
+
+    Parameters
+    ----------
+    method: Metadynamics
+        The sampling method whose bias is logged.
+
+    kT: float
+        Thermal energy of the system, in the internal units of the backend.
+
+    period: int
+        Time steps between logging of the bias and :math:`c(t)`.
+
+    offset: int
+        Time steps at the beginning of a run used for equilibration.
+    """
+
+    def __init__(self, method, kT: float, period: int, offset: int = 0):
+        self.method = method
+        self.kT = kT
+        self.period = period
+        self.offset = offset
+        self.counter = 0
+        self.data = []
+        self._last_idx = None
+        self._last_ct = numpy.nan
+        self._evaluators = None
+
+    def __call__(self, snapshot, state, timestep):
+        """
+        Implements the logging itself. Interface as expected for Callbacks.
+        """
+        self.counter += 1
+        if self.counter > self.offset and self.counter % self.period == 0:
+            if self._evaluators is None:
+                self._evaluators = _build_bias_evaluators(self.method, self.kT)
+            evaluate_bias, evaluate_ct = self._evaluators
+            idx = int(state.idx)
+            if idx != self._last_idx:
+                self._last_idx = idx
+                self._last_ct = float(evaluate_ct(state))
+            self.data.append((timestep, float(evaluate_bias(state)), self._last_ct))
+
+    def get_times(self):
+        """
+        Returns the time steps at which the bias was logged.
+        """
+        return numpy.array([row[0] for row in self.data])
+
+    def get_bias(self):
+        """
+        Returns the bias potential at the value of the CVs at each logged time step.
+        """
+        return numpy.array([row[1] for row in self.data])
+
+    def get_ct(self):
+        """
+        Returns :math:`c(t)` at each logged time step.
+        """
+        return numpy.array([row[2] for row in self.data])
+
+    def get_weights(self):
+        """
+        Returns the normalized weights :math:`\\propto e^{\\beta (V(\\xi(t), t) - c(t))}`
+        for reweighting the frames logged at each time step.
+        """
+        if self.method.grid is None:
+            raise ValueError(
+                "Reweighting requires c(t), which is only logged for methods with a grid"
+            )
+        log_weights = (self.get_bias() - self.get_ct()) / self.kT
+        weights = numpy.exp(log_weights - log_weights.max())
+        return weights / weights.sum()
+
+    def reset(self):
+        """
+        Reset internal state.
+        """
+        self.counter = 0
+        self.data = []
+        self._last_idx = None
+        self._last_ct = numpy.nan
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_evaluators"] = None
+        return state
+
+
+def _build_bias_evaluators(method, kT):
+    # pylint: disable=import-outside-toplevel
+    from pysages.approxfun import compute_mesh
+    from pysages.colvars import get_periods
+    from pysages.grids import build_indexer
+    from pysages.methods.metad import sum_of_gaussians
+
+    grid = method.grid
+    periods = get_periods(method.cvs)
+
+    def sum_bias(state):
+        xi = state.xi.reshape(-1)
+        return sum_of_gaussians(xi, state.heights, state.centers, state.sigmas, periods)
+
+    if grid is None:
+        return jit(sum_bias), lambda state: numpy.nan
+
+    get_grid_index = build_indexer(grid)
+    # Logarithm of the volume of each bin, to integrate over the CV space
+    mesh = (compute_mesh(grid) + 1) * grid.size / 2 + grid.lower
+    log_volumes = _log_bin_volumes(grid, mesh)
+
+    if method.deltaT is None:
+        # Standard metadynamics
+        a, b = 1 / kT, 0.0
+    else:
+        # Well-tempered metadynamics: for `gamma = (T + deltaT) / T` and `beta = 1 / kT`
+        #   c(t) = log(∫ exp(a * V) / ∫ exp(b * V)) / beta
+        # with `a = gamma / (gamma - 1) * beta` and `b = beta / (gamma - 1)`
+        b = 1 / (method.kB * method.deltaT)
+        a = 1 / kT + b
+
+    def grid_bias(state):
+        I_xi = get_grid_index(state.xi)
+        is_outside = np.any(np.array(I_xi) == grid.shape)
+        V = state.grid_potential
+        if V is None:
+            return sum_bias(state)
+        return np.where(is_outside, sum_bias(state), V[I_xi])
+
+    def ct(state):
+        V = state.grid_potential.reshape(-1)
+        A = logsumexp(a * V + log_volumes)
+        B = logsumexp(b * V + log_volumes)
+        return kT * (A - B)
+
+    return jit(grid_bias), jit(ct)
+
+
+def _log_bin_volumes(grid, mesh):
+    # Bins are centered on the mesh points, so their edges lie halfway between them
+    shape = tuple(int(n) for n in grid.shape)
+    d = len(shape)
+    mesh = mesh.reshape(*shape, d)
+    log_volumes = 0
+    for i, n in enumerate(shape):
+        x = np.moveaxis(mesh[..., i], i, 0).reshape(n, -1)[:, 0]
+        midpoints = (x[1:] + x[:-1]) / 2
+        edges = np.concatenate((grid.lower[i][None], midpoints, grid.upper[i][None]))
+        shape_i = [1] * d
+        shape_i[i] = n
+        log_volumes = log_volumes + np.log(np.diff(edges)).reshape(shape_i)
+    return np.broadcast_to(log_volumes, shape).reshape(-1)
+
+
 def listify(arg, replicas, name, dtype):
     """
     Returns a list of with length `replicas` of `arg` if `arg` is not a list,
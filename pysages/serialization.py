@@ -4,97 +4,91 @@
 """
 Utilities for saving and loading the results of `pysages` simulations.
 
-This module provides two functions for managing the persistent storage of a `pysages`
-simulation's state using pickle serialization (via the `dill` library).
-
-* `load(filename)`: Attempts to load the simulation state from a file and return
-  the corresponding `Result` object.
+* `load(filename)`: Loads the simulation state from a file and returns the
+  corresponding `Result` object.
 * `save(result, filename)`: Saves the given `Result` object to a file.
 
-**Note:**
+Results are stored as a zip archive with the following layout
+
+.. code-block:: text
+
+    format.json              # format name and schema version, arrays' dtypes and shapes
+    method.pkl               # sampling method (without its array payloads)
+    states/<i>.pkl           # state of the i-th replica (without its array payloads)
+    callbacks/<i>.pkl        # callback of the i-th replica (or `callbacks.pkl`)
+    snapshots/<i>.pkl        # last snapshot of the i-th replica
+    arrays/<key>/<chunk>     # raw array data, split in compressed chunks
 
-These functions assume pickle's `DEFAULT_PROTOCOL` and data format. Use them with caution
-if modifications have been made to the saved data structures.
+where the pickled objects (serialized via the `dill` library) only hold references to
+the arrays stored separately. When loading a result, the states, callbacks and snapshots
+of each replica are only read when first accessed. If the result was saved without
+compression, the arrays are memory-mapped instead of read into memory.
+
+Files written by older versions of `pysages` (plain pickles of the whole `Result`) can
+still be loaded.
 """
 
+import io
+import json
+import os
+import pickle as _pickle
+import struct
+import zipfile
+from collections.abc import Sequence
+
 import dill as pickle
+import jax
+import numpy
 
 from pysages.methods import Metadynamics
 from pysages.methods.core import GriddedSamplingMethod, Result
-from pysages.typing import Callable
 from pysages.utils import dispatch, identity
 
+FORMAT = "pysages.Result"
+FORMAT_VERSION = 1
+
+# Arrays smaller than this (in bytes) are kept within the pickled objects
+_MIN_ARRAY_BYTES = 1024
+# Compressed arrays are split into chunks of about this size along their first axis
+_CHUNK_BYTES = 1 << 26
+
 
 def load(filename) -> Result:
     """
     Loads the state of an previously run `pysages` simulation from a file.
 
-    This function attempts to load the pickled data (via the `dill` library) from a file
-    with the given `filename` and return the corresponding `Result` object.
-
     Parameters
     ----------
 
     filename: str
-        The name of the file containing the pickled data.
+        The name of the file written by `pysages.save`.
 
     **Notes:**
 
-    This function attempts to recover from deserialization errors related to missing
-    `ncalls` attributes.
+    The states, callbacks and snapshots of the result are lazily loaded, that is, each
+    one is only read from the file when first accessed. For results saved without
+    compression, the arrays are returned as read-only `numpy.memmap`s (even those that
+    were JAX arrays when saved), so that they are only read as needed.
+
+    Files written with earlier versions of `pysages` are also supported, and states
+    missing their `ncalls` attribute are given an estimate of it.
     """
-    with open(filename, "rb") as io:
-        bytestring = io.read()
-
-    try:
-        return pickle.loads(bytestring)
-
-    except TypeError as e:  # pylint: disable=W0718
-        if "ncalls" not in getattr(e, "message", repr(e)):
-            raise e
-
-        # We know that states preceed callbacks so we try to find all tuples of values
-        # corresponding to each state.
-        j = bytestring.find(b"\x8c\x06states\x94")
-        k = bytestring.find(b"\x8c\tcallbacks\x94")
-        boundary = b"t\x94\x81\x94"
-
-        marks = []
-        while True:
-            i = j
-            j = bytestring.find(boundary, i + 1, k)
-            if j == -1:
-                marks.append((i, len(bytestring)))
-                break
-            marks.append((i, j))
-
-        # We set `ncalls` as zero and adjust it later
-        first = marks[0]
-        last = marks.pop()
-        slices = [
-            bytestring[: first[0]],
-            *(bytestring[i:j] + b"K\x00" for (i, j) in marks),
-            bytestring[last[0] :],  # noqa: E203
-        ]
-        bytestring = b"".join(slices)
-
-        # Try to deserialize again
-        result = pickle.loads(bytestring)
+    if not zipfile.is_zipfile(filename):
+        return _load_legacy(filename)
 
-        # Update results with `ncalls` estimates for each state
-        update = _ncalls_estimator(result.method)
-        result.states = [update(state) for state in result.states]
+    archive = _ResultArchive(filename)
+    method = archive.unpickle("method.pkl")
+    states = archive.unpickle_sequence("states")
+    callbacks = archive.unpickle_sequence("callbacks")
+    snapshots = archive.unpickle_sequence("snapshots")
 
-        return result
+    return Result(method, states, callbacks, snapshots)
 
 
-def save(result: Result, filename) -> None:
+def save(result: Result, filename, compress: bool = True) -> None:
     """
     Saves the result of a `pysages` simulation to a file.
 
-    This function saves the given `Result` object to a file with the specified `filename`
-    using pickle serialization (via the `dill` library).
-
     Parameters
     ----------
 
@@ -103,19 +97,273 @@ def save(result: Result, filename) -> None:
 
     filename: str
         The name of the file to save the data to.
+
+    compress: bool = True
+        Whether to compress the arrays of the result. Arrays stored uncompressed are
+        memory-mapped when loading the result.
+    """
+    filename = os.fspath(filename)
+    tmp_filename = filename + ".tmp"
+    compression = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+
+    with zipfile.ZipFile(tmp_filename, "w", compression=compression, allowZip64=True) as zf:
+        writer = _ArrayWriter(zf, compress)
+        writer.pickle("method.pkl", result.method)
+        lengths = {}
+        for name in ("states", "callbacks", "snapshots"):
+            lengths[name] = writer.pickle_sequence(name, getattr(result, name))
+        metadata = dict(
+            format=FORMAT, version=FORMAT_VERSION, lengths=lengths, arrays=writer.arrays
+        )
+        zf.writestr("format.json", json.dumps(metadata, indent=1))
+
+    os.replace(tmp_filename, filename)
+
+
+class _ArrayWriter:
+    """
+    Pickles objects into a zip archive, storing their (large enough) numeric arrays
+    as separate members of the archive.
+    """
+
+    def __init__(self, zf, compress):
+        self.zf = zf
+        self.compress = compress
+        self.arrays = {}
+        self._keys = {}
+        self._refs = []  # keep the arrays alive so their ids are not reused
+        self._pending = []
+
+    def pickle(self, name, obj):
+        buffer = io.BytesIO()
+        pickler = pickle.Pickler(buffer)
+        pickler.persistent_id = self.persistent_id
+        pickler.dump(obj)
+        self.zf.writestr(name, buffer.getbuffer())
+        # Only one member of the archive can be written at a time
+        for key, array, kind in self._pending:
+            self.write(key, array, kind)
+        self._pending.clear()
+
+    def pickle_sequence(self, name, objs):
+        if not isinstance(objs, (list, _LazySequence)):
+            self.pickle(f"{name}.pkl", objs)
+            return None
+        for i, obj in enumerate(objs):
+            self.pickle(f"{name}/{i}.pkl", obj)
+        return len(objs)
+
+    def persistent_id(self, obj):
+        is_jax_array = isinstance(obj, jax.Array)
+        if not (is_jax_array or isinstance(obj, numpy.ndarray)):
+            return None
+        if obj.dtype.kind not in "biufc" or obj.nbytes < _MIN_ARRAY_BYTES:
+            return None
+
+        key = self._keys.get(id(obj))
+        if key is None:
+            key = str(len(self._keys))
+            self._keys[id(obj)] = key
+            self._refs.append(obj)
+            self._pending.append((key, numpy.asarray(obj), "jax" if is_jax_array else "numpy"))
+
+        return ("array", key)
+
+    def write(self, key, array, kind):
+        array = numpy.ascontiguousarray(array)
+        rows = array.shape[0] if array.ndim > 0 else 1
+        if self.compress and array.ndim > 0 and rows > 1:
+            row_bytes = max(array.nbytes // rows, 1)
+            chunk_rows = max(_CHUNK_BYTES // row_bytes, 1)
+        else:
+            chunk_rows = rows
+
+        chunks = 0
+        flat = array.reshape(rows, -1) if array.ndim > 0 else array.reshape(1, -1)
+        for start in range(0, rows, chunk_rows):
+            with self.zf.open(f"arrays/{key}/{chunks}", "w", force_zip64=True) as member:
+                member.write(flat[start : start + chunk_rows].tobytes())  # noqa: E203
+            chunks += 1
+
+        self.arrays[key] = dict(
+            dtype=array.dtype.str, shape=list(array.shape), kind=kind, chunks=chunks
+        )
+
+
+class _ResultArchive:
+    """
+    Reads the objects and arrays stored by `pysages.save`.
     """
-    with open(filename, "wb") as io:
-        pickle.dump(result, io)
+
+    def __init__(self, filename):
+        self.filename = os.fspath(filename)
+        with zipfile.ZipFile(self.filename) as zf:
+            metadata = json.loads(zf.read("format.json"))
+
+        if metadata.get("format") != FORMAT:
+            raise ValueError(f"{self.filename} does not contain a pysages Result")
+        if metadata["version"] > FORMAT_VERSION:
+            raise ValueError(
+                f"{self.filename} was written with a newer version of pysages "
+                f"(format version {metadata['version']} > {FORMAT_VERSION})"
+            )
+
+        self.metadata = metadata
+        self._arrays = {}
+
+    def unpickle(self, name):
+        with zipfile.ZipFile(self.filename) as zf:
+            with zf.open(name) as member:
+                unpickler = pickle.Unpickler(member)
+                unpickler.persistent_load = self.persistent_load
+                return unpickler.load()
+
+    def unpickle_sequence(self, name):
+        length = self.metadata["lengths"][name]
+        if length is None:
+            return self.unpickle(f"{name}.pkl")
+        return _LazySequence(lambda i: self.unpickle(f"{name}/{i}.pkl"), length)
+
+    def persistent_load(self, pid):
+        tag, key = pid
+        if tag != "array":
+            raise _pickle.UnpicklingError(f"Unsupported persistent id {pid}")
+        if key not in self._arrays:
+            info = self.metadata["arrays"][key]
+            array = self.read(key, info)
+            # Memory-mapped arrays are kept as such, rather than copied to the device
+            if info["kind"] == "jax" and not isinstance(array, numpy.memmap):
+                array = jax.numpy.asarray(array)
+            self._arrays[key] = array
+        return self._arrays[key]
+
+    def read(self, key, info):
+        dtype = numpy.dtype(info["dtype"])
+        shape = tuple(info["shape"])
+
+        with zipfile.ZipFile(self.filename) as zf:
+            members = [zf.getinfo(f"arrays/{key}/{n}") for n in range(info["chunks"])]
+            if len(members) == 1 and members[0].compress_type == zipfile.ZIP_STORED:
+                offset = _data_offset(self.filename, members[0])
+                return numpy.memmap(self.filename, dtype, "r", offset, shape)
+
+            array = numpy.empty(shape, dtype)
+            buffer = array.reshape(-1).view(numpy.uint8)
+            start = 0
+            for member in members:
+                with zf.open(member) as chunk:
+                    stop = start + member.file_size
+                    chunk.readinto(memoryview(buffer[start:stop]))
+                    start = stop
+
+        return array
+
+
+class _LazySequence(Sequence):
+    """
+    Read-only sequence whose items are only loaded (once) when first accessed.
+    It gets pickled as a regular list.
+    """
+
+    def __init__(self, load_item, length):
+        self._load_item = load_item
+        self._items = [None] * length
+        self._loaded = [False] * length
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if not self._loaded[i]:
+            self._items[i] = self._load_item(range(len(self))[i])
+            self._loaded[i] = True
+        return self._items[i]
+
+    def __reduce__(self):
+        return (list, (list(self),))
+
+
+def _data_offset(filename, member):
+    # The local file header has a fixed size of 30 bytes, followed by the member's
+    # name and an extra field whose lengths are stored in the last four bytes
+    with open(filename, "rb") as f:
+        f.seek(member.header_offset)
+        header = f.read(30)
+    name_length, extra_length = struct.unpack("<HH", header[26:30])
+    return member.header_offset + 30 + name_length + extra_length
+
+
+#  Legacy pickles
+#  ==============
+
+
+def _load_legacy(filename) -> Result:
+    # Files written before the versioned format are plain pickles of the `Result`
+    with open(filename, "rb") as f:
+        unpickler = _LegacyUnpickler(f)
+        result = unpickler.load()
+
+    if unpickler.missing_ncalls:
+        # Update results with `ncalls` estimates for each state
+        update = _ncalls_estimator(result.method)
+        result.states = [update(state) for state in result.states]
+
+    return result
+
+
+class _LegacyUnpickler(pickle.Unpickler):
+    """
+    Unpickler that migrates method states stored with an older set of fields.
+    Fields added since then take their default values (`None` if they have none),
+    except for `ncalls` which is set to zero (and later estimated).
+    """
+
+    missing_ncalls = False
+
+    def find_class(self, module, name):
+        # `dill` pickles named tuples by recreating their class from its name and
+        # the fields it had when pickled
+        if (module, name) == ("dill._dill", "_create_namedtuple"):
+            return self._create_namedtuple
+        cls = super().find_class(module, name)
+        fields = getattr(cls, "_fields", ())
+        if isinstance(cls, type) and issubclass(cls, tuple) and "ncalls" in fields:
+            return self._migrate(cls, fields[: fields.index("ncalls")])
+        return cls
+
+    def _create_namedtuple(self, name, fieldnames, modulename, *args):
+        cls = pickle._dill._create_namedtuple(name, fieldnames, modulename, *args)
+        if tuple(fieldnames) != getattr(cls, "_fields", tuple(fieldnames)):
+            return self._migrate(cls, tuple(fieldnames))
+        return cls
+
+    def _migrate(self, cls, fieldnames):
+        unpickler = self
+
+        class Migrated:
+            def __new__(_, *args):  # noqa: N804
+                if len(args) != len(fieldnames):  # already stored with the current fields
+                    return cls.__new__(cls, *args)
+                values = dict(zip(fieldnames, args))
+                if "ncalls" in cls._fields and "ncalls" not in values:
+                    unpickler.missing_ncalls = True
+                    values["ncalls"] = 0
+                defaults = cls._field_defaults
+                return cls(*(values.get(f, defaults.get(f)) for f in cls._fields))
+
+        return Migrated
 
 
 @dispatch
-def _ncalls_estimator(_) -> Callable:
+def _ncalls_estimator(_):
     # Fallback case. We leave ncalls as zero.
     return identity
 
 
 @dispatch
-def _ncalls_estimator(_: Metadynamics) -> Callable:
+def _ncalls_estimator(_: Metadynamics):
     def update(state):
         ncalls = state.idx  # use the number of gaussians deposited as proxy
         return state._replace(ncalls=ncalls)
@@ -124,7 +372,7 @@ def _ncalls_estimator(_: Metadynamics) -> Callable:
 
 
 @dispatch
-def _ncalls_estimator(_: GriddedSamplingMethod) -> Callable:
+def _ncalls_estimator(_: GriddedSamplingMethod):
     def update(state):
         ncalls = state.hist.sum().item()  # use the histograms total count as proxy
         return state._replace(ncalls=ncalls)
@@ -29,4 +29,8 @@ from .core import (
     identity,
     linear_solver,
 )
-from .transformations import quaternion_from_euler, quaternion_matrix
+from .transformations import (
+    quaternion_from_euler,
+    quaternion_matrix,
+    quaternion_multiply,
+)
@@ -193,3 +193,20 @@ def quaternion_matrix(quaternion, dtype: type = np.zeros(0).dtype):
     n = np.dot(q, q)
 
     return lax.cond(n < 4 * eps(), _identity_matrix, _quaternion_matrix, q, n)
+
+
+def quaternion_multiply(quaternion1, quaternion0):
+    """
+    Return the product of two quaternions, such that the rotation of the result
+    corresponds to applying the rotation of `quaternion0` followed by `quaternion1`.
+    """
+    w0, x0, y0, z0 = quaternion0
+    w1, x1, y1, z1 = quaternion1
+    return np.array(
+        [
+            -x1 * x0 - y1 * y0 - z1 * z0 + w1 * w0,
+            x1 * w0 + y1 * z0 - z1 * y0 + w1 * x0,
+            -x1 * z0 + y1 * w0 + z1 * x0 + w1 * y0,
+            x1 * y0 - y1 * x0 + z1 * w0 + w1 * z0,
+        ]
+    )
@@ -0,0 +1,30 @@
+import pytest
+
+
+@pytest.fixture
+def compiles():
+    """
+    Records the backend compilations (if any) that occur during a test.
+    Relies on private JAX monitoring hooks, so tests using it are skipped whenever
+    these are not available.
+    """
+    try:
+        from jax._src import monitoring
+        from jax._src.dispatch import BACKEND_COMPILE_EVENT
+
+        register = monitoring.register_event_duration_secs_listener
+        unregister = monitoring._unregister_event_duration_listener_by_callback
+    except (ImportError, AttributeError):
+        pytest.skip("JAX compilation events cannot be monitored")
+
+    events = []
+
+    def record(event, *_, **__):
+        if event == BACKEND_COMPILE_EVENT:
+            events.append(event)
+
+    register(record)
+    try:
+        yield events
+    finally:
+        unregister(record)
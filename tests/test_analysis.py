@@ -0,0 +1,174 @@
+from types import SimpleNamespace
+
+import numpy
+import pytest
+from jax import jit
+from jax import numpy as np
+from jax import vmap
+from jax.scipy.special import logsumexp
+
+import pysages
+from pysages.colvars import Component
+from pysages.grids import Chebyshev, Grid, Periodic, Regular
+from pysages.methods import (
+    ABF,
+    GradientLearning,
+    MetaDBiasLogger,
+    Metadynamics,
+    PoissonIntegration,
+)
+from pysages.methods.core import Result
+from pysages.methods.metad import MetadynamicsState, Metapotential, sum_of_gaussians
+
+
+def free_energy(x):
+    return np.sin(x[..., 0]) * np.cos(x[..., 1]) + 0.3 * np.cos(2 * x[..., 0])
+
+
+def mean_force(x):
+    # The mean forces are the negative gradient of the free energy
+    dx = np.cos(x[..., 0]) * np.cos(x[..., 1]) - 0.6 * np.sin(2 * x[..., 0])
+    dy = -np.sin(x[..., 0]) * np.sin(x[..., 1])
+    return -np.stack((dx, dy), axis=-1)
+
+
+@pytest.mark.parametrize(
+    "T, weighted",
+    [(Periodic, False), (Regular, False), (Regular, True), (Chebyshev, False)],
+)
+def test_poisson_integration(T, weighted):
+    lower, upper = (
+        ((-np.pi, -np.pi), (np.pi, np.pi)) if T is Periodic else ((-1.5, -1.2), (1.5, 1.2))
+    )
+    grid = Grid[T](lower=lower, upper=upper, shape=(40, 32))
+    method = ABF([Component([0], 0), Component([0], 1)], grid)
+
+    # Build the states from the mean forces evaluated at the centers of the bins
+    mesh = pysages.approxfun.compute_mesh(grid)
+    mesh = ((mesh + 1) * grid.size / 2 + grid.lower).reshape(40, 32, 2)
+    hist = numpy.random.default_rng(0).integers(1, 50, size=(40, 32)).astype(numpy.uint32)
+    Fsum = mean_force(mesh) * hist[..., None]
+    states = [SimpleNamespace(hist=hist, Fsum=Fsum), SimpleNamespace(hist=hist, Fsum=2 * Fsum)]
+
+    result = pysages.analyze(
+        Result(method, states, None, None), strategy=PoissonIntegration(weighted=weighted)
+    )
+
+    # Free energies are returned transposed for plotting
+    A = free_energy(mesh)
+    A = A - A.min()
+    fes = [fe.T - fe.min() for fe in result["free_energy"]]
+    assert np.abs(fes[0] - A).max() < 1e-2
+    assert np.abs(fes[1] - 2 * A).max() < 2e-2
+
+    # The interpolated free energy matches at the centers of the bins
+    fes_fn = result["fes_fn"][0]
+    x = mesh.reshape(-1, 2)
+    assert np.allclose(fes_fn(x).reshape(40, 32), result["free_energy"][0].T, atol=1e-5)
+
+
+def test_poisson_integration_1d():
+    grid = Grid[Regular](lower=-1.5, upper=1.5, shape=50)
+    method = ABF([Component([0], 0)], grid)
+
+    mesh = pysages.approxfun.compute_mesh(grid)
+    mesh = (mesh + 1) * grid.size / 2 + grid.lower
+    hist = numpy.full(50, 10, dtype=numpy.uint32)
+    Fsum = -np.cos(mesh) * hist[:, None]
+    state = SimpleNamespace(hist=hist, Fsum=Fsum)
+
+    result = pysages.analyze(Result(method, [state], None, None), strategy=PoissonIntegration())
+
+    A = np.sin(mesh.flatten())
+    assert np.abs(result["free_energy"] - result["free_energy"].min() - (A - A.min())).max() < 1e-2
+
+    # One dimensional meshes are interpreted as a sequence of points
+    assert result["mesh"].shape == (50,)
+    assert np.allclose(result["fes_fn"](result["mesh"]).flatten(), result["free_energy"])
+
+
+def test_gradient_learning(compiles):
+    grid = Grid[Regular](lower=-1.5, upper=1.5, shape=32)
+    method = ABF([Component([0], 0)], grid)
+    topology = (8,)
+
+    mesh = pysages.approxfun.compute_mesh(grid)
+    mesh = (mesh + 1) * grid.size / 2 + grid.lower
+    hist = numpy.full(32, 10, dtype=numpy.uint32)
+    Fsum = -np.cos(mesh) * hist[:, None]
+    states = [SimpleNamespace(hist=hist, Fsum=Fsum), SimpleNamespace(hist=hist, Fsum=2 * Fsum)]
+
+    def analyze(states):
+        result = Result(method, states, None, None)
+        return pysages.analyze(result, strategy=GradientLearning(), topology=topology)
+
+    # Fitting the replicas together gives the same results as fitting each on its own
+    result = analyze(states)
+    for i, state in enumerate(states):
+        replica_result = analyze([state])
+        assert np.allclose(result["free_energy"][i], replica_result["free_energy"], atol=1e-5)
+        x = result["mesh"]
+        assert np.allclose(result["fes_fn"][i](x), replica_result["fes_fn"](x), atol=1e-5)
+
+    A = np.sin(mesh.flatten())
+    fe = result["free_energy"][0]
+    assert np.abs((fe - fe.min()) - (A - A.min())).max() < 0.1
+
+    states = [SimpleNamespace(hist=hist, Fsum=k * Fsum) for k in (3, 0.5)]
+
+    # Analyzing new data of the same shape reuses the compiled fitting functions
+    compiles.clear()
+    analyze(states)
+    assert len(compiles) == 0
+
+
+def test_metapotential():
+    rng = numpy.random.default_rng(0)
+    heights = numpy.zeros(600)
+    heights[:500] = rng.uniform(0.1, 1.0, 500)
+    centers = numpy.zeros((600, 2))
+    centers[:500] = rng.uniform(-3.0, 3.0, (500, 2))
+    sigmas = numpy.full((1, 2), 0.3)
+    periods = np.array([2 * np.pi, np.inf])
+
+    expected = jit(vmap(lambda x: sum_of_gaussians(x, heights, centers, sigmas, periods)))
+    metapotential = Metapotential(
+        heights, centers, sigmas, periods, chunk_size=64, hills_chunk_size=128
+    )
+
+    x = rng.uniform(-3.0, 3.0, (300, 2))
+    assert np.allclose(metapotential(x), expected(x))
+
+    grid = Grid(lower=(-3.0, -3.0), upper=(3.0, 3.0), shape=(16, 12))
+    mesh = pysages.approxfun.compute_mesh(grid)
+    mesh = (mesh + 1) * grid.size / 2 + grid.lower
+    V = metapotential.project(grid)
+    assert V.shape == (16, 12)
+    assert np.allclose(V.reshape(-1), expected(mesh))
+    assert metapotential.project(grid) is V
+
+
+def test_metad_bias_logger():
+    kB, kT, deltaT = 1.0, 1.0, 4.0
+    grid = Grid(lower=(-1.0,), upper=(1.0,), shape=(50,))
+    method = Metadynamics([Component([0], 0)], 0.5, 0.2, 5, 3, deltaT, kB=kB, grid=grid)
+    logger = MetaDBiasLogger(method, kT, period=2)
+
+    heights = np.array([0.5, 0.4, 0.0])
+    centers = np.array([[0.1], [-0.3], [0.0]])
+    sigmas = np.array([[0.2]])
+    periods = np.array([np.inf])
+    mesh = pysages.approxfun.compute_mesh(grid)
+    V = vmap(lambda x: sum_of_gaussians(x, heights, centers, sigmas, periods))(mesh)
+    xi = mesh[20:21]
+    state = MetadynamicsState(xi, None, heights, centers, sigmas, V, None, 2, 10)
+
+    for timestep in range(4):
+        logger(None, state, timestep)
+
+    assert numpy.all(logger.get_times() == numpy.array([1, 3]))
+    assert numpy.allclose(logger.get_bias(), V[20])
+    b = 1 / (kB * deltaT)
+    ct = kT * (logsumexp((1 / kT + b) * V) - logsumexp(b * V))
+    assert numpy.allclose(logger.get_ct(), ct)
+    assert numpy.allclose(logger.get_weights(), 0.5)
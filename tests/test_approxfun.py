@@ -1,4 +1,6 @@
 # from matplotlib import pyplot as plt
+import numpy
+import pytest
 from jax import grad
 from jax import numpy as np
 from jax import vmap
@@ -9,9 +11,11 @@ from pysages.approxfun import (
     build_evaluator,
     build_fitter,
     build_grad_evaluator,
+    build_incremental_fitter,
+    build_projector,
     compute_mesh,
 )
-from pysages.grids import Chebyshev, Grid
+from pysages.grids import Chebyshev, Grid, Periodic, Regular
 
 
 # Test functions
@@ -106,3 +110,97 @@ def test_cheb_approx():
     # ax.plot(x, dy)
     # ax.plot(x, get_grad(fun, x))
     # plt.show()
+
+
+def test_incremental_fit():
+    rng = numpy.random.default_rng(0)
+    grids = [
+        Grid(lower=(-np.pi, -np.pi), upper=(np.pi, np.pi), shape=(16, 16), periodic=True),
+        Grid[Chebyshev](lower=(-1.0, -1.0), upper=(1.0, 1.0), shape=(16, 16)),
+    ]
+
+    for grid in grids:
+        model = SpectralGradientFit(grid)
+        fit = build_fitter(model)
+        init, incremental_fit = build_incremental_fitter(model, 8, 4)
+
+        dy = rng.normal(size=(16, 16, 2))
+        state = init(dy)
+        for _ in range(6):
+            # Change a few bins, including the first one (used to pad the updates)
+            idx = numpy.concatenate(([[0, 0]], rng.integers(0, 16, size=(4, 2))))
+            dy = dy.copy()
+            dy[idx[:, 0], idx[:, 1]] += rng.normal(size=(5, 2))
+            state, fun = incremental_fit(state, np.asarray(dy))
+            expected = fit(np.asarray(dy))
+            assert np.allclose(fun.scale, expected.scale)
+            assert np.allclose(fun.coefficients, expected.coefficients, atol=1e-6)
+
+
+def test_transform_projector():
+    rng = numpy.random.default_rng(0)
+
+    for T, shape in [
+        (Periodic, (64,)),
+        (Periodic, (20, 16)),
+        (Chebyshev, (64,)),
+        (Chebyshev, (20, 16)),
+        (Regular, (20, 16)),
+    ]:
+        d = len(shape)
+        grid = Grid[T](lower=(-1.0,) * d, upper=(2.0,) * d, shape=shape)
+        model = SpectralGradientFit(grid)
+        project, columns = build_projector(model)
+
+        dy = rng.normal(size=(*shape, d))
+        cs = project(np.asarray(dy))
+        idx = np.array([0, 7, 11])
+        cols = columns(idx)
+
+        # Only the grids without a fast transform need the dense pseudo-inverse
+        assert (model._pinv is None) == (T is not Regular)
+
+        expected = model.pinv @ dy.flatten()
+        assert np.allclose(cs, expected, rtol=1e-8, atol=1e-8 * np.abs(expected).max())
+        expected = model.pinv.reshape(cs.size, -1, d)[:, idx]
+        assert np.allclose(cols, expected, rtol=1e-8, atol=1e-8 * np.abs(expected).max())
+
+
+def test_index_sets():
+    # Accuracy per coefficient of the available index sets on a 4D function with
+    # low-order interactions between pairs of variables
+    def h(x):
+        return np.sin(x).sum() + 0.3 * np.cos(x[0] - x[1]) + 0.2 * np.sin(x[2] + x[3])
+
+    grid = Grid(lower=(-np.pi,) * 4, upper=(np.pi,) * 4, shape=(12,) * 4, periodic=True)
+    x = np.pi * compute_mesh(grid)
+    y = vmap(h)(x)
+    dy = vmap(grad(h))(x).reshape(*grid.shape, 4)
+
+    sizes = {}
+    for index_set in ("euclidean", "total_degree", "hyperbolic_cross"):
+        model = SpectralGradientFit(grid, index_set)
+        fun = build_fitter(model)(dy)
+        z = build_evaluator(model)(fun, x).flatten()
+        sizes[index_set] = fun.coefficients.size
+        assert np.allclose(z - z.mean(), y - y.mean(), atol=1e-8)
+
+    assert sizes["hyperbolic_cross"] < sizes["total_degree"] < sizes["euclidean"]
+    assert sizes["total_degree"] < sizes["euclidean"] / 4
+
+    # Sobolev fits over sparse bases in three dimensions
+    def p(x):
+        return x[0] * x[1] + x[1] * x[2] ** 2 - x[0] ** 3
+
+    grid = Grid[Chebyshev](lower=(-1.0,) * 3, upper=(1.0,) * 3, shape=(12,) * 3)
+    x = compute_mesh(grid)
+    y = vmap(p)(x)
+    dy = vmap(grad(p))(x)
+
+    model = SpectralSobolev1Fit(grid, "total_degree")
+    fun = build_fitter(model)(y.reshape(grid.shape), dy.reshape(*grid.shape, 3))
+    assert np.allclose(build_evaluator(model)(fun, x).flatten(), y)
+    assert np.allclose(build_grad_evaluator(model)(fun, x), dy)
+
+    with pytest.raises(ValueError):
+        SpectralGradientFit(grid, "tensor")
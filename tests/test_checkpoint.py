@@ -0,0 +1,75 @@
+import threading
+
+import numpy as np
+from test_simulations.abf import generate_simulation
+
+import pysages
+from pysages.backends import SamplingContext
+from pysages.colvars import Component
+from pysages.grids import Grid
+from pysages.methods import ABF, HistogramLogger
+from pysages.methods.core import Checkpointer
+
+
+def build_method():
+    return ABF([Component([0], 0)], Grid(lower=0.0, upper=4.0, shape=32))
+
+
+def test_checkpoint_and_resume(tmp_path):
+    path = tmp_path / "checkpoint.pkl"
+    result = pysages.run(
+        build_method(),
+        generate_simulation,
+        4,
+        callback=HistogramLogger(1),
+        context_args=dict(write_output=False),
+        checkpoint_every=2,
+        checkpoint_path=path,
+    )
+
+    # The last checkpoint holds the final state of the run
+    checkpoint = pysages.load(path)
+    state = checkpoint.states[0]
+    assert state.ncalls == result.states[0].ncalls
+    assert np.allclose(state.hist, result.states[0].hist)
+    assert np.allclose(state.Fsum, result.states[0].Fsum)
+    assert np.allclose(checkpoint.snapshots[0].positions, result.snapshots[0].positions)
+    counter = checkpoint.callbacks[0].counter
+    assert counter == result.callbacks[0].counter
+    assert np.allclose(checkpoint.callbacks[0].data, result.callbacks[0].data)
+
+    result = pysages.run(checkpoint, generate_simulation, 2, context_args=dict(write_output=False))
+    assert result.states[0].ncalls > state.ncalls
+    assert result.states[0].hist.sum() == result.states[0].ncalls
+    assert result.callbacks[0].counter > counter
+
+
+def test_checkpoint_snapshot(tmp_path):
+    path = tmp_path / "checkpoint.pkl"
+    method = build_method()
+    callback = HistogramLogger(1)
+    context_args = dict(write_output=False)
+    sampling_context = SamplingContext(method, generate_simulation, callback, context_args)
+    checkpointer = Checkpointer(method, path)
+
+    # Hold the writer thread, so that the checkpoint is written after the run continues
+    release = threading.Event()
+    checkpointer._executor.submit(release.wait)
+
+    try:
+        pysages.run(sampling_context, 2)
+        state = sampling_context.sampler.state
+        counter = callback.counter
+        checkpointer.save(sampling_context.sampler)
+        pysages.run(sampling_context, 2)
+    finally:
+        release.set()
+        checkpointer.close()
+
+    # Updates to the callback after the checkpoint was taken are not recorded
+    checkpoint = pysages.load(path)
+    assert callback.counter > counter
+    assert checkpoint.callbacks[0].counter == counter
+    assert len(checkpoint.callbacks[0].data) == counter
+    assert checkpoint.states[0].ncalls == state.ncalls
+    assert np.allclose(checkpoint.states[0].hist, state.hist)
@@ -1,8 +1,32 @@
+import importlib
+
+import jax
 from jax import numpy as np
 
-from pysages.colvars import Distance
-from pysages.colvars.core import build
+from pysages.colvars import (
+    Component,
+    ContactCount,
+    CoordinationNumber,
+    DihedralAngle,
+    DihedralAngles,
+    Distance,
+    PathCoordinates,
+    PathDistance,
+    PathProgress,
+    ShapeDescriptors,
+)
+from pysages.colvars.contacts import build_switching_function
+from pysages.colvars.core import _BUILD_CACHE, _BUILD_CACHE_SIZE, _cv_key, build
+from pysages.colvars.orientation import ERMSD, RMSD
+from pysages.colvars.shape import (
+    eigvalsh3,
+    radius_of_gyration,
+    squared_radius_of_gyration,
+    weighted_radius_of_gyration,
+    weighted_squared_radius_of_gyration,
+)
 from pysages.typing import JaxArray, NamedTuple
+from pysages.utils import quaternion_from_euler, quaternion_matrix, quaternion_multiply
 
 POSITIONS = np.array(
     [
@@ -30,3 +54,179 @@ def test_groups():
     f = build(cv, differentiate=False)
     assert len(cv.groups) == 2
     assert np.isclose(f(SNAPSHOT).item(), 0.57957285)
+
+
+def test_coordination_number():
+    # Compare against a brute force evaluation over all pairs of particles
+    n = 200
+    L = np.array([2.0, 2.2, 1.9])
+    positions = jax.random.uniform(jax.random.PRNGKey(0), (n, 3)) * L
+    cv = CoordinationNumber(list(range(n)), L, 0.25)
+    switch = build_switching_function(0.25, 0.0, 6, 12, cv.cutoff)
+
+    def all_pairs(rs):
+        dr = rs[:, None] - rs[None, :]
+        dr = dr - L * np.round(dr / L)
+        r = np.sqrt(np.sum(dr**2, axis=-1) + np.eye(n))
+        return np.sum(np.where(np.eye(n) > 0, 0.0, switch(r))) / n
+
+    assert np.isclose(cv.function(positions), all_pairs(positions))
+    assert np.allclose(jax.grad(cv.function)(positions), jax.grad(all_pairs)(positions))
+
+    cv = ContactCount([list(range(50)), list(range(50, n))], L, 0.25, max_neighbors=1)
+    assert np.isnan(cv.function(positions[:50], positions[50:]))
+
+
+def test_path_coordinates():
+    # Configurations at the frames should map onto the corresponding path progress
+    r0 = jax.random.normal(jax.random.PRNGKey(1), (10, 3))
+    frames = np.stack([r0 * np.array([1.0 + t, 1.0, 1.0 - t / 2]) for t in np.linspace(0, 1, 21)])
+    for align in (True, False):
+        cv = PathCoordinates(list(range(10)), frames, align=align)
+        s, z = cv.function(frames[5])
+        assert np.isclose(s, 0.25, atol=1e-2)
+        assert np.isclose(PathProgress(list(range(10)), frames, align=align).function(frames[5]), s)
+        assert np.isclose(PathDistance(list(range(10)), frames, align=align).function(frames[5]), z)
+
+
+def test_ermsd_pruned_pairs():
+    # Evaluating only the candidate pairs should match the all-pairs result
+    keys = jax.random.split(jax.random.PRNGKey(2), 3)
+    origins = np.cumsum(0.6 * jax.random.normal(keys[0], (40, 3)), axis=0)
+    sites = 0.15 * jax.random.normal(keys[1], (40, 3, 3))
+    reference = (origins[:, None] + sites).reshape(-1, 3)
+    positions = reference + 0.05 * jax.random.normal(keys[2], reference.shape)
+    indices = list(range(len(reference)))
+
+    cv = ERMSD(indices, reference)
+    pruned_cv = ERMSD(indices, reference, max_pairs=800)
+    assert np.isclose(cv.function(positions), pruned_cv.function(positions))
+    assert np.allclose(
+        jax.jacrev(cv.function)(positions), jax.jacrev(pruned_cv.function)(positions)
+    )
+
+
+def test_shape_descriptors():
+    key = jax.random.PRNGKey(0)
+    A = jax.random.normal(key, (16, 3, 3))
+    A = A + A.transpose(0, 2, 1)
+    assert np.allclose(eigvalsh3(A), np.linalg.eigvalsh(A), atol=1e-5)
+
+    # Gradients stay finite for degenerate eigenvalues
+    for S in (np.identity(3), np.diag(np.array([1.0, 1.0, 2.0]))):
+        dS = jax.jacobian(eigvalsh3)(S)
+        assert np.all(np.isfinite(dS))
+        assert np.allclose(np.einsum("kii->k", dS), 1.0)
+
+    positions = jax.random.normal(key, (32, 3)) * np.array([1.0, 2.0, 3.0])
+    snapshot = Snapshot(positions, np.arange(32))
+    cv = ShapeDescriptors(list(range(32)), ("radius_of_gyration", "asphericity"))
+    value, gradient = build(cv)(snapshot)
+    lambdas = np.linalg.eigvalsh(positions.T @ positions / 32)
+    expected = [np.sum(lambdas), lambdas[2] - (lambdas[0] + lambdas[1]) / 2]
+    assert value.shape == (1, 2) and np.allclose(value, np.array(expected), rtol=1e-5)
+    assert np.all(np.isfinite(gradient))
+
+    # The radius of gyration functions keep returning three copies of the value
+    weights = np.full(32, 1 / 32)
+    assert np.allclose(radius_of_gyration(positions), np.full(3, expected[0]), rtol=1e-5)
+    assert np.allclose(weighted_radius_of_gyration(positions, weights), np.full(3, expected[0]))
+    assert np.isclose(squared_radius_of_gyration(positions), expected[0], rtol=1e-5)
+    assert np.isclose(weighted_squared_radius_of_gyration(positions, weights), expected[0])
+
+
+def test_dihedral_angles():
+    key = jax.random.PRNGKey(0)
+    positions = jax.random.normal(key, (12, 3))
+    snapshot = Snapshot(positions, np.arange(12))
+    indices = [[i, i + 1, i + 2, i + 3] for i in range(9)]
+
+    value, gradient = build(DihedralAngles(indices))(snapshot)
+    stacked_value, stacked_gradient = build(*(DihedralAngle(idx) for idx in indices))(snapshot)
+    assert value.shape == (1, 9)
+    assert np.allclose(value, stacked_value) and np.allclose(gradient, stacked_gradient)
+
+    projection = jax.random.normal(key, (2, 18))
+    cv = DihedralAngles(indices, features="sincos", projection=projection)
+    features = np.stack((np.cos(stacked_value), np.sin(stacked_value)), axis=-1).flatten()
+    value, gradient = build(cv)(snapshot)
+    assert np.allclose(value, projection @ features, atol=1e-5)
+    assert gradient.shape == (2, 36)
+
+
+def test_build_memoization():
+    # Identical collective variables share the same compiled function
+    assert build(Distance([0, 1])) is build(Distance([0, 1]))
+    assert build(Distance([0, 1])) is not build(Distance([1, 0]))
+    assert build(Distance([0, 1])) is not build(Distance([0, 1]), differentiate=False)
+    indices = [[0, 1, 2, 3]]
+    assert build(DihedralAngles(indices, "sincos")) is build(DihedralAngles(indices, "sincos"))
+    # Parameters that compare equal but have different types are kept apart
+    assert _cv_key(Component([0], 1)) != _cv_key(Component([0], True))
+    references = np.arange(6.0).reshape(2, 3)
+    assert _cv_key(RMSD([0, 1], references)) == _cv_key(RMSD([0, 1], references + 0))
+    assert _cv_key(RMSD([0, 1], references)) != _cv_key(RMSD([0, 1], references + 1))
+    assert _cv_key(RMSD([0, 1], references)) != _cv_key(RMSD([0, 1], references.astype(np.float32)))
+
+    # Only the most recently used builds are kept
+    fn = build(Distance([0, 1]))
+    for i in range(_BUILD_CACHE_SIZE):
+        build(Distance([i + 2, i + 3]))
+        build(Distance([0, 1]))
+    assert len(_BUILD_CACHE) <= _BUILD_CACHE_SIZE
+    assert build(Distance([0, 1])) is fn
+    assert build(Distance([2, 3])) is not build(Distance([2, 3]), differentiate=False)
+
+
+def test_quaternion_multiply():
+    q0 = quaternion_from_euler(0.3, -1.2, 2.0)
+    q1 = quaternion_from_euler(-0.7, 0.4, 1.1)
+    identity = np.array([1.0, 0.0, 0.0, 0.0])
+    assert np.allclose(quaternion_multiply(q0, identity), q0)
+    assert np.allclose(quaternion_multiply(identity, q0), q0)
+    # Rotating by `q0` and then by `q1` is the same as rotating by their product
+    R = quaternion_matrix(quaternion_multiply(q1, q0))
+    assert np.allclose(R, quaternion_matrix(q1) @ quaternion_matrix(q0))
+    assert not np.allclose(R, quaternion_matrix(q0) @ quaternion_matrix(q1))
+
+
+def test_gem():
+    jmd = importlib.import_module("jax_md")
+    GeM = importlib.import_module("pysages.colvars.patterns").GeM
+
+    # Simple cubic lattice, with an octahedral reference for the neighborhood of each site
+    L = 4.0
+    x = np.arange(L) + 0.5
+    positions = np.stack(np.meshgrid(x, x, x, indexing="ij"), axis=-1).reshape(-1, 3)
+    reference = np.concatenate((np.identity(3), -np.identity(3)))
+    displacement, _ = jmd.space.periodic(L)
+    neighbor_list_fn = jmd.partition.neighbor_list(
+        displacement,
+        L,
+        1.2,
+        dr_threshold=0.2,
+        capacity_multiplier=1.5,
+        format=jmd.partition.NeighborListFormat.Dense,
+    )
+    nbrs = neighbor_list_fn.allocate(positions)
+    indices = list(range(len(positions)))
+    cv = GeM(indices, reference, L * np.identity(3), 4, 10, 0.25, 20, nbrs, False, chunk_size=16)
+
+    # The state carries the neighbor list, which is only rebuilt when atoms move far enough
+    f = jax.jit(cv.stateful_function)
+    value, state = f(positions, cv.state)
+    assert np.isclose(value, 1.0) and state.rotations.shape == (len(positions), 4)
+    _, state = f(positions + 0.05, state)
+    assert np.allclose(state.neighbors.reference_position, positions)
+    _, state = f(positions + 0.15, state)
+    assert np.allclose(state.neighbors.reference_position, positions + 0.15)
+
+    # Warm-started matching agrees with the full search
+    key = jax.random.PRNGKey(0)
+    noisy_positions = positions + 0.05 * jax.random.normal(key, positions.shape)
+    value, _ = f(noisy_positions, cv.state)
+    warm_value, _ = f(noisy_positions, state)
+    assert value < 0.5 and np.isclose(warm_value, value, atol=1e-2)
+
+    cv.update_warm_start(positions)
+    assert cv.state.rotations.shape == (len(positions), 4)
@@ -0,0 +1,158 @@
+import json
+import os
+import pickle
+
+import numpy as np
+from jax import tree_util
+from test_simulations.abf import generate_simulation
+
+import pysages
+from pysages.backends.snapshot import Box, Snapshot
+from pysages.colvars import Component
+from pysages.methods import FFS
+from pysages.methods.ffs import FFSProgress, SnapshotPool
+
+# The first atom drifts along `x` at about 0.01 Å per time step, so that the
+# interfaces below are crossed within a few time steps
+# (`dt`, `win_i`, `win_l`, `Nw`, `sampling_steps_basin`, `Nmax_replicas`)
+FFS_ARGS = (1.0, 1.585, 1.6, 2, 1, 2)
+WIN_I, WIN_L, NMAX_REPLICAS = FFS_ARGS[1], FFS_ARGS[2], FFS_ARGS[5]
+
+
+def generate_drifting_simulation(**kwargs):
+    md = generate_simulation(**kwargs)
+    velocities = md.atoms.get_velocities()
+    velocities[:, 0] += 0.1
+    md.atoms.set_velocities(velocities)
+    return md
+
+
+def run_ffs(tmp_path, **kwargs):
+    method = FFS([Component([0], 0)])
+    context_args = dict(write_output=False)
+    kwargs.setdefault("chunk_size", 1)
+    kwargs.setdefault("results_file", str(tmp_path / "ffs_results.dat"))
+    return pysages.run(
+        method, generate_drifting_simulation, 0, *FFS_ARGS, context_args=context_args, **kwargs
+    )
+
+
+def read_records(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_ffs_run(tmp_path):
+    pool = SnapshotPool(str(tmp_path / "snapshots"))
+    state = run_ffs(tmp_path, snapshot_pool=pool)
+
+    # The last trial reached the target interface and stored its crossing configuration
+    assert state.status == 1
+    assert state.crossing_ncalls <= state.ncalls
+    assert state.crossing[0][0, 0] >= WIN_L
+
+    # Basin configurations plus those at the crossing of each interface
+    keys = [f[: -len(".npz")] for f in os.listdir(pool.directory) if f.endswith(".npz")]
+    assert len(keys) == 3 * NMAX_REPLICAS
+    positions = sorted(float(pool[key].positions[0, 0]) for key in keys)
+    assert np.all(np.array(positions[:2]) < WIN_I)
+    assert np.all(np.array(positions[2:]) >= WIN_I)
+
+    # By default, results are written one value per line as in earlier versions
+    with open(tmp_path / "ffs_results.dat") as f:
+        lines = f.read().splitlines()
+    assert len(lines) == 4 and lines[2] == "# Flux Constant"
+    flux, probability, rate = (float(line) for line in lines[:2] + lines[3:])
+    assert flux > 0 and probability == 1
+    assert np.isclose(rate, flux * probability)
+
+
+def test_ffs_resume(tmp_path):
+    checkpoint_dir = str(tmp_path / "checkpoint")
+    progress_path = os.path.join(checkpoint_dir, "progress.json")
+    results_file = str(tmp_path / "ffs_results.jsonl")
+    run_ffs(tmp_path, checkpoint_dir=checkpoint_dir, results_file=results_file)
+
+    # Files ending with `.jsonl` get a JSON record per completed stage
+    records = read_records(results_file)
+    assert [set(r) for r in records] == [
+        {"window", "interface", "flux"},
+        {"window", "interface", "probability"},
+        {"rate"},
+    ]
+    assert [r.get("window") for r in records] == [0, 1, None]
+    assert np.allclose([records[0]["interface"], records[1]["interface"]], [WIN_I, WIN_L])
+    assert np.isclose(records[2]["rate"], records[0]["flux"] * records[1]["probability"])
+    progress = FFSProgress.load(progress_path)
+    assert len(progress.basin) == NMAX_REPLICAS
+    assert progress.probabilities == (records[1]["probability"],)
+    assert progress.rate == records[2]["rate"]
+
+    # Resuming a completed run neither runs any trials nor records the rate again
+    state = run_ffs(tmp_path, checkpoint_dir=checkpoint_dir, results_file=results_file)
+    assert state.ncalls == 0
+    assert read_records(results_file) == records
+
+    # Resuming after the initial flux only runs the trials of the remaining interface
+    progress._replace(probabilities=(), snapshots=progress.initial_snapshots, rate=None).save(
+        progress_path
+    )
+    state = run_ffs(tmp_path, checkpoint_dir=checkpoint_dir, results_file=results_file)
+    assert state.ncalls > 0
+    assert read_records(results_file) == records + records[1:]
+    resumed_progress = FFSProgress.load(progress_path)
+    assert resumed_progress.probabilities == progress.probabilities
+    assert resumed_progress.rate == progress.rate
+
+
+def test_ffs_trial_batches(tmp_path):
+    results_file = str(tmp_path / "ffs_results.jsonl")
+    run_ffs(tmp_path, results_file=results_file)
+    run_ffs(tmp_path, trial_batches=2, results_file=results_file)
+
+    # Each batch of trials runs on its own simulation, with the same outcome
+    records = read_records(results_file)
+    assert records[:3] == records[3:]
+
+
+def test_snapshot_pool(tmp_path):
+    rng = np.random.default_rng(0)
+    box = Box(np.eye(3), np.zeros(3))
+    positions = rng.random((4, 3))
+    snapshots = [
+        Snapshot(positions, rng.random((4, 4)), rng.random((4, 3)), np.arange(4), None, box, 0.1),
+        Snapshot(
+            positions,
+            (rng.random((4, 3)), rng.random(4)),
+            rng.random((4, 3)),
+            np.arange(4),
+            np.ones((4, 3), dtype=np.int32),
+            box,
+            0.1,
+        ),
+    ]
+
+    pool = SnapshotPool(str(tmp_path / "snapshots"))
+    keys = [pool.add(snapshot) for snapshot in snapshots]
+    assert len(set(keys)) == 2 and all(key in pool for key in keys)
+    assert "missing" not in pool
+    assert not any(f.endswith(".tmp.npz") for f in os.listdir(pool.directory))
+
+    for key, snapshot in zip(keys, snapshots):
+        restored = pool[key]
+        assert tree_util.tree_structure(restored) == tree_util.tree_structure(snapshot)
+        for value, expected in zip(
+            tree_util.tree_leaves(restored), tree_util.tree_leaves(snapshot)
+        ):
+            assert np.allclose(value, expected)
+
+    # Temporary pools are removed once garbage collected, but not by their copies
+    pool = SnapshotPool()
+    directory = pool.directory
+    copy = pickle.loads(pickle.dumps(pool))
+    key = pool.add(snapshots[0])
+    assert copy.directory == directory and key in copy
+    del copy
+    assert os.path.isdir(directory)
+    del pool
+    assert not os.path.exists(directory)
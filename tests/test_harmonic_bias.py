@@ -0,0 +1,58 @@
+import collections
+import pathlib
+
+import dill as pickle
+import numpy as np
+from test_simulations.abf import generate_simulation
+
+import pysages
+from pysages.backends import SamplingContext
+from pysages.colvars import Angle
+from pysages.methods import HarmonicBias
+from pysages.methods.harmonic_bias import HarmonicBiasState
+
+
+def test_update_reuse(compiles):
+    method = HarmonicBias([Angle([1, 0, 2])], 50.0, 1.8)
+    sampling_context = SamplingContext(
+        method, generate_simulation, context_args=dict(write_output=False)
+    )
+    pysages.run(sampling_context, 5)
+
+    # Windows with different centers and spring constants reuse the compiled update
+    for center, kspring in ((1.7, 50.0), (1.9, 20.0)):
+        compiles.clear()
+        method = HarmonicBias([Angle([1, 0, 2])], kspring, center)
+        result = pysages.run(method, sampling_context, 5)
+        assert len(compiles) == 0
+        assert np.allclose(result.states[0].center, center)
+        assert np.allclose(result.states[0].kspring, kspring)
+
+
+def test_load_legacy_result():
+    method = HarmonicBias([Angle([1, 0, 2])], 50.0, 1.8)
+    result = pysages.run(method, generate_simulation, 5, context_args=dict(write_output=False))
+
+    # Emulate a result pickled before the state held the center and spring constant
+    LegacyState = collections.namedtuple(
+        "HarmonicBiasState", ("xi", "bias", "ncalls"), module=HarmonicBiasState.__module__
+    )
+    state = result.states[0]
+    ncalls = int(state.ncalls)
+    result.states = [LegacyState(state.xi, state.bias, ncalls)]
+
+    tmp_file = pathlib.Path(".tmp_test_harmonic_bias")
+    with open(tmp_file, "wb") as io:
+        pickle.dump(result, io)
+    result = pysages.load(tmp_file.name)
+    tmp_file.unlink()
+
+    state = result.states[0]
+    assert type(state) is HarmonicBiasState
+    assert state.ncalls == ncalls
+    assert state.center is None and state.kspring is None
+
+    # Restarting takes the center and spring constant from the method
+    result = pysages.run(result, generate_simulation, 5, context_args=dict(write_output=False))
+    assert np.allclose(result.states[0].center, 1.8)
+    assert result.states[0].ncalls > ncalls
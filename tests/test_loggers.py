@@ -0,0 +1,41 @@
+from collections import namedtuple
+
+import numpy as np
+import pytest
+
+from pysages.methods import HistogramLogger, StatisticsLogger
+
+State = namedtuple("State", ("xi",))
+
+
+def log_samples(logger, samples):
+    for xi in samples:
+        logger(None, State(xi.reshape(1, -1)), 0)
+    return logger
+
+
+def test_statistics_logger():
+    rng = np.random.default_rng(0)
+    samples = rng.uniform(-1.0, 1.0, size=(50, 2))
+    bins, ranges = (4, 5), [(-1.0, 1.0), (-1.0, 1.0)]
+
+    histogram_logger = log_samples(HistogramLogger(2, 10), samples)
+    statistics_logger = log_samples(StatisticsLogger(2, 10, bins, ranges), samples)
+
+    assert np.allclose(statistics_logger.get_means(), histogram_logger.get_means())
+    assert np.allclose(statistics_logger.get_cov(), histogram_logger.get_cov())
+
+    # Both loggers take the same arguments to compute their histograms
+    for kwargs in ({}, {"density": True}, {"density": False}):
+        kwargs = dict(bins=bins, range=ranges, **kwargs)
+        hist, edges = statistics_logger.get_histograms(**kwargs)
+        expected_hist, expected_edges = histogram_logger.get_histograms(**kwargs)
+        assert np.allclose(hist, expected_hist)
+        for e, expected_e in zip(edges, expected_edges):
+            assert np.allclose(e, expected_e)
+
+    assert np.allclose(statistics_logger.get_histograms()[0], hist / hist.sum() / 0.2)
+    with pytest.raises(ValueError):
+        statistics_logger.get_histograms(bins=8, range=ranges)
+    with pytest.raises(TypeError):
+        statistics_logger.get_histograms(weights=np.ones(len(samples)))
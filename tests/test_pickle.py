@@ -1,3 +1,4 @@
+import collections
 import importlib
 import inspect
 import pathlib
@@ -92,10 +93,25 @@ METHODS_ARGS = {
         "period": 1,
         "offset": 1,
     },
+    "StatisticsLogger": {
+        "period": 1,
+        "bins": 8,
+        "ranges": [(0.0, 1.0)],
+    },
     "MetaDLogger": {
         "hills_file": "tmp.txt",
         "log_period": 158,
     },
+    "AnalysisStrategy": {},
+    "GradientLearning": {},
+    "PoissonIntegration": {"weighted": True},
+    "MetaDBiasLogger": {
+        "method": pysages.methods.Metadynamics(
+            [pysages.colvars.Component([0], 0)], 1.0, 0.5, 7, 5, grid=pysages.Grid(-pi, pi, 32)
+        ),
+        "kT": 1.0,
+        "period": 10,
+    },
     "ReplicasConfiguration": {},
     "SerialExecutor": {},
     "CVRestraints": {"lower": (-pi, -pi), "upper": (pi, pi), "kl": (0.0, 1.0), "ku": (1.0, 0.0)},
@@ -126,17 +142,26 @@ def test_pickle_methods():
                 raise error
 
 
+PATH_REFERENCES = [[[0.0, 0.0, 0.0], [1.0, 0.0, 0.0]], [[0.0, 0.0, 0.0], [2.0, 0.0, 0.0]]]
+
 COLVAR_ARGS = {
     "Angle": {"indices": [0, 1, 2]},
     "DihedralAngle": {"indices": [0, 1, 2, 3]},
+    "DihedralAngles": {"indices": [[0, 1, 2, 3], [1, 2, 3, 4]], "features": "sincos"},
     "RadiusOfGyration": {"indices": [0, 1, 2, 3]},
     "PrincipalMoment": {"indices": [0, 1, 2, 3], "axis": 0},
     "Asphericity": {"indices": [0, 1, 2, 3]},
     "Acylindricity": {"indices": [0, 1, 2, 3]},
     "ShapeAnisotropy": {"indices": [0, 1, 2, 3]},
+    "ShapeDescriptors": {"indices": [0, 1, 2, 3]},
     "Component": {"indices": [0, 1, 2, 3], "axis": 0},
     "Distance": {"indices": [0, 1]},
     "Displacement": {"indices": [[0], [1]]},
+    "CoordinationNumber": {"indices": [0, 1, 2, 3], "box": 2 * np.eye(3), "r0": 0.3},
+    "ContactCount": {"indices": [[0, 1], [2, 3]], "box": 2 * np.eye(3), "r0": 0.3},
+    "PathCoordinates": {"indices": [0, 1], "references": PATH_REFERENCES},
+    "PathProgress": {"indices": [0, 1], "references": PATH_REFERENCES},
+    "PathDistance": {"indices": [0, 1], "references": PATH_REFERENCES},
     "GeM": {
         "indices": np.arange(20),
         "reference_positions": np.array(
@@ -189,12 +214,47 @@ def test_pickle_results():
         assert np.all(test_result.states[0].Fsum == tmp_result.states[0].Fsum).item()
 
     tmp_file = pathlib.Path(".tmp_test_pickle")
-    pysages.save(test_result, tmp_file)
+
+    for compress in (True, False):
+        pysages.save(test_result, tmp_file, compress=compress)
+        tmp_result = pysages.load(tmp_file.name)
+
+        assert np.all(test_result.states[0].xi == tmp_result.states[0].xi).item()
+        assert np.all(test_result.states[0].bias == tmp_result.states[0].bias).item()
+        assert np.all(test_result.states[0].hist == tmp_result.states[0].hist).item()
+        assert np.all(test_result.states[0].Fsum == tmp_result.states[0].Fsum).item()
+        assert np.all(test_result.snapshots[0].positions == tmp_result.snapshots[0].positions)
+        assert test_result.states[0].ncalls == tmp_result.states[0].ncalls
+
+    # Results stored as plain pickles by earlier versions can still be loaded
+    with open(tmp_file, "wb") as io:
+        pickle.dump(test_result, io)
     tmp_result = pysages.load(tmp_file.name)
 
-    assert np.all(test_result.states[0].xi == tmp_result.states[0].xi).item()
-    assert np.all(test_result.states[0].bias == tmp_result.states[0].bias).item()
-    assert np.all(test_result.states[0].hist == tmp_result.states[0].hist).item()
     assert np.all(test_result.states[0].Fsum == tmp_result.states[0].Fsum).item()
+    assert test_result.states[0].ncalls == tmp_result.states[0].ncalls
+
+    tmp_file.unlink()
 
+
+def test_load_legacy_states():
+    # Emulate a result pickled (by `dill`) before method states had an `ncalls` field
+    from pysages.methods.abf import ABFState
+
+    fields = [f for f in ABFState._fields if f != "ncalls"]
+    LegacyState = collections.namedtuple("ABFState", fields, module=ABFState.__module__)
+
+    grid = pysages.Grid(lower=-pi, upper=pi, shape=16, periodic=True)
+    method = pysages.methods.ABF([pysages.colvars.Component([0], 0)], grid)
+    hist = np.arange(16, dtype=np.uint32).reshape(16, 1)
+    state = LegacyState(*(np.zeros(1) for _ in fields))._replace(hist=hist)
+
+    tmp_file = pathlib.Path(".tmp_test_legacy_pickle")
+    with open(tmp_file, "wb") as io:
+        pickle.dump(pysages.methods.core.Result(method, [state], None, None), io)
+    result = pysages.load(tmp_file.name)
     tmp_file.unlink()
+
+    assert type(result.states[0]) is ABFState
+    assert np.all(result.states[0].hist == hist)
+    assert result.states[0].ncalls == hist.sum()
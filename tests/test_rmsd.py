@@ -2,8 +2,9 @@
 
 import numpy as np
 import pytest
+from jax import grad
 
-from pysages.colvars.orientation import RMSD
+from pysages.colvars.orientation import RMSD, MultiReferenceRMSD, qcp
 
 
 @pytest.mark.parametrize(
@@ -24,3 +25,16 @@ def test_rmsd(f1, f2, rmsd_expected):
     assert np.allclose(
         rmsd_expected, rmsd_calculated
     ), f"Test Case PDB {f1} {f2} failed: {rmsd_expected, rmsd_calculated}"
+
+    rmsd_qcp = RMSD(indices, reference, optimal_rotation=qcp)
+    assert np.allclose(rmsd_expected, rmsd_qcp.function(base))
+    assert np.allclose(grad(rmsd_kabsch.function)(base), grad(rmsd_qcp.function)(base))
+
+
+def test_multi_reference_rmsd():
+    base = np.loadtxt("tests/ci2_1.txt", dtype=str)[:, 6:9].astype(float)
+    files = ("tests/ci2_2.txt", "tests/ci2_1t.txt")
+    references = np.stack([np.loadtxt(f, dtype=str)[:, 6:9].astype(float) for f in files])
+    indices = np.arange(len(base))
+    rmsds = MultiReferenceRMSD(indices, references).function(base)
+    assert np.allclose(rmsds, [11.7768, 0.000493294127])
@@ -0,0 +1,42 @@
+import numpy as np
+from test_simulations.abf import generate_simulation
+
+import pysages
+from pysages.backends import SamplingContext
+from pysages.colvars import Component
+from pysages.grids import Grid
+from pysages.methods import ABF, HarmonicBias
+
+
+def test_rebind_and_continue():
+    cvs = [Component([0], 0)]
+    abf = ABF(cvs, Grid(lower=0.0, upper=4.0, shape=32))
+    sampling_context = SamplingContext(
+        abf, generate_simulation, context_args=dict(write_output=False)
+    )
+    context = sampling_context.context
+    result = pysages.run(sampling_context, 5)
+    ncalls = int(result.states[0].ncalls)
+    assert result.states[0].hist.sum() == ncalls
+
+    # Binding another method keeps the configuration but starts from a fresh state
+    harmonic_bias = HarmonicBias(cvs, 10.0, 1.0)
+    sampler = sampling_context.rebind(harmonic_bias)
+    assert sampler is sampling_context.sampler and sampling_context.method is harmonic_bias
+    assert sampler.state.ncalls == 0
+    assert np.allclose(sampler.state.xi, result.states[0].xi)
+    assert np.allclose(sampler.take_snapshot().positions, result.snapshots[0].positions)
+
+    biased_result = pysages.run(harmonic_bias, sampling_context, 5)
+    assert biased_result.method is harmonic_bias
+    assert 0 < biased_result.states[0].ncalls <= ncalls
+    assert biased_result.states[0].bias[0, 0] < 0
+
+    # Continuing the first run restores both its method state and its configuration
+    result = pysages.run(result, sampling_context, 5)
+    state = result.states[0]
+    assert sampling_context.method is abf
+    assert state.ncalls > ncalls and state.hist.sum() == state.ncalls
+
+    # The simulation context is never regenerated
+    assert sampling_context.context is context
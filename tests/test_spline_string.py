@@ -0,0 +1,198 @@
+import threading
+from concurrent.futures import Executor, Future
+
+import numpy as np
+from test_simulations.abf import generate_simulation
+
+import pysages
+from pysages.colvars import Component
+from pysages.methods import SplineString
+from pysages.methods.spline_string import _evolve_image, _reparametrize
+
+CENTERS = [1.4, 1.5, 1.6, 1.7]
+
+
+def generate_replica(**kwargs):
+    # Each replica starts from the same configuration, regardless of
+    # `replica_num` and `stringstep`
+    return generate_simulation(write_output=False)
+
+
+class ReversedExecutor(Executor):
+    """
+    Runs each task as soon as it is submitted, but once `count` tasks were submitted,
+    reports them as finished one at a time (after the previous one was collected) in
+    the reverse order of their submission.
+    """
+
+    def __init__(self, count):
+        self.count = count
+        self.tasks = []
+
+    def submit(self, fn, *args, **kwargs):  # pylint: disable=arguments-differ
+        future = CollectedFuture()
+        self.tasks.append((future, fn(*args, **kwargs)))
+        if len(self.tasks) == self.count:
+            threading.Thread(target=self._report, daemon=True).start()
+        return future
+
+    def _report(self):
+        for future, result in reversed(self.tasks):
+            future.set_result(result)
+            future.collected.wait()
+
+
+class CollectedFuture(Future):
+    def __init__(self):
+        super().__init__()
+        self.collected = threading.Event()
+
+    def result(self, timeout=None):
+        result = super().result(timeout)
+        self.collected.set()
+        return result
+
+
+def build_method(**kwargs):
+    return SplineString([Component([0], 0)], 10.0, CENTERS, 0.01, 1, **kwargs)
+
+
+def centers(method):
+    return np.array([np.asarray(s.center).item() for s in method.umbrella_sampler.submethods])
+
+
+def test_string_update():
+    method = build_method(freeze_idx=[0])
+
+    # Images move a step of length `alpha` towards the mean of their samples
+    new_xi = np.array([_evolve_image(method, i, x + 0.1) for i, x in enumerate(CENTERS)])
+    assert np.allclose(new_xi.flatten(), np.array(CENTERS) + 0.01)
+    new_xi[2] += 0.03
+
+    # The reparametrized centers are equally spaced along the string, except for the
+    # frozen ones, and become the centers of the replicas
+    new_centers = np.array(_reparametrize(method, new_xi)).flatten()
+    assert np.allclose(centers(method), new_centers)
+    assert np.isclose(new_centers[0], CENTERS[0])
+    assert np.allclose(np.diff(new_centers[1:]), (new_centers[-1] - new_centers[1]) / 2)
+    assert np.isclose(new_centers[-1], new_xi[-1, 0])
+
+
+def test_restart(tmp_path):
+    method = build_method()
+    result = pysages.run(method, generate_replica, 2, 1)
+    assert len(method.path_history) == 1
+    assert np.allclose(centers(method), np.array(method.path_history[-1]).flatten())
+    ncalls = [int(state.ncalls) for state in result.states]
+
+    # Restarting reuses the last configuration and state of each replica, which are
+    # reconciled with the updated centers of the string
+    pysages.save(result, tmp_path / "result.pkl")
+    result = pysages.load(tmp_path / "result.pkl")
+    assert np.allclose(result.method.spacing, method.spacing)
+    assert np.allclose(centers(result.method), centers(method))
+    restarted = pysages.run(result, generate_replica, 2, 1)
+    method = restarted.method
+    assert len(method.path_history) == 2
+    for state, n, center in zip(restarted.states, ncalls, method.path_history[0]):
+        assert state.ncalls > n
+        assert np.allclose(state.center, center)
+
+    # Otherwise the replicas start over from the configurations of `generate_replica`
+    restarted = pysages.run(result, generate_replica, 2, 1, reuse_snapshots=False)
+    for state, n in zip(restarted.states, ncalls):
+        assert state.ncalls == n
+
+
+def test_context_reuse():
+    generated, stringsteps = [], []
+
+    def generate_recorded_replica(replica_num, **kwargs):
+        generated.append(replica_num)
+        return generate_replica(**kwargs)
+
+    def record_stringstep(replica_num, stringstep, **kwargs):
+        stringsteps.append((replica_num, stringstep))
+
+    # Each replica keeps its simulation context across the string iterations
+    method = build_method()
+    result = pysages.run(
+        method, generate_recorded_replica, 1, 3, dict(), post_run_action=record_stringstep
+    )
+    replicas = range(len(CENTERS))
+    assert sorted(generated) == list(replicas)
+    assert stringsteps == [(n, step) for step in range(3) for n in replicas]
+    # The last iteration sampled the centers set by the previous one
+    for state, center in zip(result.states, method.path_history[-2]):
+        assert np.allclose(state.center, center)
+
+    # Otherwise every iteration sets up the simulation contexts again
+    generated.clear()
+    pysages.run(build_method(), generate_recorded_replica, 1, 2, dict(), reuse_snapshots=False)
+    assert len(generated) == 2 * len(CENTERS)
+
+
+def test_asynchronous_run():
+    calls = []
+
+    def record_run(replica_num, stringstep, **kwargs):
+        calls.append((replica_num, stringstep))
+
+    method = build_method(freeze_idx=[0])
+    result = pysages.run(
+        method,
+        generate_replica,
+        1,
+        2,
+        dict(),
+        post_run_action=record_run,
+        asynchronous=True,
+    )
+
+    # Each image is resubmitted as soon as its previous run finishes, and the string
+    # is recorded once per round of updates
+    assert sorted(calls) == [(n, s) for n in range(len(CENTERS)) for s in range(2)]
+    assert len(method.path_history) == 2
+    assert np.allclose(centers(method), np.array(method.path_history[-1]).flatten())
+    assert np.isclose(centers(method)[0], CENTERS[0])
+
+    # The second round continues from the states and configurations of the first one
+    single_result = pysages.run(build_method(), generate_replica, 1, 1)
+    for state, single_state in zip(result.states, single_result.states):
+        assert state.ncalls > single_state.ncalls
+
+
+def test_asynchronous_update_order():
+    cvs = [Component([0], 0), Component([0], 1)]
+    string_centers = np.array([[1.4, 1.2], [1.5, 1.3], [1.6, 1.32], [1.7, 1.25]])
+    method = SplineString(cvs, 10.0, string_centers, 0.01, 1)
+    executor = ReversedExecutor(len(string_centers))
+    result = pysages.run(method, generate_replica, 1, 1, executor=executor, asynchronous=True)
+
+    # The windows finish in reverse order. Each one moves from the center it was sampled
+    # at, even though the updates of the string meanwhile moved the centers of the
+    # windows that were still running.
+    expected = SplineString(cvs, 10.0, string_centers, 0.01, 1)
+    for i in reversed(range(len(string_centers))):
+        mean = np.asarray(result.callbacks[i].get_means())
+        direction = (mean - string_centers[i]) / np.linalg.norm(mean - string_centers[i])
+        new_xi = np.array([s.center for s in expected.umbrella_sampler.submethods])
+        new_xi[i] = string_centers[i] + 0.01 * direction
+        _reparametrize(expected, new_xi)
+
+    expected_centers = np.array([s.center for s in expected.umbrella_sampler.submethods])
+    moved_centers = np.array([s.center for s in method.umbrella_sampler.submethods])
+    assert np.allclose(moved_centers, expected_centers)
+    assert np.allclose(np.array(method.path_history[-1]), expected_centers)
+
+
+def test_update_reuse(compiles):
+    pysages.run(build_method(), generate_replica, 1, 1)
+
+    # The windows of other strings, and the string iterations (which bind the updated
+    # windows to their simulation contexts again), reuse the compiled updates
+    compiles.clear()
+    method = SplineString([Component([0], 0)], 20.0, [1.3, 1.45, 1.55, 1.8], 0.02, 1)
+    pysages.run(method, generate_replica, 1, 2)
+    assert len(method.path_history) == 2
+    assert len(compiles) == 0
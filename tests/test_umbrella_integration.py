@@ -0,0 +1,101 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from test_simulations.abf import generate_simulation
+
+import pysages
+from pysages.colvars import Component
+from pysages.methods import SerialExecutor, UmbrellaIntegration
+from pysages.methods.core import ReplicaResult, Result
+from pysages.methods.umbrella_integration import _submit_replica
+
+CENTERS = [1.4, 1.6]
+
+
+def generate_replica(**kwargs):
+    return generate_simulation(write_output=False)
+
+
+def build_method():
+    return UmbrellaIntegration([Component([0], 0)], 10.0, CENTERS, 1)
+
+
+def test_on_replica_done():
+    done = []
+
+    def on_replica_done(n, replica_result):
+        # Replicas are reported as soon as they finish, before the run returns
+        assert isinstance(replica_result, ReplicaResult)
+        done.append((n, replica_result))
+
+    result = pysages.run(
+        build_method(),
+        generate_replica,
+        2,
+        on_replica_done=on_replica_done,
+    )
+
+    assert sorted(n for n, _ in done) == list(range(len(CENTERS)))
+    for n, replica_result in done:
+        assert replica_result.states is result.states[n]
+        assert replica_result.callbacks is result.callbacks[n]
+        assert replica_result.snapshots is result.snapshots[n]
+        assert np.allclose(result.states[n].center, CENTERS[n])
+
+
+def test_submit_replica():
+    calls = []
+
+    def generate_recorded_replica(**kwargs):
+        calls.append(kwargs)
+        return generate_replica(**kwargs)
+
+    method = build_method()
+    context_args = dict(write_output=False)
+    replica_result = _submit_replica(
+        SerialExecutor(), method, 1, generate_recorded_replica, 2, context_args, None
+    ).result()
+
+    # Each replica gets its own copy of `context_args` along with its index
+    assert calls == [dict(write_output=False, replica_num=1)]
+    assert context_args == dict(write_output=False)
+    assert replica_result.method is method.submethods[1]
+    assert replica_result.callbacks is method.histograms[1]
+    assert np.allclose(replica_result.states.center, CENTERS[1])
+    ncalls = int(replica_result.states.ncalls)
+    assert len(replica_result.callbacks.data) > 0
+
+    # Windows of a previous result continue from their last state and configuration
+    states = [None, replica_result.states]
+    snapshots = [None, replica_result.snapshots]
+    result = Result(method, states, method.histograms, snapshots)
+    replica_result = _submit_replica(
+        SerialExecutor(), result, 1, generate_recorded_replica, 2, context_args, None
+    ).result()
+    assert len(calls) == 2
+    assert replica_result.states.ncalls > ncalls
+
+
+def test_sampling_contexts():
+    sampling_contexts = [None] * len(CENTERS)
+    result = pysages.run(build_method(), generate_replica, 2, sampling_contexts=sampling_contexts)
+    contexts = [sampling_context.context for sampling_context in sampling_contexts]
+
+    # Continuing the run binds the windows to the simulation contexts of the first one
+    ncalls = [int(state.ncalls) for state in result.states]
+    result = pysages.run(result, generate_replica, 2, sampling_contexts=sampling_contexts)
+    for sampling_context, context in zip(sampling_contexts, contexts):
+        assert sampling_context.context is context
+    for state, n in zip(result.states, ncalls):
+        assert state.ncalls > n
+
+    # Simulation contexts cannot be shared with other threads or processes
+    with ThreadPoolExecutor(1) as executor, pytest.raises(ValueError):
+        pysages.run(
+            build_method(),
+            generate_replica,
+            2,
+            executor=executor,
+            sampling_contexts=sampling_contexts,
+        )